@@ -0,0 +1,67 @@
+import argparse
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+import time
+
+from LxmlTreeBuilder import LxmlTreeBuilder
+from OutputStreamWriter import OutputStreamWriter
+from PositionXmlParser import PositionXmlParser
+from Svg2Vector import Svg2Vector
+
+# Compares the parser backends of PositionXmlParser on the given SVG files, e.g. large maps.
+# Reports the best time of parsing alone and of a whole conversion for each backend. Without
+# arguments a synthetic map with many paths is generated.
+
+def createMap(pathCount: int) -> bytes:
+    lines = ['<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" width="1000" height="1000" viewBox="0 0 1000 1000">']
+    for i in range(pathCount):
+        x = i % 100 * 10
+        y = i // 100 % 100 * 10
+        lines.append(f'  <path id="region{i}" fill="#{i % 4096:03x}" stroke="#000" stroke-width="0.5" '
+                     f'd="M{x} {y}l8.5 0.25l0.75 4.5l-1.25 4.25l-7.5 -0.5z"/>')
+    lines.append('</svg>')
+    return '\n'.join(lines).encode('utf-8')
+
+def best(function, repeat: int) -> float:
+    result = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        result = min(result, time.perf_counter() - start)
+    return result
+
+def convert(data: bytes, backend: str):
+    PositionXmlParser.setDefaultBackend(backend)
+    Svg2Vector.parseStringToXml(data, OutputStreamWriter())
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares the expat and lxml parser backends.')
+    parser.add_argument('files', nargs='*', help='SVG files to parse (default: a generated map)')
+    parser.add_argument('--paths', type=int, default=20000, help='number of paths of the generated map')
+    parser.add_argument('--repeat', type=int, default=5, help='number of runs of which the best is reported')
+    args = parser.parse_args()
+
+    inputs = []
+    for path in args.files:
+        with open(path, 'rb') as file:
+            inputs.append((os.path.basename(path), file.read()))
+    if not inputs:
+        inputs.append((f'generated map with {args.paths} paths', createMap(args.paths)))
+
+    backends = [PositionXmlParser.BACKEND_EXPAT]
+    if LxmlTreeBuilder.isAvailable():
+        backends.append(PositionXmlParser.BACKEND_LXML)
+    else:
+        print('lxml is not installed, only measuring expat')
+
+    for name, data in inputs:
+        print(f'{name} ({len(data) / 1024:.0f} KiB)')
+        for backend in backends:
+            parse = best(lambda: PositionXmlParser.parseString(data, backend), args.repeat)
+            total = best(lambda: convert(data, backend), args.repeat)
+            print(f'  {backend:6} parse {parse * 1000:8.1f} ms   convert {total * 1000:8.1f} ms')
+    PositionXmlParser.setDefaultBackend(PositionXmlParser.BACKEND_EXPAT)
+
+if __name__ == '__main__':
+    main()
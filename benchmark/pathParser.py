@@ -0,0 +1,88 @@
+import argparse
+import gc
+import os
+import random
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+import time
+
+from PathParser import PathParser
+
+# Measures PathParser.parsePath on large path data, e.g. the d attributes of a detailed map.
+# Reports the best time of the regular expression tokenizer and of the character by character
+# scan that it replaces. Without arguments multi-megabyte path data is generated.
+
+# Writes a number the way optimizers do, without a leading zero.
+def formatNumber(value: float) -> str:
+    s = f'{value:.3f}'
+    return s.replace('0.', '.', 1) if s.startswith(('0.', '-0.')) else s
+
+def createPathData(size: int) -> str:
+    rand = random.Random(0)
+    parts = ['M10.5 20.25']
+    length = 0
+    while length < size:
+        command = rand.choice('lLcCsShHvVqQtTaA')
+        if command in 'aA':
+            part = (f'{command}{formatNumber(rand.uniform(1, 50))} {formatNumber(rand.uniform(1, 50))} {rand.uniform(0, 360):.1f} '
+                    f'{rand.randint(0, 1)}{rand.randint(0, 1)}{formatNumber(rand.uniform(-100, 100))},{formatNumber(rand.uniform(-100, 100))}')
+        else:
+            count = {'l': 2, 'c': 6, 's': 4, 'h': 1, 'v': 1, 'q': 4, 't': 2}[command.lower()]
+            # Implicit separators where possible, e.g. "l1.5-2.25.5", as written by optimizers.
+            part = command
+            for i in range(count):
+                number = formatNumber(rand.uniform(-1, 1) if rand.random() < 0.3 else rand.uniform(-100, 100))
+                part += number if i == 0 or number[0] in '-.' else ' ' + number
+        parts.append(part)
+        length += len(part)
+        if rand.random() < 0.05:
+            parts.append('z')
+    return ''.join(parts)
+
+# Like timeit, runs without the garbage collector, which would otherwise repeatedly walk the
+# growing list of nodes.
+def best(function, repeat: int) -> float:
+    result = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            function()
+            result = min(result, time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return result
+
+# Parses with the character by character scan alone, for comparison.
+def scanPath(value: str, mode: PathParser.ParseMode):
+    value = value.strip()
+    starts = [0] + [match.start() for match in PathParser.COMMAND.finditer(value, 1)] + [len(value)]
+    for i in range(len(starts) - 1):
+        s = value[starts[i]: starts[i + 1]]
+        if s[0] not in 'zZ':
+            PathParser.extractFloats(s, mode)
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures the path data tokenizer.')
+    parser.add_argument('files', nargs='*', help='files containing path data (default: generated path data)')
+    parser.add_argument('--size', type=int, default=4 * 1024 * 1024, help='length of the generated path data')
+    parser.add_argument('--repeat', type=int, default=3, help='number of runs of which the best is reported')
+    args = parser.parse_args()
+
+    inputs = []
+    for path in args.files:
+        with open(path, 'r') as file:
+            inputs.append((os.path.basename(path), file.read()))
+    if not inputs:
+        inputs.append(('generated path data', createPathData(args.size)))
+
+    for name, value in inputs:
+        print(f'{name} ({len(value) / 1024 / 1024:.1f} MiB, {len(PathParser.parsePath(value, PathParser.ParseMode.SVG))} commands)')
+        for mode in PathParser.ParseMode:
+            tokenized = best(lambda: PathParser.parsePath(value, mode), args.repeat)
+            scanned = best(lambda: scanPath(value, mode), args.repeat)
+            print(f'  {mode.name:7} parsePath {tokenized * 1000:8.1f} ms   character scan {scanned * 1000:8.1f} ms   {scanned / tokenized:4.1f}x')
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,4 @@
+from array import array
 import math
 from typing_compat import Self
 import sys
@@ -315,7 +316,7 @@ class AffineTransform:
     def transform(self, *args):
         if len(args) == 2 and self.arg_type_matcher(args, [Point2D, object]):
             return self.transform_PP(args[0], args[1])
-        elif len(args) == 5 and self.arg_type_matcher(args, [list, int, list, int, int]):
+        elif len(args) == 5 and self.arg_type_matcher(args, [(list, array), int, (list, array), int, int]):
             self.transform_lilii(args[0], args[1], args[2], args[3], args[4])
         else:
             raise ValueError(f'transform args wrong {args}')
@@ -355,7 +356,7 @@ class AffineTransform:
         M10 = 0.0
         M11 = 0.0
         M12 = 0.0
-        if dstPts == srcPts and srcOff < dstOff and dstOff < srcOff + numPts * 2:
+        if dstPts is srcPts and srcOff < dstOff and dstOff < srcOff + numPts * 2:
             dstPts[dstOff:dstOff + numPts * 2] = srcPts[srcOff:srcOff + numPts * 2]
             srcOff = dstOff
         if self.state == self.APPLY_SHEAR | self.APPLY_SCALE | self.APPLY_TRANSLATE:
@@ -569,7 +570,7 @@ class AffineTransform:
     def deltaTransform(self, *args):
         if len(args) == 2 and self.arg_type_matcher(args, [Point2D, object]):
             self.deltaTransform_PP(args[0], args[1])
-        elif len(args) == 5 and self.arg_type_matcher(args, [list, int, list, int, int]):
+        elif len(args) == 5 and self.arg_type_matcher(args, [(list, array), int, (list, array), int, int]):
             self.deltaTransform_lilii(args[0], args[1], args[2], args[3], args[4])
         else:
             raise ValueError(f'deltaTransform args wrong {args}')
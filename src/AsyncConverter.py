@@ -0,0 +1,73 @@
+from __future__ import annotations
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from Svg2Vector import Svg2Vector
+
+# asyncio facade of the converter. Conversions run on an executor so that they never block the
+# event loop, a semaphore bounds how many of them are in flight, and every request can be
+# cancelled or time out.
+#
+# The converter is pure Python, so threads still compete for the interpreter lock with the
+# event loop; use processes (the default) when conversion traffic must not slow down other
+# handlers.
+class AsyncConverter:
+    EXECUTOR_PROCESS = 'process'
+    EXECUTOR_THREAD = 'thread'
+    DEFAULT_MAX_CONCURRENCY = 4
+
+    # @param executor 'process', 'thread', or an Executor instance owned by the caller
+    # @param maxConcurrency maximum number of conversions in flight; further requests wait
+    # @param timeout default per-request timeout in seconds, or None for no timeout
+    def __init__(self, executor=EXECUTOR_PROCESS, maxConcurrency: int = DEFAULT_MAX_CONCURRENCY, timeout: float = None):
+        self.mOwnsExecutor = not isinstance(executor, Executor)
+        if executor == self.EXECUTOR_PROCESS:
+            executor = ProcessPoolExecutor(max_workers=maxConcurrency)
+        elif executor == self.EXECUTOR_THREAD:
+            executor = ThreadPoolExecutor(max_workers=maxConcurrency)
+        elif self.mOwnsExecutor:
+            raise ValueError(f'Unsupported executor {executor}')
+        self.mExecutor = executor
+        self.mSemaphore = asyncio.Semaphore(maxConcurrency)
+        self.mTimeout = timeout
+
+    # Runs in the executor. Returns the VectorDrawable's content and the combined error message.
+    @classmethod
+    def convertFileSync(cls, path: str) -> tuple[str, str]:
+        errors = []
+        with open(path, 'rb') as file:
+            xml = Svg2Vector.convertBytes(file.read(), errors)
+        return xml, errors[0] if errors else ''
+
+    @classmethod
+    def convertBytesSync(cls, data) -> tuple[str, str]:
+        errors = []
+        xml = Svg2Vector.convertBytes(data, errors)
+        return xml, errors[0] if errors else ''
+
+    async def run(self, function, argument, timeout: float):
+        async with self.mSemaphore:
+            future = asyncio.get_running_loop().run_in_executor(self.mExecutor, function, argument)
+            # On cancellation or timeout a conversion that hasn't started yet is dropped from the
+            # executor's queue. One that is already running finishes in the background.
+            return await asyncio.wait_for(future, timeout if timeout is not None else self.mTimeout)
+
+    # Converts the SVG file at path.
+    # @return the VectorDrawable's content and the combined error message
+    # @raises asyncio.TimeoutError if the conversion takes longer than the timeout
+    async def convertFile(self, path: str, timeout: float = None) -> tuple[str, str]:
+        return await self.run(self.convertFileSync, path, timeout)
+
+    # Converts SVG content given as bytes or str.
+    async def convertBytes(self, data, timeout: float = None) -> tuple[str, str]:
+        return await self.run(self.convertBytesSync, data, timeout)
+
+    def close(self):
+        if self.mOwnsExecutor:
+            self.mExecutor.shutdown(wait=False, cancel_futures=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+
+from Writer import Writer
+
+# This is not original class.
+# Writer that updates a file only when the converted content differs from what the file already
+# holds, so that unchanged outputs keep their modification time and downstream build steps
+# don't redo their work. A changed file is replaced atomically: the content goes to a temporary
+# file in the same directory first, which is then renamed over the destination, so readers never
+# see a partially written file.
+class AtomicFileWriter(Writer):
+    umask = None
+
+    def __init__(self, path: str, encoding: str = 'utf-8'):
+        self.mPath = path
+        self.mEncoding = encoding
+        self.mChunks = []
+        self.mChanged = None
+
+    def write(self, out: str):
+        self.mChunks.append(out)
+
+    def close(self):
+        if self.mChanged is None:
+            self.mChanged = self.update(self.mPath, ''.join(self.mChunks).encode(self.mEncoding))
+
+    def __exit__(self, excType, *args):
+        # Leave the destination alone if the conversion failed half-way.
+        if excType is None:
+            self.close()
+
+    # Returns whether the file was written, or None if the writer isn't closed yet.
+    def isChanged(self) -> bool:
+        return self.mChanged
+
+    # Replaces the file at path with data unless it already holds exactly that.
+    # @return whether the file was written
+    @classmethod
+    def update(cls, path: str, data: bytes) -> bool:
+        try:
+            stat = os.stat(path)
+            mode = stat.st_mode & 0o7777
+            # Comparing the size first spares reading most changed files.
+            if stat.st_size == len(data):
+                with open(path, 'rb') as file:
+                    if file.read() == data:
+                        return False
+        except OSError:
+            # Doesn't exist yet.
+            mode = 0o666 & ~cls.getUmask()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd, tempPath = tempfile.mkstemp(dir=directory or '.', prefix='.' + os.path.basename(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            # Temporary files are only accessible by their owner.
+            os.chmod(tempPath, mode)
+            os.replace(tempPath, path)
+        except Exception:
+            os.unlink(tempPath)
+            raise
+        return True
+
+    @classmethod
+    def getUmask(cls) -> int:
+        if cls.umask is None:
+            # The umask can only be read by setting it.
+            cls.umask = os.umask(0o022)
+            os.umask(cls.umask)
+        return cls.umask
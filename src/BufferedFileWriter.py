@@ -0,0 +1,43 @@
+import io
+
+from Writer import Writer
+
+# This is not original class.
+# Writer that streams the converted content straight into a file instead of keeping it in
+# memory. Small writes are collected and handed to the file in batches. The destination can be a
+# path or an already opened text or binary file; content is encoded as UTF-8 for binary files.
+class BufferedFileWriter(Writer):
+    # Number of collected writes that triggers handing them to the file.
+    FLUSH_THRESHOLD = 4096
+
+    def __init__(self, destination, encoding: str = 'utf-8'):
+        if isinstance(destination, (str, bytes)) or hasattr(destination, '__fspath__'):
+            self.mFile = open(destination, 'w', encoding=encoding, newline='')
+            self.mOwnsFile = True
+        else:
+            self.mFile = destination
+            self.mOwnsFile = False
+        self.mBinary = not isinstance(self.mFile, io.TextIOBase) and 'b' in getattr(self.mFile, 'mode', 'b')
+        self.mEncoding = encoding
+        self.mPending = []
+
+    def write(self, out: str):
+        self.mPending.append(out)
+        if len(self.mPending) >= self.FLUSH_THRESHOLD:
+            self.writePending()
+
+    def writePending(self):
+        if not self.mPending:
+            return
+        data = ''.join(self.mPending)
+        self.mPending.clear()
+        self.mFile.write(data.encode(self.mEncoding) if self.mBinary else data)
+
+    def flush(self):
+        self.writePending()
+        self.mFile.flush()
+
+    def close(self):
+        self.flush()
+        if self.mOwnsFile:
+            self.mFile.close()
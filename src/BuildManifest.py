@@ -0,0 +1,158 @@
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from ConversionCache import ConversionCache
+
+# Record of a converted tree for incremental rebuilds. For every input it keeps the size,
+# modification time and content hash of the SVG file together with the written output and its
+# hash. A later run only has to convert inputs whose record doesn't match any more, and can
+# delete the outputs of inputs that disappeared.
+#
+# Unchanged inputs are recognized by their size and modification time alone, so a run that has
+# nothing to do costs one stat per input and output. Only when the modification time changed but
+# the size didn't, the content hash decides.
+class BuildManifest:
+    logger = logging.getLogger('Svg2Vector')
+
+    FORMAT_VERSION = 1
+
+    # Record of one input file.
+    # @param size the size of the input in bytes
+    # @param mtime the modification time of the input in nanoseconds
+    # @param hash the SHA-256 digest of the input
+    # @param output the written VectorDrawable file, or None if nothing was written
+    # @param outputHash the SHA-256 digest of the output, or None if nothing was written
+    # @param errors the combined error message of the conversion
+    class Entry:
+        __slots__ = ('size', 'mtime', 'hash', 'output', 'outputHash', 'errors')
+
+        def __init__(self, size: int, mtime: int, hash: str, output: str, outputHash: str, errors: str):
+            self.size = size
+            self.mtime = mtime
+            self.hash = hash
+            self.output = output
+            self.outputHash = outputHash
+            self.errors = errors
+
+        def toList(self) -> list:
+            return [self.size, self.mtime, self.hash, self.output, self.outputHash, self.errors]
+
+    # @param path the manifest file; it doesn't have to exist yet
+    def __init__(self, path: str):
+        self.mPath = path
+        # Key is the normalized absolute path of an input file, see normalizePath.
+        self.mEntries = dict()
+        self.mConverterVersion = ConversionCache.getConverterVersion()
+        # Whether the entries were recorded by the same version of the converter. If not, they
+        # are only good for finding stale outputs.
+        self.mIsCurrent = False
+        # Whether the entries changed since they were loaded.
+        self.mIsModified = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.mPath, 'r', encoding='utf-8') as file:
+                content = json.load(file)
+            if content.get('format') != self.FORMAT_VERSION:
+                return
+            self.mEntries = {path: self.Entry(*values) for path, values in content['entries'].items()}
+            self.mIsCurrent = content.get('converter') == self.mConverterVersion
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            if os.path.exists(self.mPath):
+                self.logger.warning(f'Ignoring unreadable manifest {self.mPath}: {e}')
+
+    # Writes the manifest if any entry changed.
+    def save(self):
+        if not self.mIsModified:
+            return
+        content = {
+            'format': self.FORMAT_VERSION,
+            'converter': self.mConverterVersion,
+            'entries': {path: entry.toList() for path, entry in self.mEntries.items()},
+        }
+        directory = os.path.dirname(os.path.abspath(self.mPath))
+        os.makedirs(directory, exist_ok=True)
+        fd, tempPath = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(content, file, separators=(',', ':'))
+            os.replace(tempPath, self.mPath)
+        except Exception:
+            os.unlink(tempPath)
+            raise
+        self.mIsModified = False
+
+    @classmethod
+    def hashFile(cls, path: str) -> str:
+        with open(path, 'rb') as file:
+            return hashlib.sha256(file.read()).hexdigest()
+
+    # Returns the form of path used in the manifest, so that e.g. "icons/a.svg" and
+    # "./icons/a.svg" are recognized as the same file.
+    @classmethod
+    def normalizePath(cls, path: str) -> str:
+        return os.path.abspath(path)
+
+    def getEntry(self, inputPath: str) -> Entry:
+        return self.mEntries.get(self.normalizePath(inputPath))
+
+    # Returns the entry of inputPath if it still describes the input and its output, or None if
+    # the input has to be converted. Both paths must be normalized.
+    # @param stat the current os.stat of the input
+    def getUpToDateEntry(self, inputPath: str, outputPath: str, stat: os.stat_result) -> Entry:
+        entry = self.mEntries.get(inputPath)
+        if entry is None or not self.mIsCurrent or stat.st_size != entry.size:
+            return None
+        if entry.output is not None:
+            if entry.output != outputPath or not os.path.exists(outputPath):
+                return None
+        if stat.st_mtime_ns != entry.mtime:
+            # Touched, but maybe not changed.
+            if self.hashFile(inputPath) != entry.hash:
+                return None
+            entry.mtime = stat.st_mtime_ns
+            self.mIsModified = True
+        return entry
+
+    # Records the conversion of inputPath. An output written for the previous version of the
+    # input at a different place is deleted. Both paths must be normalized.
+    def update(self, inputPath: str, stat: os.stat_result, inputHash: str, outputPath: str, outputHash: str, errors: str):
+        previous = self.mEntries.get(inputPath)
+        if previous is not None and previous.output is not None and previous.output != outputPath:
+            self.deleteOutput(previous)
+        self.mEntries[inputPath] = self.Entry(stat.st_size, stat.st_mtime_ns, inputHash, outputPath, outputHash, errors)
+        self.mIsModified = True
+
+    # Forgets every input that no longer exists and deletes its output, unless the output belongs
+    # to one of the current inputs as well. Inputs that exist but weren't part of this run, e.g.
+    # because it only covered a subdirectory, are kept.
+    # @param inputPaths normalized paths of the current inputs
+    # @return the deleted output files
+    def removeStale(self, inputPaths: set[str]) -> list[str]:
+        stale = [key for key in self.mEntries if key not in inputPaths and not os.path.exists(key)]
+        if not stale:
+            return []
+        owned = {entry.output for key, entry in self.mEntries.items() if key in inputPaths}
+        deleted = []
+        for key in stale:
+            entry = self.mEntries.pop(key)
+            self.mIsModified = True
+            if entry.output is not None and entry.output not in owned and self.deleteOutput(entry):
+                deleted.append(entry.output)
+        return deleted
+
+    # Deletes the output of entry unless it was modified since it was written.
+    def deleteOutput(self, entry: Entry) -> bool:
+        try:
+            if self.hashFile(entry.output) != entry.outputHash:
+                self.logger.warning(f'Keeping {entry.output}, which was modified after conversion')
+                return False
+            os.unlink(entry.output)
+            return True
+        except OSError:
+            return False    # Already gone.
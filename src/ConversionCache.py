@@ -0,0 +1,164 @@
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from ConversionResult import ConversionResult
+from Svg2Vector import Svg2Vector
+from Writer import Writer
+
+# Content-addressed on-disk cache of conversion results. An entry is keyed by a hash of the
+# input bytes, the converter version and the output options, and stores the ConversionResult
+# with the VectorDrawable XML and the logged messages. The total size of the cache is bounded; the least
+# recently used entries are evicted first.
+class ConversionCache:
+    logger = logging.getLogger('Svg2Vector')
+
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+    # Once over its bound, the cache is trimmed to this fraction of it, so that the directory
+    # isn't scanned again on every following put.
+    LOW_WATER_MARK = 0.9
+    ENTRY_EXTENSION = '.json'
+
+    # Cache instances shared by all conversions of a process, keyed by directory and size.
+    instances = dict()
+    converterVersion = None
+
+    def __init__(self, cacheDir: str, maxBytes: int = DEFAULT_MAX_BYTES):
+        self.mCacheDir = cacheDir
+        self.mMaxBytes = maxBytes
+        self.mHits = 0
+        self.mMisses = 0
+        os.makedirs(cacheDir, exist_ok=True)
+        # Key is the entry path, and the value is its size in bytes.
+        self.mEntrySizes = {path: st.st_size for path, st in self.scanEntries()}
+        self.mTotalBytes = sum(self.mEntrySizes.values())
+
+    # Returns the cache for the given directory, creating it on first use in this process.
+    @classmethod
+    def getInstance(cls, cacheDir: str, maxBytes: int = DEFAULT_MAX_BYTES) -> ConversionCache:
+        key = (os.path.abspath(cacheDir), maxBytes)
+        cache = cls.instances.get(key)
+        if cache is None:
+            cache = cls(cacheDir, maxBytes)
+            cls.instances[key] = cache
+        return cache
+
+    # Returns a digest of the converter's source code, so that any change of the converter
+    # invalidates previously cached results.
+    @classmethod
+    def getConverterVersion(cls) -> str:
+        if cls.converterVersion is None:
+            digest = hashlib.sha256()
+            sourceDir = os.path.dirname(os.path.abspath(__file__))
+            for fileName in sorted(os.listdir(sourceDir)):
+                if fileName.endswith('.py'):
+                    with open(os.path.join(sourceDir, fileName), 'rb') as file:
+                        digest.update(fileName.encode('utf-8'))
+                        digest.update(file.read())
+            cls.converterVersion = digest.hexdigest()
+        return cls.converterVersion
+
+    @classmethod
+    def makeKey(cls, data: bytes, options: dict = None) -> str:
+        digest = hashlib.sha256()
+        digest.update(cls.getConverterVersion().encode('ascii'))
+        digest.update(json.dumps(options or {}, sort_keys=True).encode('utf-8'))
+        digest.update(data)
+        return digest.hexdigest()
+
+    def getEntryPath(self, key: str) -> str:
+        return os.path.join(self.mCacheDir, key[:2], key + self.ENTRY_EXTENSION)
+
+    def scanEntries(self):
+        for subDir in os.scandir(self.mCacheDir):
+            if not subDir.is_dir():
+                continue
+            for entry in os.scandir(subDir.path):
+                if entry.name.endswith(self.ENTRY_EXTENSION):
+                    yield entry.path, entry.stat()
+
+    # Returns the cached result for key, or None if there is none.
+    def get(self, key: str) -> ConversionResult:
+        path = self.getEntryPath(key)
+        try:
+            with open(path, 'r', encoding='utf-8', newline='') as file:
+                content = json.load(file)
+            # The modification time records the last use of an entry.
+            os.utime(path)
+        except (OSError, ValueError):
+            self.mMisses += 1
+            return None
+        self.mHits += 1
+        result = ConversionResult.fromDict(content)
+        # The stored times are those of the original conversion, none of which was spent now.
+        result.phaseTimes = dict.fromkeys(result.phaseTimes, 0.0)
+        return result
+
+    def put(self, key: str, result: ConversionResult):
+        path = self.getEntryPath(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps(result.toDict()).encode('utf-8')
+        # Write to a temporary file first, so that a concurrent reader never sees a partial
+        # entry.
+        fd, tempPath = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(tempPath, path)
+        except Exception:
+            os.unlink(tempPath)
+            raise
+        self.mTotalBytes += len(data) - self.mEntrySizes.get(path, 0)
+        self.mEntrySizes[path] = len(data)
+        if self.mMaxBytes < self.mTotalBytes:
+            self.trim()
+
+    # If the cache exceeds its size bound, evicts the least recently used entries until it is
+    # down to the low-water mark.
+    def trim(self):
+        entries = sorted(self.scanEntries(), key=lambda it: it[1].st_mtime)
+        self.mEntrySizes = {path: st.st_size for path, st in entries}
+        self.mTotalBytes = sum(self.mEntrySizes.values())
+        if self.mTotalBytes <= self.mMaxBytes:
+            return
+        lowWater = self.mMaxBytes * self.LOW_WATER_MARK
+        for path, st in entries:
+            if self.mTotalBytes <= lowWater:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                pass    # Already evicted by another process.
+            self.mTotalBytes -= st.st_size
+            del self.mEntrySizes[path]
+
+    def getHitCount(self) -> int:
+        return self.mHits
+
+    def getMissCount(self) -> int:
+        return self.mMisses
+
+    # Same as Svg2Vector.convert, but answers from the cache when the same input has been
+    # converted before with the same options. The result always holds the XML.
+    def convert(self, inputSVG: str, options: dict = None) -> ConversionResult:
+        with open(inputSVG, 'rb') as file:
+            data = file.read()
+        return self.convertData(data, os.path.basename(inputSVG), options)
+
+    # Same as Svg2Vector.convertData, but answers from the cache when possible.
+    def convertData(self, data: bytes, fileName: str = '', options: dict = None) -> ConversionResult:
+        key = self.makeKey(data, options)
+        result = self.get(key)
+        if result is None:
+            result = Svg2Vector.convertData(data, fileName=fileName)
+            self.put(key, result)
+        return result
+
+    # Same as Svg2Vector.parseSvgToXml, but answers from the cache when possible.
+    def parseSvgToXml(self, inputSVG: str, writer: Writer, options: dict = None) -> str:
+        result = self.convert(inputSVG, options)
+        writer.write(result.getXml())
+        return result.getErrorMessage()
@@ -0,0 +1,232 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+import json
+import logging
+import os
+import errno
+import socket
+import socketserver
+import stat
+import struct
+import threading
+
+from AtomicFileWriter import AtomicFileWriter
+from PathParser import PathParser
+from Svg2Vector import Svg2Vector
+
+# Long-running conversion server listening on a local Unix domain socket. All converter modules
+# are imported once, and requests are executed on a pool of warm worker processes.
+#
+# Every message in either direction is a frame made of a 4-byte big-endian length followed by
+# that many bytes of UTF-8 encoded JSON. A request carries either "path", the SVG file to
+# convert, or "svg", the SVG content itself, and optionally "output", the file to write the
+# VectorDrawable to. The response carries "xml", or "written" when "output" was given, "errors"
+# with the combined error message, and "ok", which is false when the conversion raised. An
+# output file is only rewritten if its content changed, which "changed" tells. A
+# successful response also carries "messages", "width", "height", "viewportWidth",
+# "viewportHeight" and "phaseTimes" as described by ConversionResult.toDict.
+#
+# With the cache of parsed paths enabled in the workers, see PathParser.setCacheSize, every
+# response also carries "pathCache" with the statistics of the worker that converted it. A
+# request with "stats" set returns "pathCache" with the statistics of all workers combined
+# instead, or null if the cache is disabled.
+class ConversionDaemon:
+    logger = logging.getLogger('Svg2Vector')
+
+    HEADER = struct.Struct('>I')
+    MAX_FRAME_SIZE = 256 * 1024 * 1024
+
+    @classmethod
+    def writeFrame(cls, sock: socket.socket, message: dict):
+        data = json.dumps(message).encode('utf-8')
+        sock.sendall(cls.HEADER.pack(len(data)) + data)
+
+    # Reads one frame, or returns None if the peer closed the connection.
+    @classmethod
+    def readFrame(cls, sock: socket.socket) -> dict:
+        data = cls.readFrameData(sock)
+        return None if data is None else json.loads(data.decode('utf-8'))
+
+    # Same as readFrame, but returns the JSON undecoded.
+    @classmethod
+    def readFrameData(cls, sock: socket.socket) -> bytes:
+        header = cls.readExactly(sock, cls.HEADER.size)
+        if header is None:
+            return None
+        size = cls.HEADER.unpack(header)[0]
+        if cls.MAX_FRAME_SIZE < size:
+            raise ValueError(f'Frame of {size} bytes exceeds the limit')
+        data = cls.readExactly(sock, size)
+        if data is None:
+            raise ConnectionError('Connection closed in the middle of a frame')
+        return data
+
+    @classmethod
+    def readExactly(cls, sock: socket.socket, size: int) -> bytes:
+        buf = bytearray()
+        while len(buf) < size:
+            chunk = sock.recv(size - len(buf))
+            if not chunk:
+                if buf:
+                    raise ConnectionError('Connection closed in the middle of a frame')
+                return None
+            buf += chunk
+        return bytes(buf)
+
+    # Executes one request. Runs inside a worker process, so it must never raise.
+    @classmethod
+    def handleRequest(cls, request: dict) -> dict:
+        try:
+            if request.get('stats'):
+                return {'ok': True, 'pathCache': PathParser.getCacheStats()}
+            if 'svg' in request:
+                result = Svg2Vector.convertData(request['svg'])
+            else:
+                result = Svg2Vector.convert(request['path'])
+            response = result.toDict()
+            response['ok'] = True
+            response['errors'] = result.getErrorMessage()
+            pathCacheStats = PathParser.getCacheStats()
+            if pathCacheStats is not None:
+                response['pathCache'] = pathCacheStats
+            output = request.get('output')
+            if output:
+                content = response.pop('xml')
+                if content:
+                    response['changed'] = AtomicFileWriter.update(output, content.encode('utf-8'))
+                response['written'] = bool(content)
+            return response
+        except Exception as e:
+            return {'ok': False, 'errors': f'EXCEPTION in parsing: {e}'}
+
+    class RequestHandler(socketserver.BaseRequestHandler):
+        def handle(self):
+            while True:
+                try:
+                    data = ConversionDaemon.readFrameData(self.request)
+                except (ValueError, ConnectionError) as e:
+                    ConversionDaemon.logger.warning(f'Dropping connection: {e}')
+                    return
+                if data is None:
+                    return
+                # The frame was read completely, so the connection can go on after a bad request.
+                try:
+                    request = json.loads(data.decode('utf-8'))
+                    if not isinstance(request, dict):
+                        raise ValueError('request must be a JSON object')
+                except ValueError as e:
+                    response = {'ok': False, 'errors': f'Invalid request: {e}'}
+                else:
+                    if request.get('stats'):
+                        response = {'ok': True, 'pathCache': self.server.getPathCacheStats()}
+                    else:
+                        response = self.server.executor.submit(ConversionDaemon.handleRequest, request).result()
+                        self.server.updatePathCacheStats(response.get('pathCache'))
+                ConversionDaemon.writeFrame(self.request, response)
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+        def __init__(self, socketPath: str, executor: ProcessPoolExecutor, pathCacheSize: int = 0):
+            self.executor = executor
+            self.pathCacheSize = pathCacheSize
+            # Key is the pid of a worker, and the value is the latest statistics it reported.
+            self.pathCacheStats = {}
+            self.pathCacheLock = threading.Lock()
+            super().__init__(socketPath, ConversionDaemon.RequestHandler)
+
+        def updatePathCacheStats(self, stats: dict):
+            if stats:
+                with self.pathCacheLock:
+                    self.pathCacheStats[stats['pid']] = stats
+
+        # Returns the statistics of all workers combined, as of their latest responses.
+        def getPathCacheStats(self) -> dict:
+            if not self.pathCacheSize:
+                return None
+            with self.pathCacheLock:
+                workers = list(self.pathCacheStats.values())
+            combined = {'maxSize': self.pathCacheSize, 'workers': workers}
+            for name in ('size', 'hits', 'misses', 'evictions'):
+                combined[name] = sum(stats[name] for stats in workers)
+            return combined
+
+    # Removes a socket left behind by a previous daemon that didn't shut down cleanly.
+    # @raises FileExistsError if a daemon is listening on socketPath, or if it is not a socket
+    @classmethod
+    def removeStaleSocket(cls, socketPath: str):
+        try:
+            mode = os.stat(socketPath).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(errno.EEXIST, 'Not a socket', socketPath)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(socketPath)
+            except ConnectionRefusedError:
+                # Nobody listens, so it is stale.
+                os.unlink(socketPath)
+                return
+            except OSError as e:
+                raise FileExistsError(errno.EEXIST, f'Socket in use or inaccessible: {e.strerror}', socketPath)
+        raise FileExistsError(errno.EEXIST, 'A daemon is already listening on the socket', socketPath)
+
+    # Serves requests on socketPath until interrupted.
+    # @param maxWorkers number of worker processes, defaults to the number of CPUs
+    # @param pathCacheSize number of parsed paths every worker keeps, or 0 to not cache them
+    # @raises FileExistsError if something other than a stale socket is at socketPath
+    @classmethod
+    def serve(cls, socketPath: str, maxWorkers: int = None, pathCacheSize: int = 0):
+        cls.removeStaleSocket(socketPath)
+        workers = maxWorkers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers, initializer=PathParser.setCacheSize, initargs=(pathCacheSize,)) as executor:
+            # Start the workers up front, so that the first requests don't pay for it.
+            list(executor.map(int, range(workers)))
+            with cls.Server(socketPath, executor, pathCacheSize) as server:
+                cls.logger.info(f'Listening on {socketPath}')
+                try:
+                    server.serve_forever()
+                except KeyboardInterrupt:
+                    pass
+                finally:
+                    os.unlink(socketPath)
+
+# Thin client of ConversionDaemon. A client keeps its connection open, so it can be used for
+# many requests in a row.
+class ConversionClient:
+    def __init__(self, socketPath: str):
+        self.mSocket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.mSocket.connect(socketPath)
+
+    def request(self, message: dict) -> dict:
+        ConversionDaemon.writeFrame(self.mSocket, message)
+        response = ConversionDaemon.readFrame(self.mSocket)
+        if response is None:
+            raise ConnectionError('Daemon closed the connection')
+        return response
+
+    # Converts the SVG file at path. If output is given the VectorDrawable is written there by
+    # the daemon, otherwise it is returned in the "xml" entry of the response.
+    def convertFile(self, path: str, output: str = None) -> dict:
+        message = {'path': os.path.abspath(path)}
+        if output:
+            message['output'] = os.path.abspath(output)
+        return self.request(message)
+
+    # Converts SVG content given as str.
+    def convertString(self, svg: str) -> dict:
+        return self.request({'svg': svg})
+
+    # Returns the statistics of the cache of parsed paths, or None if it is disabled.
+    def getPathCacheStats(self) -> dict:
+        return self.request({'stats': True})['pathCache']
+
+    def close(self):
+        self.mSocket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,72 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from SvgTree import SvgTree
+
+# Outcome of converting one SVG document, so that callers don't have to derive it from the
+# writer's content or the combined error message.
+class ConversionResult:
+    # @param xml the VectorDrawable's content, or None if it was written to a file
+    # @param messages the logged errors and warnings, sorted by severity and line number
+    # @param hasOutput whether the document had content to write
+    # @param width the drawable's width in dp
+    # @param height the drawable's height in dp
+    # @param viewportWidth the width of the viewport
+    # @param viewportHeight the height of the viewport
+    # @param phaseTimes the time spent in each conversion phase in seconds
+    def __init__(self, xml: str, messages: list[SvgTree.LogMessage], hasOutput: bool, width: float, height: float,
+                 viewportWidth: float, viewportHeight: float, phaseTimes: dict):
+        self.xml = xml
+        self.messages = messages
+        self.hasOutput = hasOutput
+        self.width = width
+        self.height = height
+        self.viewportWidth = viewportWidth
+        self.viewportHeight = viewportHeight
+        self.phaseTimes = phaseTimes
+
+    @classmethod
+    def fromTree(cls, svgTree: SvgTree, xml: str) -> ConversionResult:
+        return cls(xml, svgTree.getLogMessages(), svgTree.getHasLeafNode(), svgTree.getWidth(), svgTree.getHeight(),
+                   svgTree.getViewportWidth(), svgTree.getViewportHeight(), dict(svgTree.getPhaseTimes()))
+
+    def getXml(self) -> str:
+        return self.xml
+
+    def getMessages(self) -> list[SvgTree.LogMessage]:
+        return self.messages
+
+    # Returns the error message that combines all logged errors and warnings, the same as
+    # SvgTree.getErrorMessage.
+    def getErrorMessage(self) -> str:
+        return '\n'.join(message.getFormattedMessage() for message in self.messages)
+
+    def hasErrors(self) -> bool:
+        return any(message.level.name == 'ERROR' for message in self.messages)
+
+    def getPhaseTimes(self) -> dict:
+        return self.phaseTimes
+
+    def getTotalTime(self) -> float:
+        return sum(self.phaseTimes.values())
+
+    # Returns a JSON-compatible representation of the result.
+    def toDict(self) -> dict:
+        return {
+            'xml': self.xml,
+            'messages': [{'level': m.level.name, 'line': m.line, 'message': m.message} for m in self.messages],
+            'hasOutput': self.hasOutput,
+            'width': self.width,
+            'height': self.height,
+            'viewportWidth': self.viewportWidth,
+            'viewportHeight': self.viewportHeight,
+            'phaseTimes': self.phaseTimes,
+        }
+
+    @classmethod
+    def fromDict(cls, content: dict) -> ConversionResult:
+        from SvgTree import SvgTree
+        messages = [SvgTree.LogMessage(SvgTree.SvgLogLevel[m['level']], m['line'], m['message']) for m in content['messages']]
+        return cls(content['xml'], messages, content['hasOutput'], content['width'], content['height'],
+                   content['viewportWidth'], content['viewportHeight'], content['phaseTimes'])
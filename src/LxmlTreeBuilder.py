@@ -0,0 +1,119 @@
+try:
+    from lxml import etree
+except ImportError:
+    # lxml is optional; PositionXmlParser falls back to expat without it.
+    etree = None
+
+from StreamReader import StreamReader
+from XmlElement import XmlDocument, XmlElement
+
+# Adapter from lxml's C parser to the XmlDocument tree that the converter reads. lxml records the
+# line number of every element itself, so the only work left in Python is copying the elements.
+#
+# lxml resolves namespaces while expat runs without namespace processing. Names are mapped back
+# to the qualified names used in the document, e.g. "xlink:href", so that the extract code sees
+# the same tree from either backend. Namespace declarations are not attributes in lxml and don't
+# show up in the tree.
+class LxmlTreeBuilder:
+    XML_NAMESPACE = 'http://www.w3.org/XML/1998/namespace'
+
+    @classmethod
+    def isAvailable(cls) -> bool:
+        return etree is not None
+
+    @classmethod
+    def createParser(cls, encoding: str = None):
+        # Never fetch external entities or DTDs; an SVG doesn't need them.
+        return etree.XMLParser(encoding=encoding, resolve_entities=False, no_network=True, huge_tree=True,
+                               remove_comments=True, remove_pis=True)
+
+    # Parses a document from a file path or from a readable binary or text stream.
+    @classmethod
+    def parse(cls, source) -> XmlDocument:
+        if not hasattr(source, 'read'):
+            with open(source, 'rb') as file:
+                # Gzip compressed files go through StreamReader, which decompresses them.
+                if StreamReader.isGzipFile(file):
+                    return cls.parse(file)
+                return cls.buildDocument(etree.parse(file, cls.createParser()).getroot())
+        parser = None
+        for data in StreamReader.readChunks(source):
+            if parser is None:
+                # Text is fed as UTF-8, whatever the XML declaration says.
+                parser = cls.createParser('utf-8' if isinstance(data, str) else None)
+            parser.feed(data.encode('utf-8') if isinstance(data, str) else data)
+        if parser is None:
+            raise ValueError('Document is empty')
+        return cls.buildDocument(parser.close())
+
+    # Parses a document held in memory as bytes or str.
+    @classmethod
+    def parseString(cls, data) -> XmlDocument:
+        if isinstance(data, str):
+            return cls.buildDocument(etree.fromstring(data.encode('utf-8'), cls.createParser('utf-8')))
+        return cls.buildDocument(etree.fromstring(data, cls.createParser()))
+
+    @classmethod
+    def buildDocument(cls, root) -> XmlDocument:
+        document = XmlDocument()
+        stack = [(root, None)]
+        while stack:
+            node, parent = stack.pop()
+            element = XmlElement(cls.getQualifiedName(node.tag, node.prefix), cls.getAttributes(node), parent, node.sourceline)
+            if parent is None:
+                document.documentElement = element
+            else:
+                parent.children.append(element)
+            if element.tagName in XmlElement.PRUNED_TAGS:
+                cls.prune(node, element, document)
+                continue
+            # Character data of an element is its text plus the tails of its children.
+            text = node.text
+            if text and text.strip():
+                element.text += text
+            children = []
+            for child in node:
+                if isinstance(child.tag, str):
+                    children.append(child)
+                tail = child.tail
+                if tail and tail.strip():
+                    element.text += tail
+            # Reversed, so that the children are popped, and appended, in document order.
+            stack.extend((child, element) for child in reversed(children))
+        return document
+
+    # Leaves out the content of a node, as LineNumberTreeBuilder does.
+    @classmethod
+    def prune(cls, node, element: XmlElement, document: XmlDocument):
+        text = node.text
+        element.hasPrunedContent = bool(text and text.strip())
+        for descendant in node.iterdescendants():
+            element.hasPrunedContent = True
+            if isinstance(descendant.tag, str):
+                _id = descendant.get('id')
+                if _id:
+                    document.ignoredIds.add(_id)
+
+    @classmethod
+    def getQualifiedName(cls, tag: str, prefix: str) -> str:
+        if tag[0] != '{':
+            return tag
+        localName = tag[tag.index('}') + 1:]
+        return f'{prefix}:{localName}' if prefix else localName
+
+    @classmethod
+    def getAttributes(cls, node) -> dict:
+        attributes = dict(node.attrib)
+        if not any(name[0] == '{' for name in attributes):
+            return attributes
+        # Only look up the prefixes when there is a namespaced attribute; nsmap is not cheap.
+        prefixes = {uri: prefix for prefix, uri in node.nsmap.items() if prefix}
+        prefixes[cls.XML_NAMESPACE] = 'xml'
+        result = dict()
+        for name, value in attributes.items():
+            if name[0] == '{':
+                uri, localName = name[1:].split('}', 1)
+                prefix = prefixes.get(uri)
+                name = f'{prefix}:{localName}' if prefix else localName
+            result[name] = value
+        return result
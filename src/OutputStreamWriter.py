@@ -1,12 +1,19 @@
+from Writer import Writer
 
 # This is not original class.
 # fake java OutputOutputStreamWriter for write result on original library.
-class OutputStreamWriter:
+# Written strings are collected as chunks and joined once when the result is requested, so a
+# large document doesn't pay for reallocating the whole buffer on every small write.
+class OutputStreamWriter(Writer):
     def __init__(self):
-        self.buffer = ''
+        self.chunks = []
 
-    def write(self, out):
-        self.buffer += out
-    
-    def toString(self):
-        return self.buffer
\ No newline at end of file
+    def write(self, out: str):
+        self.chunks.append(out)
+
+    def toString(self) -> str:
+        if len(self.chunks) > 1:
+            joined = ''.join(self.chunks)
+            self.chunks.clear()
+            self.chunks.append(joined)
+        return self.chunks[0] if self.chunks else ''
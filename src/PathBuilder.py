@@ -1,93 +1,98 @@
+from array import array
+import math
+
+from PathNodes import PathNodes
 from typing_compat import Self
 from XmlUtils import XmlUtils
 
-# Build a string for Svg file's path data.
+# Build a Svg file's path data. The commands are collected as PathNodes, the way PathParser
+# returns them, so shapes don't need to be formatted to a string and parsed back.
 class PathBuilder:
     def __init__(self):
-        self.mPathData = ''
+        self.mTypes = []
+        self.mParams = array('d')
+        self.mOffsets = array('l', [0])
 
-    def encodeBoolean(self, flag) -> str:
-        return '1' if flag else '0'
+    def encodeBoolean(self, flag) -> float:
+        return 1.0 if flag else 0.0
 
-    def absoluteMoveTo(self, x: float, y: float) -> Self:
-        self.mPathData += f'M{XmlUtils.formatFloatValue(x)},{XmlUtils.formatFloatValue(y)}'
+    def addCommand(self, cmd: str, *values: float) -> Self:
+        for value in values:
+            if not math.isfinite(value):
+                raise ValueError(f'Invalid number: {value}')
+        self.mTypes.append(cmd)
+        self.mParams.extend(values)
+        self.mOffsets.append(len(self.mParams))
         return self
 
+    def absoluteMoveTo(self, x: float, y: float) -> Self:
+        return self.addCommand('M', x, y)
+
     def relativeMoveTo(self, x: float, y: float) -> Self:
-        self.mPathData += f'm{XmlUtils.formatFloatValue(x)},{XmlUtils.formatFloatValue(y)}'
-        return self
+        return self.addCommand('m', x, y)
 
     def absoluteLineTo(self, x: float, y: float) -> Self:
-        self.mPathData += f'L{XmlUtils.formatFloatValue(x)},{XmlUtils.formatFloatValue(y)}'
-        return self
+        return self.addCommand('L', x, y)
 
     def relativeLineTo(self, x: float, y: float) -> Self:
-        self.mPathData += f'l{XmlUtils.formatFloatValue(x)},{XmlUtils.formatFloatValue(y)}'
-        return self
+        return self.addCommand('l', x, y)
 
     def absoluteVerticalTo(self, v: float) -> Self:
-        self.mPathData += f'V{XmlUtils.formatFloatValue(v)}'
-        return self
+        return self.addCommand('V', v)
 
     def relativeVerticalTo(self, v: float) -> Self:
-        self.mPathData += f'v{XmlUtils.formatFloatValue(v)}'
-        return self
+        return self.addCommand('v', v)
 
     def absoluteHorizontalTo(self, h: float) -> Self:
-        self.mPathData += f'H{XmlUtils.formatFloatValue(h)}'
-        return self
+        return self.addCommand('H', h)
 
     def relativeHorizontalTo(self, h: float) -> Self:
-        self.mPathData += f'h{XmlUtils.formatFloatValue(h)}'
-        return self
+        return self.addCommand('h', h)
 
     def absoluteCurveTo(self, cp1x: float, cp1y: float, cp2x: float, cp2y: float, x: float, y: float) -> Self:
-        self.mPathData += f'C{XmlUtils.formatFloatValue(cp1x)},{XmlUtils.formatFloatValue(cp1y)},{XmlUtils.formatFloatValue(cp2x)},{XmlUtils.formatFloatValue(cp2y)},{XmlUtils.formatFloatValue(x)},{XmlUtils.formatFloatValue(y)}'
-        return self
+        return self.addCommand('C', cp1x, cp1y, cp2x, cp2y, x, y)
 
     def relativeCurveTo(self, cp1x: float, cp1y: float, cp2x: float, cp2y: float, x: float, y: float) -> Self:
-        self.mPathData += f'c{XmlUtils.formatFloatValue(cp1x)},{XmlUtils.formatFloatValue(cp1y)},{XmlUtils.formatFloatValue(cp2x)},{XmlUtils.formatFloatValue(cp2y)},{XmlUtils.formatFloatValue(x)},{XmlUtils.formatFloatValue(y)}'
-        return self
+        return self.addCommand('c', cp1x, cp1y, cp2x, cp2y, x, y)
 
     def absoluteSmoothCurveTo(self, cp2x: float, cp2y: float, x: float, y: float) -> Self:
-        self.mPathData += f'S{XmlUtils.formatFloatValue(cp2x)},{XmlUtils.formatFloatValue(cp2y)},{XmlUtils.formatFloatValue(x)},{XmlUtils.formatFloatValue(y)}'
-        return self
+        return self.addCommand('S', cp2x, cp2y, x, y)
 
     def relativeSmoothCurveTo(self, cp2x: float, cp2y: float, x: float, y: float) -> Self:
-        self.mPathData += f's{XmlUtils.formatFloatValue(cp2x)},{XmlUtils.formatFloatValue(cp2y)},{XmlUtils.formatFloatValue(x)},{XmlUtils.formatFloatValue(y)}'
-        return self
+        return self.addCommand('s', cp2x, cp2y, x, y)
 
     def absoluteQuadraticCurveTo(self, cp1x: float, cp1y: float, x: float, y: float) -> Self:
-        self.mPathData += f'Q{XmlUtils.formatFloatValue(cp1x)},{XmlUtils.formatFloatValue(cp1y)},{XmlUtils.formatFloatValue(x)},{XmlUtils.formatFloatValue(y)}'
-        return self
+        return self.addCommand('Q', cp1x, cp1y, x, y)
 
     def relativeQuadraticCurveTo(self, cp1x: float, cp1y: float, x: float, y: float) -> Self:
-        self.mPathData += f'q{XmlUtils.formatFloatValue(cp1x)},{XmlUtils.formatFloatValue(cp1y)},{XmlUtils.formatFloatValue(x)},{XmlUtils.formatFloatValue(y)}'
-        return self
+        return self.addCommand('q', cp1x, cp1y, x, y)
 
     def absoluteSmoothQuadraticCurveTo(self, x: float, y: float) -> Self:
-        self.mPathData += f'T{XmlUtils.formatFloatValue(x)},{XmlUtils.formatFloatValue(y)}'
-        return self
+        return self.addCommand('T', x, y)
 
     def relativeSmoothQuadraticCurveTo(self, x: float, y: float) -> Self:
-        self.mPathData += f't{XmlUtils.formatFloatValue(x)},{XmlUtils.formatFloatValue(y)}'
-        return self
+        return self.addCommand('t', x, y)
 
+    # Negative radii are made positive, the way PathParser reads them.
     def absoluteArcTo(self, rx, ry, rotation, largeArc, sweep, x, y) -> Self:
-        self.mPathData += f'A{XmlUtils.formatFloatValue(rx)},{XmlUtils.formatFloatValue(ry)},{self.encodeBoolean(rotation)},{self.encodeBoolean(largeArc)},{self.encodeBoolean(sweep)},{XmlUtils.formatFloatValue(x)},{XmlUtils.formatFloatValue(y)}'
-        return self
+        return self.addCommand('A', abs(rx), abs(ry), self.encodeBoolean(rotation), self.encodeBoolean(largeArc), self.encodeBoolean(sweep), x, y)
 
     def relativeArcTo(self, rx, ry, rotation, largeArc, sweep, x, y) -> Self:
-        self.mPathData += f'a{XmlUtils.formatFloatValue(rx)},{XmlUtils.formatFloatValue(ry)},{self.encodeBoolean(rotation)},{self.encodeBoolean(largeArc)},{self.encodeBoolean(sweep)},{XmlUtils.formatFloatValue(x)},{XmlUtils.formatFloatValue(y)}'
-        return self
+        return self.addCommand('a', abs(rx), abs(ry), self.encodeBoolean(rotation), self.encodeBoolean(largeArc), self.encodeBoolean(sweep), x, y)
 
     def absoluteClose(self) -> Self:
-        self.mPathData += 'Z'
-        return self
+        return self.addCommand('Z')
 
     def relativeClose(self) -> Self:
-        self.mPathData += 'z'
-        return self
-
-    def toString(self) -> Self:
-        return self.mPathData
\ No newline at end of file
+        return self.addCommand('z')
+
+    # Returns the commands built so far. The builder must not be used afterwards, as the nodes
+    # share its arrays.
+    def toNodes(self) -> PathNodes:
+        return PathNodes(''.join(self.mTypes), self.mParams, self.mOffsets)
+
+    def toString(self) -> str:
+        params = self.mParams
+        offsets = self.mOffsets
+        return ''.join(cmd + ','.join(XmlUtils.formatFloatValue(params[k]) for k in range(offsets[i], offsets[i + 1]))
+                       for i, cmd in enumerate(self.mTypes))
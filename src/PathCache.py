@@ -0,0 +1,72 @@
+from __future__ import annotations
+from collections import OrderedDict
+import os
+import threading
+from typing import Hashable
+
+from PathNodes import PathNodes
+
+# Bounded cache of parsed path data, used by PathParser. Holds at most maxEntries paths; the
+# least recently used one is evicted first. Counts hits and misses, so that the size can be
+# tuned for the documents a process converts.
+class PathCache:
+    def __init__(self, maxEntries: int):
+        self.mMaxEntries = maxEntries
+        self.mEntries = OrderedDict()
+        self.mHits = 0
+        self.mMisses = 0
+        self.mEvictions = 0
+        # The threads of AsyncConverter may convert at the same time.
+        self.mLock = threading.Lock()
+
+    # Returns the cached nodes for key, or None if there are none. The nodes must not be
+    # changed, see PathNodes.share.
+    def get(self, key: Hashable) -> PathNodes:
+        with self.mLock:
+            nodes = self.mEntries.get(key)
+            if nodes is None:
+                self.mMisses += 1
+                return None
+            self.mEntries.move_to_end(key)
+            self.mHits += 1
+            return nodes
+
+    def put(self, key: Hashable, nodes: PathNodes):
+        with self.mLock:
+            self.mEntries[key] = nodes
+            self.mEntries.move_to_end(key)
+            while self.mMaxEntries < len(self.mEntries):
+                self.mEntries.popitem(last=False)
+                self.mEvictions += 1
+
+    def resize(self, maxEntries: int):
+        with self.mLock:
+            self.mMaxEntries = maxEntries
+            while self.mMaxEntries < len(self.mEntries):
+                self.mEntries.popitem(last=False)
+                self.mEvictions += 1
+
+    def clear(self):
+        with self.mLock:
+            self.mEntries.clear()
+            self.mHits = 0
+            self.mMisses = 0
+            self.mEvictions = 0
+
+    def getHitCount(self) -> int:
+        return self.mHits
+
+    def getMissCount(self) -> int:
+        return self.mMisses
+
+    # Returns a JSON-compatible snapshot of the statistics of this process' cache.
+    def getStats(self) -> dict:
+        with self.mLock:
+            return {
+                'pid': os.getpid(),
+                'size': len(self.mEntries),
+                'maxSize': self.mMaxEntries,
+                'hits': self.mHits,
+                'misses': self.mMisses,
+                'evictions': self.mEvictions,
+            }
@@ -0,0 +1,48 @@
+from __future__ import annotations
+from array import array
+
+# This is not original class.
+# The commands of a path in a compact form, instead of a VdPath.Node with a list of floats for
+# every command: the command characters in a string, taking a byte each, the parameters of all
+# commands in a single array of doubles, and the offset of every command's first parameter in
+# that array. A path with 100k commands then takes three objects rather than 300k.
+class PathNodes:
+    __slots__ = ('mTypes', 'mParams', 'mOffsets', 'mShared')
+
+    # @param types the command characters
+    # @param params the parameters of all commands
+    # @param offsets the offset of every command's first parameter in params, followed by the
+    #     length of params
+    # @param shared whether the arrays are shared with other nodes, e.g. by the cache of
+    #     PathParser, and have to be copied before they are changed
+    def __init__(self, types: str = '', params: array = None, offsets: array = None, shared: bool = False):
+        self.mTypes = types
+        self.mParams = array('d') if params is None else params
+        self.mOffsets = array('l', [0]) if offsets is None else offsets
+        self.mShared = shared
+
+    # Returns a copy that can be transformed without affecting this one.
+    def copy(self) -> PathNodes:
+        return PathNodes(self.mTypes, array('d', self.mParams), array('l', self.mOffsets))
+
+    # Returns nodes that share the arrays of this one until they are transformed, which copies
+    # them first.
+    def share(self) -> PathNodes:
+        return PathNodes(self.mTypes, self.mParams, self.mOffsets, True)
+
+    def __len__(self) -> int:
+        return len(self.mTypes)
+
+    def getType(self, index: int) -> str:
+        return self.mTypes[index]
+
+    # Returns a copy of the parameters of the command at index.
+    def getParams(self, index: int) -> array:
+        return self.mParams[self.mOffsets[index]: self.mOffsets[index + 1]]
+
+    # Returns whether a relative move follows a close path command anywhere in the path.
+    def hasRelMoveAfterClose(self) -> bool:
+        return 'zm' in self.mTypes or 'Zm' in self.mTypes
+
+    def __repr__(self) -> str:
+        return ''.join(f'{self.getType(i)}{list(self.getParams(i))}' for i in range(len(self)))
@@ -1,13 +1,38 @@
+from array import array
 from enum import Enum
+import re
 
-from VdPath import VdPath
+from PathCache import PathCache
+from PathNodes import PathNodes
 
 # Utility functions for parsing path information. The implementation details should be the same as
 # the PathParser in Android framework.
 # <p>See https://www.w3.org/TR/SVG/paths.html#PathDataBNF for the pathData syntax.
 class PathParser:
     EMPTY_FLOAT_ARRAY = []
-    
+
+    # The parameters are tokenized with regular expressions, which is a lot faster than
+    # extract. Anything that extract would read differently is still left to extract.
+    # Path commands; 'e' and 'E' are not, they are part of numbers in scientific notation.
+    COMMAND = re.compile(r'[A-DF-Za-df-z]')
+    # A command with its parameters.
+    SEGMENT = re.compile(r'([A-DF-Za-df-z])([^A-DF-Za-df-z]*)')
+    SEPARATORS = re.compile(r'[ ,]*')
+    NUMBER = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+    # Numbers that extract may not split where NUMBER does, i.e. at a plus sign, or at a dot
+    # after a number in scientific notation, e.g. "1+2" or "1e5.5". The latter is fine if the
+    # number has a dot already, but that's rare enough not to bother.
+    UNSPLIT_NUMBERS = re.compile(r'[\d.]\+|[eE][-+]?\d+\.')
+    # A number followed by something that ends it for extract as well: an explicit separator,
+    # a minus sign, a second dot or the end of the string.
+    DELIMITED_NUMBER = re.compile(r'[-+]?(?:(?:\d+\.\d*|\.\d+)(?:[eE][-+]?\d+)?(?=[ ,.-]|\Z)|\d+(?:[eE][-+]?\d+)?(?=[ ,-]|\Z))')
+
+    # Optional cache of parsed paths shared by all conversions of the process, for documents
+    # and icon packs that repeat the same path data. None while disabled, see setCacheSize.
+    cache = None
+    # Longer path data, e.g. of a detailed map, rarely repeats and would take a lot of memory.
+    MAX_CACHED_LENGTH = 16 * 1024
+
     class ExtractFloatResult:
         def __init__(self):
             # The end position of the parameter.
@@ -70,76 +95,195 @@ class PathParser:
             return cls.EMPTY_FLOAT_ARRAY
         try:
             arcCommand = command == 'a' or command == 'A'
-            results = [0.0] * len(s)
-            count = 0
-            startPosition = 1
-            endPosition = 0
-            result = cls.ExtractFloatResult()
-            totalLength = len(s)
-            # The startPosition should always be the first character of the current number, and
-            # endPosition is the character after the current number.
-            while startPosition < totalLength:
-                # In ANDROID parse mode we treat flags as regular floats for compatibility with
-                # old vector drawables that may have pathData not conforming to
-                # https://www.w3.org/TR/SVG/paths.html#PathDataBNF. In such a case flags may be
-                # represented by "1.0" or "0.0" (b/146520216).
-                flagMode = parseMode == cls.ParseMode.SVG and arcCommand and (count % 7 == 3 or count % 7 == 4)
-                cls.extract(s, startPosition, flagMode, result)
-                endPosition = result.mEndPosition
-                if startPosition < endPosition:
-                    results[count] = float(s[startPosition: endPosition])
-                    count += 1
-                if result.mExplicitSeparator:
-                    startPosition = endPosition + 1
-                else:
-                    startPosition = endPosition
+            if arcCommand and parseMode == cls.ParseMode.SVG:
+                results = cls.scanArcFloats(s)
+            else:
+                results = cls.tokenizeFloats(s[1:])
+            if results is None:
+                results = cls.extractFloats(s, parseMode)
             if arcCommand:
-                # https://www.w3.org/TR/SVG/paths.html#ArcOutOfRangeParameters:
-                # If either rx or ry have negative signs, these are dropped;
-                # the absolute value is used instead.
-                for i in range(0, count - 1, 7):
-                    results[i] = abs(results[i])
-                    results[i + 1] = abs(results[i + 1])
-            return results[:count]
+                cls.makeRadiiPositive(results)
+            return results
         except Exception as e:
             raise Exception(f'Error in parsing "{s}" {e}')
 
+    # https://www.w3.org/TR/SVG/paths.html#ArcOutOfRangeParameters:
+    # If either rx or ry have negative signs, these are dropped;
+    # the absolute value is used instead.
+    @classmethod
+    def makeRadiiPositive(cls, results, start: int = 0):
+        for i in range(start, len(results) - 1, 7):
+            results[i] = abs(results[i])
+            results[i + 1] = abs(results[i + 1])
+
+    @classmethod
+    def hasUnsplitNumbers(cls, s: str) -> bool:
+        # Most paths have neither plus signs nor scientific notation, and searching for single
+        # characters is much faster.
+        return ('+' in s or 'e' in s or 'E' in s) and cls.UNSPLIT_NUMBERS.search(s) is not None
+
+    # Parses the parameters of a command with a regular expression.
+    # @return array of floats, or None if extract has to read the parameters
+    @classmethod
+    def tokenizeFloats(cls, arguments: str) -> list[float]:
+        numbers = cls.NUMBER.findall(arguments)
+        # Everything but the separators has to be part of a number.
+        if len(''.join(numbers)) + arguments.count(' ') + arguments.count(',') != len(arguments) or cls.hasUnsplitNumbers(arguments):
+            return None
+        return list(map(float, numbers))
+
+    # Parses the floats of an arc command in SVG mode, where the large arc and sweep flags are
+    # single characters that don't have to be followed by a separator, e.g. "a1 1 0 112 2".
+    # @return array of floats, or None if extract has to read the string
+    @classmethod
+    def scanArcFloats(cls, s: str) -> list[float]:
+        results = []
+        separators = cls.SEPARATORS.match
+        number = cls.DELIMITED_NUMBER.match
+        position = 1
+        totalLength = len(s)
+        while True:
+            position = separators(s, position).end()
+            if position >= totalLength:
+                return results
+            if len(results) % 7 in (3, 4):
+                results.append(float(s[position]))
+                position += 1
+            else:
+                match = number(s, position)
+                if match is None:
+                    return None
+                results.append(float(match.group()))
+                position = match.end()
+
+    # Parses the floats in the string one character at a time, for strings that the regular
+    # expressions don't accept.
+    @classmethod
+    def extractFloats(cls, s: str, parseMode: ParseMode) -> list[float]:
+        arcCommand = s[0] == 'a' or s[0] == 'A'
+        results = [0.0] * len(s)
+        count = 0
+        startPosition = 1
+        endPosition = 0
+        result = cls.ExtractFloatResult()
+        totalLength = len(s)
+        # The startPosition should always be the first character of the current number, and
+        # endPosition is the character after the current number.
+        while startPosition < totalLength:
+            # In ANDROID parse mode we treat flags as regular floats for compatibility with
+            # old vector drawables that may have pathData not conforming to
+            # https://www.w3.org/TR/SVG/paths.html#PathDataBNF. In such a case flags may be
+            # represented by "1.0" or "0.0" (b/146520216).
+            flagMode = parseMode == cls.ParseMode.SVG and arcCommand and (count % 7 == 3 or count % 7 == 4)
+            cls.extract(s, startPosition, flagMode, result)
+            endPosition = result.mEndPosition
+            if startPosition < endPosition:
+                results[count] = float(s[startPosition: endPosition])
+                count += 1
+            if result.mExplicitSeparator:
+                startPosition = endPosition + 1
+            else:
+                startPosition = endPosition
+        return results[:count]
+
     @classmethod
-    def addNode(cls, lst: list[VdPath.Node], cmd, val: list[float]):
-        lst.append(VdPath.Node(cmd, val))
+    def addNode(cls, types: list[str], params: array, offsets: array, cmd: str, val):
+        types.append(cmd)
+        params.extend(val)
+        offsets.append(len(params))
 
+    # Enables the cache of parsed paths, or disables it if maxEntries is 0 or None. Resizing
+    # keeps the most recently used paths and the statistics.
+    # @param maxEntries the number of paths to keep
     @classmethod
-    def nextStart(cls, s: str, end: int) -> int:
-        while end < len(s):
-            c = s[end]
-            # Note that 'e' or 'E' are not valid path commands, but could be used for floating
-            # point numbers' scientific notation. Therefore, when searching for next command, we
-            # should ignore 'e' and 'E'.
-            if (ord('A') <= ord(c) and ord(c) <= ord('Z') and ord(c) != ord('E') or ord('a') <= ord(c) and ord(c) <= ord('z') and ord(c) != ord('e')):
-                return end
-            end += 1
-        return end
+    def setCacheSize(cls, maxEntries: int):
+        if not maxEntries:
+            cls.cache = None
+        elif cls.cache is None:
+            cls.cache = PathCache(maxEntries)
+        else:
+            cls.cache.resize(maxEntries)
 
+    # Returns the hit and miss counts of the cache as described by PathCache.getStats, or None
+    # if the cache is disabled.
     @classmethod
-    def parsePath(cls, value: str, mode: ParseMode) -> list[VdPath.Node]:
+    def getCacheStats(cls) -> dict:
+        cache = cls.cache
+        return None if cache is None else cache.getStats()
+
+    # Parses path data. With the cache enabled, the returned nodes may share their arrays with
+    # the cache; VdPath.Node.transform copies them before changing anything.
+    @classmethod
+    def parsePath(cls, value: str, mode: ParseMode) -> PathNodes:
+        cache = cls.cache
+        if cache is None or cls.MAX_CACHED_LENGTH < len(value):
+            return cls.parseUncached(value, mode)
+        key = (value, mode)
+        nodes = cache.get(key)
+        if nodes is None:
+            nodes = cls.parseUncached(value, mode)
+            cache.put(key, nodes)
+        return nodes.share()
+
+    @classmethod
+    def parseUncached(cls, value: str, mode: ParseMode) -> PathNodes:
         value = value.strip()
-        nList = []
-        start = 0
-        end = 1
-        while end < len(value):
-            end = cls.nextStart(value, end)
-            s = value[start: end]
+        if not cls.COMMAND.match(value) or cls.hasUnsplitNumbers(value):
+            return cls.parseSegments(value, mode)
+        types = []
+        params = array('d')
+        offsets = array('l', [0])
+        if len(value) > 1 and value[0] != 'M' and value[0] != 'm':
+            # For the starting command, special handling: add M 0 0 if there is none.
+            # This is good for transformation.
+            cls.addNode(types, params, offsets, 'M', (0.0, 0.0))
+        # Same as getFloats for every command, but without the calls in between.
+        svgMode = mode == cls.ParseMode.SVG
+        findNumbers = cls.NUMBER.findall
+        for command, arguments in cls.SEGMENT.findall(value):
+            types.append(command)
+            if command != 'z' and command != 'Z' and arguments:
+                arcCommand = command == 'a' or command == 'A'
+                numbers = None if arcCommand and svgMode else findNumbers(arguments)
+                if numbers is None or len(''.join(numbers)) + arguments.count(' ') + arguments.count(',') != len(arguments):
+                    params.extend(cls.getFloats(command + arguments, mode))
+                elif arcCommand:
+                    start = len(params)
+                    params.extend(map(float, numbers))
+                    cls.makeRadiiPositive(params, start)
+                else:
+                    params.extend(map(float, numbers))
+            offsets.append(len(params))
+        return PathNodes(''.join(types), params, offsets)
+
+    # Same as parsePath, for paths that don't start with a command or that extract reads
+    # differently from the regular expressions. Every segment is parsed on its own.
+    @classmethod
+    def parseSegments(cls, value: str, mode: ParseMode) -> PathNodes:
+        if not value:
+            return PathNodes()
+        types = []
+        params = array('d')
+        offsets = array('l', [0])
+        # Every command starts a segment that runs up to the next one. The first character
+        # starts a segment even if it isn't a command.
+        starts = [0]
+        starts.extend(match.start() for match in cls.COMMAND.finditer(value, 1))
+        last = len(starts) - 1
+        if len(value) - starts[last] == 1:
+            # A trailing command without parameters, e.g. "z".
+            last -= 1
+        starts.append(len(value))
+        for i in range(last + 1):
+            s = value[starts[i]: starts[i + 1]]
             currentCommand = s[0]
             val = cls.getFloats(s, mode)
-            if start == 0:
+            if i == 0:
                 # For the starting command, special handling: add M 0 0 if there is none.
                 # This is good for transformation.
                 if currentCommand != 'M' and currentCommand != 'm':
-                    cls.addNode(nList, 'M',  [0.0] * 2)
-            cls.addNode(nList, currentCommand, val)
-            start = end
-            end += 1
-        if end - start == 1 and start < len(value):
-            cls.addNode(nList, value[start], cls.EMPTY_FLOAT_ARRAY)
-        return nList
-
+                    cls.addNode(types, params, offsets, 'M', (0.0, 0.0))
+            cls.addNode(types, params, offsets, currentCommand, val)
+        if last < len(starts) - 2:
+            cls.addNode(types, params, offsets, value[-1], cls.EMPTY_FLOAT_ARRAY)
+        return PathNodes(''.join(types), params, offsets)
@@ -0,0 +1,51 @@
+from __future__ import annotations
+import json
+import sys
+import time
+
+from ConversionDaemon import ConversionDaemon
+
+# Persistent worker for build systems. One warm process reads newline-delimited JSON requests
+# from stdin and answers each with one line of JSON on stdout, so that a build doesn't spawn a
+# new process per action.
+#
+# Requests use the same fields as ConversionDaemon: "path" or "svg" for the input, and
+# optionally "output". An "id" given in the request is echoed in the response. The response
+# carries the fields of ConversionDaemon's response plus "timing" with the time spent on the
+# request in milliseconds. A request with "stats" set returns the statistics of the cache of
+# parsed paths in "pathCache".
+class PersistentWorker:
+    @classmethod
+    def handleLine(cls, line: str) -> dict:
+        start = time.perf_counter()
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError('request must be a JSON object')
+        except ValueError as e:
+            request = {}
+            response = {'ok': False, 'errors': f'Invalid request: {e}'}
+        else:
+            response = ConversionDaemon.handleRequest(request)
+        if 'id' in request:
+            response['id'] = request['id']
+        response['timing'] = {'total_ms': (time.perf_counter() - start) * 1000}
+        return response
+
+    # Serves requests until stdin is closed.
+    @classmethod
+    def run(cls, stdin=None, stdout=None):
+        stdin = stdin or sys.stdin
+        stdout = stdout or sys.stdout
+        # Anything printed while converting must not corrupt the protocol stream.
+        savedStdout = sys.stdout
+        sys.stdout = sys.stderr
+        try:
+            for line in stdin:
+                if not line.strip():
+                    continue
+                stdout.write(json.dumps(cls.handleLine(line)))
+                stdout.write('\n')
+                stdout.flush()
+        finally:
+            sys.stdout = savedStdout
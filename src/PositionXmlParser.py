@@ -1,42 +1,194 @@
-import xml.dom.minidom as minidom
-import xml.sax
-
-class LineNumberDOMHandler(xml.sax.handler.ContentHandler):
-    def __init__(self):
-        super().__init__()
-        self.dom = minidom.Document()
-        self.current_node = self.dom
-        self.locator = None
-
-    def setDocumentLocator(self, locator):
-        self.locator = locator
-    
-    def startElement(self, name, attrs):
-        line_number = self.locator.getLineNumber()
-        element = self.dom.createElement(name)
-        for qname, value in attrs.items():
-            element.setAttribute(qname, value)
-        self.current_node.appendChild(element)
-        self.current_node = element
-        setattr(element, '__line_number__', line_number)
-    
-    def endElement(self, name):
-        if self.current_node.parentNode:
-            self.current_node = self.current_node.parentNode
-
-    def characters(self, content):
+import io
+import logging
+from xml.parsers import expat
+
+from LxmlTreeBuilder import LxmlTreeBuilder
+from StreamReader import StreamReader
+from XmlElement import XmlDocument, XmlElement
+
+# Builds an XmlDocument from expat's callbacks, recording the line number of every start tag.
+# The content of elements in XmlElement.PRUNED_TAGS is skipped without creating anything: while
+# inside one, the handlers are swapped for ones that only track the depth and collect ids.
+# @param lazyLineNumbers if true, line numbers are left as None to be recovered on demand, and
+#     the elements are numbered in document order instead
+class LineNumberTreeBuilder:
+    def __init__(self, lazyLineNumbers: bool = False):
+        self.document = XmlDocument()
+        self.current = None
+        # Number of elements so far, in lazy mode. Pruned content isn't counted.
+        self.elementCount = 0
+        # Depth below the element whose content is being pruned.
+        self.prunedDepth = 0
+        self.parser = expat.ParserCreate()
+        # Deliver contiguous character data in one call instead of one per line.
+        self.parser.buffer_text = True
+        self.startHandler = self.startElementWithoutLine if lazyLineNumbers else self.startElement
+        self.setHandlers(self.startHandler, self.endElement, self.characters)
+
+    def setHandlers(self, start, end, characters):
+        self.parser.StartElementHandler = start
+        self.parser.EndElementHandler = end
+        self.parser.CharacterDataHandler = characters
+
+    def startElement(self, name: str, attrs: dict):
+        self.addElement(XmlElement(name, attrs, self.current, self.parser.CurrentLineNumber))
+
+    def startElementWithoutLine(self, name: str, attrs: dict):
+        self.addElement(XmlElement(name, attrs, self.current, None, self.elementCount))
+        self.elementCount += 1
+
+    def addElement(self, element: XmlElement):
+        if self.current is None:
+            self.document.documentElement = element
+        else:
+            self.current.children.append(element)
+        self.current = element
+        if element.tagName in XmlElement.PRUNED_TAGS:
+            self.setHandlers(self.startPruned, self.endPruned, self.charactersPruned)
+
+    def endElement(self, name: str):
+        self.current = self.current.parentNode
+
+    def characters(self, content: str):
+        if self.current is not None and content.strip():
+            self.current.text += content
+
+    def startPruned(self, name: str, attrs: dict):
+        self.prunedDepth += 1
+        self.current.hasPrunedContent = True
+        _id = attrs.get('id')
+        if _id:
+            self.document.ignoredIds.add(_id)
+
+    def endPruned(self, name: str):
+        if self.prunedDepth:
+            self.prunedDepth -= 1
+        else:
+            self.setHandlers(self.startHandler, self.endElement, self.characters)
+            self.endElement(name)
+
+    def charactersPruned(self, content: str):
         if content.strip():
-            text_node = self.dom.createTextNode(content)
-            self.current_node.appendChild(text_node)
+            self.current.hasPrunedContent = True
+
+    # Feeds the parser from a readable binary or text stream.
+    def feedStream(self, stream):
+        for data in StreamReader.readChunks(stream):
+            self.parser.Parse(data, False)
+        self.parser.Parse(b'', True)
 
-    def get_dom(self):
-        return self.dom
+    def getDocument(self) -> XmlDocument:
+        return self.document
 
 class PositionXmlParser:
+    logger = logging.getLogger('Svg2Vector')
+
+    BACKEND_EXPAT = 'expat'
+    BACKEND_LXML = 'lxml'
+
+    # Backend used when none is given. lxml parses faster, but copying its tree into
+    # XmlElements costs more than that saves, so expat is the default.
+    defaultBackend = BACKEND_EXPAT
+    # Whether expat leaves the line numbers out, see setLazyLineNumbers.
+    lazyLineNumbers = False
+
+    @classmethod
+    def setDefaultBackend(cls, backend: str):
+        cls.defaultBackend = cls.getBackend(backend)
+
+    # Line numbers are only read when a message is logged, which doesn't happen for most files.
+    # In lazy mode the expat backend doesn't record them; SvgTree recovers them on demand with
+    # scanLineNumbers. Streams can't be read again, so their line numbers are always recorded.
+    # lxml records line numbers itself either way.
+    @classmethod
+    def setLazyLineNumbers(cls, lazy: bool):
+        cls.lazyLineNumbers = lazy
+
+    # Resolves the backend to use. If lxml is requested but not installed, falls back to expat.
+    # @param backend 'expat', 'lxml', or None for the default backend
+    # @raises ValueError if the backend is unknown
+    @classmethod
+    def getBackend(cls, backend: str = None) -> str:
+        backend = backend or cls.defaultBackend
+        if backend == cls.BACKEND_LXML and not LxmlTreeBuilder.isAvailable():
+            cls.logger.warning('lxml is not installed, falling back to expat')
+            return cls.BACKEND_EXPAT
+        if backend not in (cls.BACKEND_EXPAT, cls.BACKEND_LXML):
+            raise ValueError(f'Unknown parser backend {backend}')
+        return backend
+
+    # Parses a document from a file path or from a readable binary or text stream. Gzip
+    # compressed documents are decompressed while they are parsed.
+    @classmethod
+    def parse(cls, source, backend: str = None) -> XmlDocument:
+        if cls.getBackend(backend) == cls.BACKEND_LXML:
+            return LxmlTreeBuilder.parse(source)
+        if hasattr(source, 'read'):
+            builder = LineNumberTreeBuilder()
+            builder.feedStream(source)
+        else:
+            builder = LineNumberTreeBuilder(cls.lazyLineNumbers)
+            with open(source, 'rb') as file:
+                if StreamReader.isGzipFile(file):
+                    builder.feedStream(file)
+                else:
+                    builder.parser.ParseFile(file)
+        return builder.getDocument()
+
+    # Parses a document held in memory as bytes or str.
+    @classmethod
+    def parseString(cls, data, backend: str = None) -> XmlDocument:
+        if StreamReader.isGzip(data):
+            return cls.parse(io.BytesIO(data), backend)
+        if cls.getBackend(backend) == cls.BACKEND_LXML:
+            return LxmlTreeBuilder.parseString(data)
+        builder = LineNumberTreeBuilder(cls.lazyLineNumbers)
+        builder.parser.Parse(data, True)
+        return builder.getDocument()
+
+    # Returns the line numbers of all start tags in document order.
+    # @param source the document as bytes or str, or a readable binary stream
+    @classmethod
+    def scanLineNumbers(cls, source) -> list[int]:
+        lines = []
+        # Pruned content isn't in the tree, so it mustn't be counted either.
+        prunedDepth = 0
+        parser = expat.ParserCreate()
+
+        def startElement(name: str, attrs: dict):
+            nonlocal prunedDepth
+            if prunedDepth:
+                prunedDepth += 1
+                return
+            lines.append(parser.CurrentLineNumber)
+            if name in XmlElement.PRUNED_TAGS:
+                prunedDepth = 1
+
+        def endElement(name: str):
+            nonlocal prunedDepth
+            if prunedDepth:
+                prunedDepth -= 1
+
+        parser.StartElementHandler = startElement
+        parser.EndElementHandler = endElement
+        if StreamReader.isGzip(source):
+            source = io.BytesIO(source)
+        if hasattr(source, 'read'):
+            for data in StreamReader.readChunks(source):
+                parser.Parse(data, False)
+            parser.Parse(b'', True)
+        else:
+            parser.Parse(source, True)
+        return lines
+
+    # Fills in the line numbers of a document parsed in lazy mode.
+    # @param lines the result of scanLineNumbers for the same source
     @classmethod
-    def parse(cls, path):
-        handler = LineNumberDOMHandler()
-        parser = xml.sax.make_parser()
-        parser.setContentHandler(handler)
-        xml.sax.parse(path, handler)
-        return handler.get_dom()
\ No newline at end of file
+    def assignLineNumbers(cls, root: XmlElement, lines: list[int]):
+        lines = iter(lines)
+        stack = [root]
+        while stack:
+            element = stack.pop()
+            # The source changed if it has fewer elements now; there is nothing better to say.
+            element.lineNumber = next(lines, 0)
+            stack.extend(reversed(element.children))
@@ -0,0 +1,149 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import sqlite3
+from typing import Iterator
+
+from ConversionCache import ConversionCache
+from Svg2VectorBatch import Svg2VectorBatch
+
+# Converts SVG documents stored as blobs in a SQLite database, without exporting them to files.
+# The rows are read in batches, converted in memory by the worker pool of Svg2VectorBatch, and
+# the VectorDrawable XML and the error messages are written back to the same rows, one
+# transaction per batch.
+class SqliteBatch:
+    logger = logging.getLogger('Svg2Vector')
+
+    DEFAULT_TABLE = 'icons'
+    DEFAULT_KEY_COLUMN = 'rowid'
+    DEFAULT_SVG_COLUMN = 'svg'
+    DEFAULT_XML_COLUMN = 'xml'
+    DEFAULT_ERRORS_COLUMN = 'errors'
+    # Rows read, converted and written back per transaction.
+    DEFAULT_BATCH_SIZE = 1000
+
+    # One row handed to a worker process. Carries the same options as Svg2VectorBatch.Job.
+    # @param key the value of the key column of the row
+    # @param data the SVG content, as bytes or str
+    class Job:
+        def __init__(self, key, data, cacheDir: str = None, cacheMaxBytes: int = ConversionCache.DEFAULT_MAX_BYTES,
+                     streaming: bool = False):
+            self.key = key
+            self.data = data
+            self.cacheDir = cacheDir
+            self.cacheMaxBytes = cacheMaxBytes
+            self.streaming = streaming
+
+    # Outcome of converting one row.
+    # @param key the value of the key column of the row
+    # @param xml the VectorDrawable XML, or None if the conversion failed
+    # @param errorMessage the combined errors and warnings, or an empty string
+    class RowResult:
+        def __init__(self, key, xml: str, errorMessage: str):
+            self.key = key
+            self.xml = xml
+            self.errorMessage = errorMessage
+
+        def hasOutput(self) -> bool:
+            return self.xml is not None
+
+    @classmethod
+    def quoteIdentifier(cls, name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    # Converts a single row. Runs inside a worker process, so it must never raise.
+    @classmethod
+    def convertRow(cls, job: Job) -> RowResult:
+        fileName = str(job.key)
+        try:
+            if job.data is None:
+                return cls.RowResult(job.key, None, f'No SVG content in row {fileName}')
+            result = Svg2VectorBatch.convertData(job, job.data, fileName)
+            return cls.RowResult(job.key, result.xml or None, result.getErrorMessage())
+        except Exception as e:
+            return cls.RowResult(job.key, None, f'EXCEPTION in parsing {fileName}:\n{e}')
+
+    # Converts the SVG blobs of a table and stores the results in the same rows.
+    # @param databasePath the SQLite database file
+    # @param table the table that holds the documents and receives the results
+    # @param keyColumn column that identifies a row, used to write the results back
+    # @param svgColumn column holding the SVG content
+    # @param xmlColumn column receiving the VectorDrawable XML, NULL if the conversion failed
+    # @param errorsColumn column receiving the error messages, an empty string if there are none
+    # @param query SELECT statement returning the key and the SVG content of the rows to
+    #     convert, e.g. to only convert rows without XML, or None to convert every row of table
+    # @param maxWorkers number of worker processes, defaults to the number of CPUs
+    # @param chunkSize number of rows dispatched to a worker at a time, or None to derive it from
+    #     the batch size and the number of workers
+    # @param batchSize number of rows written back per transaction
+    # @param cacheDir directory of a ConversionCache that unchanged documents are answered from
+    # @param cacheMaxBytes size bound of the cache
+    # @param streaming whether to convert in a single pass where the document allows it
+    # @return the number of converted rows and the number of rows that failed
+    @classmethod
+    def convert(cls, databasePath: str, table: str = DEFAULT_TABLE, keyColumn: str = DEFAULT_KEY_COLUMN,
+                svgColumn: str = DEFAULT_SVG_COLUMN, xmlColumn: str = DEFAULT_XML_COLUMN,
+                errorsColumn: str = DEFAULT_ERRORS_COLUMN, query: str = None, maxWorkers: int = None,
+                chunkSize: int = None, batchSize: int = DEFAULT_BATCH_SIZE, cacheDir: str = None,
+                cacheMaxBytes: int = ConversionCache.DEFAULT_MAX_BYTES, streaming: bool = False) -> tuple[int, int]:
+        quote = cls.quoteIdentifier
+        if query is None:
+            query = f'SELECT {quote(keyColumn)}, {quote(svgColumn)} FROM {quote(table)}'
+        update = f'UPDATE {quote(table)} SET {quote(xmlColumn)} = ?, {quote(errorsColumn)} = ? WHERE {quote(keyColumn)} = ?'
+        connection = sqlite3.connect(databasePath)
+        executor = None
+        try:
+            workers = Svg2VectorBatch.getWorkerCount(maxWorkers)
+            if workers > 1:
+                executor = ProcessPoolExecutor(max_workers=workers)
+            converted = 0
+            failed = 0
+            pending = None
+            for rows in cls.fetchBatches(connection.execute(query), batchSize):
+                jobs = [cls.Job(key, data, cacheDir, cacheMaxBytes, streaming) for key, data in rows]
+                if executor is None:
+                    results = map(cls.convertRow, jobs)
+                else:
+                    # The workers convert this batch while the previous one is written back.
+                    results = Svg2VectorBatch.mapJobs(executor, workers, cls.convertRow, jobs, chunkSize)
+                if pending is not None:
+                    done, errors = cls.writeResults(connection, update, pending)
+                    converted += done
+                    failed += errors
+                pending = results
+            if pending is not None:
+                done, errors = cls.writeResults(connection, update, pending)
+                converted += done
+                failed += errors
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            connection.close()
+        if cacheDir:
+            # Workers only see their own additions, so enforce the size bound once at the end.
+            ConversionCache.getInstance(cacheDir, cacheMaxBytes).trim()
+        return converted, failed
+
+    @classmethod
+    def fetchBatches(cls, cursor: sqlite3.Cursor, batchSize: int) -> Iterator[list]:
+        while True:
+            rows = cursor.fetchmany(batchSize)
+            if not rows:
+                return
+            yield rows
+
+    # Writes the results of a batch in a single transaction.
+    # @return the number of converted rows and the number of rows that failed
+    @classmethod
+    def writeResults(cls, connection: sqlite3.Connection, update: str, results: Iterator[RowResult]) -> tuple[int, int]:
+        converted = 0
+        failed = 0
+        with connection:
+            for result in results:
+                connection.execute(update, (result.xml, result.errorMessage, result.key))
+                if result.hasOutput():
+                    converted += 1
+                else:
+                    failed += 1
+                    cls.logger.info(f'Row {result.key}: {result.errorMessage}')
+        return converted, failed
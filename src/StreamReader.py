@@ -0,0 +1,91 @@
+from __future__ import annotations
+import itertools
+from typing import Iterator
+import zlib
+
+# This is not original class.
+# Reads documents from readable streams in fixed-size blocks, so that the parsers can be fed
+# from pipes, sockets (via socket.makefile('rb')), HTTP request bodies or tar members without
+# the whole document being read first. A block may be shorter than the block size, e.g. when a
+# pipe delivers data in smaller pieces; only an empty read marks the end of the stream.
+#
+# Gzip compressed documents (.svgz) are recognized by their magic bytes and decompressed block
+# by block on the way to the parser, so the uncompressed document is never held as a whole.
+class StreamReader:
+    # Size of the blocks read from streams.
+    READ_SIZE = 64 * 1024
+    GZIP_MAGIC = b'\x1f\x8b'
+
+    # Returns the blocks of a readable binary or text stream until it is exhausted, decompressed
+    # if the stream is gzip compressed.
+    # @raises ValueError if the stream is non-blocking and has no data available, or if a
+    #     compressed stream is truncated
+    @classmethod
+    def readChunks(cls, stream, size: int = None) -> Iterator:
+        return cls.open(stream, size)[0]
+
+    # Same as readChunks, but also tells whether the stream is gzip compressed. The first block
+    # is read right away to find out.
+    # @return the blocks and whether they are decompressed
+    @classmethod
+    def open(cls, stream, size: int = None) -> tuple[Iterator, bool]:
+        size = size or cls.READ_SIZE
+        blocks = cls.readBlocks(stream, size)
+        first = next(blocks, None)
+        if first is None:
+            return iter(()), False
+        # Pipes may deliver less than the magic bytes at first.
+        while isinstance(first, bytes) and len(first) < len(cls.GZIP_MAGIC):
+            more = next(blocks, None)
+            if more is None:
+                break
+            first += more
+        blocks = itertools.chain([first], blocks)
+        if cls.isGzip(first):
+            return cls.decompress(blocks, size), True
+        return blocks, False
+
+    @classmethod
+    def readBlocks(cls, stream, size: int) -> Iterator:
+        read = stream.read
+        while True:
+            data = read(size)
+            if data is None:
+                # Non-blocking streams return None instead of waiting for data.
+                raise ValueError('Non-blocking streams are not supported')
+            if not data:
+                return
+            yield data
+
+    # Decompresses gzip data given in blocks. No block of output is bigger than size, however
+    # well the data compresses. Concatenated gzip members are decompressed one after another,
+    # like gzip does.
+    @classmethod
+    def decompress(cls, blocks: Iterator[bytes], size: int) -> Iterator[bytes]:
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        for data in blocks:
+            while data:
+                out = decompressor.decompress(data, size)
+                if out:
+                    yield out
+                if decompressor.eof:
+                    data = decompressor.unused_data
+                    if data:
+                        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+                else:
+                    data = decompressor.unconsumed_tail
+        out = decompressor.flush()
+        if out:
+            yield out
+        if not decompressor.eof:
+            raise ValueError('Compressed data ended before the end of the gzip stream')
+
+    # Returns whether data held in memory is gzip compressed.
+    @classmethod
+    def isGzip(cls, data) -> bool:
+        return isinstance(data, (bytes, bytearray)) and data[:2] == cls.GZIP_MAGIC
+
+    # Returns whether a file opened in binary mode is gzip compressed, without consuming anything.
+    @classmethod
+    def isGzipFile(cls, file) -> bool:
+        return file.peek(len(cls.GZIP_MAGIC))[:len(cls.GZIP_MAGIC)] == cls.GZIP_MAGIC
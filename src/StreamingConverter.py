@@ -0,0 +1,274 @@
+from __future__ import annotations
+import io
+import logging
+import os
+import time
+import zlib
+from typing import Iterator
+from xml.parsers import expat
+
+from ConversionResult import ConversionResult
+from OutputStreamWriter import OutputStreamWriter
+from StreamReader import StreamReader
+from Svg2Vector import Svg2Vector
+from SvgGroupNode import SvgGroupNode
+from SvgLeafNode import SvgLeafNode
+from SvgNode import SvgNode
+from SvgTree import SvgTree
+from Writer import Writer
+from XmlElement import XmlElement
+
+# This is not original class.
+# Converts an SVG in a single pass over expat's events, without building the document tree or
+# the tree of SvgNodes. Every shape is extracted, flattened and formatted as soon as its end
+# tag is seen, so the parsed elements don't pile up; only the chain of open elements and the
+# groups' stacked transforms are kept.
+#
+# This only works for documents without forward references. When the converter meets a
+# construct that needs the rest of the document, e.g. <use>, gradients, clip paths or <style>
+# classes, it discards what it has formatted so far and converts the document with the tree
+# based Svg2Vector instead. Either way, the output is the same as Svg2Vector's. As that can
+# happen up to the last element, the output is only handed to the writer at the end, and the
+# blocks read from a stream are kept until then, so memory still grows with the size of the
+# input and the output; just not with the size of their trees.
+class StreamingConverter:
+    logger = logging.getLogger('Svg2Vector')
+
+    # Elements that are either referenced from elsewhere or reference something else.
+    LOOK_AHEAD_ELEMENTS = {
+        Svg2Vector.SVG_USE,
+        Svg2Vector.SVG_DEFS,
+        Svg2Vector.SVG_CLIP_PATH_ELEMENT,
+        Svg2Vector.SVG_MASK,
+        Svg2Vector.SVG_STYLE,
+        'linearGradient',
+        'radialGradient',
+        'svg'
+    }
+    # Attributes whose effect depends on other parts of the document.
+    LOOK_AHEAD_ATTRIBUTES = {'class', Svg2Vector.SVG_CLIP_PATH, Svg2Vector.SVG_MASK}
+    LEAF_ELEMENTS = {
+        Svg2Vector.SVG_PATH,
+        Svg2Vector.SVG_RECT,
+        Svg2Vector.SVG_CIRCLE,
+        Svg2Vector.SVG_ELLIPSE,
+        Svg2Vector.SVG_POLYGON,
+        Svg2Vector.SVG_POLYLINE,
+        Svg2Vector.SVG_LINE
+    }
+
+    # Indices into the entries of mStack.
+    ELEMENT = 0
+    GROUP = 1
+    HAS_CONTENT = 2
+
+    # Raised from the event handlers when the document needs the tree based conversion.
+    class FallbackRequired(Exception):
+        pass
+
+    # Malformed or unreadable input, which Svg2Vector reports after the fallback.
+    PARSE_ERRORS = (expat.ExpatError, OSError, EOFError, ValueError, zlib.error)
+
+    def __init__(self, svgTree: SvgTree):
+        self.mSvgTree = svgTree
+        # One [element, group, hasContent] entry per open element. The group is the SvgGroupNode
+        # that shapes inside the element belong to.
+        self.mStack = []
+        # Depth within a shape or pruned element, whose content is not converted.
+        self.mSkipDepth = 0
+        self.mRootTransform = None
+        # The output is held back until the end, so that a fallback can still discard it.
+        self.mChunks = []
+        self.mParser = expat.ParserCreate()
+        self.mParser.buffer_text = True
+        self.mParser.StartElementHandler = self.startElement
+        self.mParser.EndElementHandler = self.endElement
+        self.mParser.CharacterDataHandler = self.characters
+
+    # The converter is the writer of the tree's header and footer and of the shapes.
+    def write(self, out: str):
+        self.mChunks.append(out)
+
+    def startElement(self, name: str, attrs: dict):
+        stack = self.mStack
+        if stack:
+            stack[-1][self.HAS_CONTENT] = True
+        if self.mSkipDepth:
+            self.mSkipDepth += 1
+            return
+        if name in self.LOOK_AHEAD_ELEMENTS and stack:
+            raise self.FallbackRequired(f'<{name}>')
+        for attrName, value in attrs.items():
+            if attrName in self.LOOK_AHEAD_ATTRIBUTES or 'url(' in value:
+                raise self.FallbackRequired(f'{attrName}="{value}"')
+            if attrName == Svg2Vector.SVG_STYLE and (Svg2Vector.SVG_CLIP_PATH in value or Svg2Vector.SVG_MASK in value):
+                raise self.FallbackRequired(f'{attrName}="{value}"')
+
+        parent = stack[-1] if stack else None
+        element = XmlElement(name, attrs, parent and parent[self.ELEMENT], self.mParser.CurrentLineNumber)
+        if parent is None:
+            stack.append([element, self.startRoot(element), False])
+        elif name == Svg2Vector.SVG_GROUP:
+            parentGroup = parent[self.GROUP]
+            group = SvgGroupNode(self.mSvgTree, element, name)
+            group.fillEmptyAttributes(parentGroup.mVdAttributesMap)
+            group.mStackedTransform.setTransform(parentGroup.mStackedTransform)
+            group.mStackedTransform.concatenate(group.mLocalTransform)
+            stack.append([element, group, False])
+        else:
+            # The content of shapes and of pruned elements is not converted.
+            if name in self.LEAF_ELEMENTS or name in XmlElement.PRUNED_TAGS:
+                self.mSkipDepth = 1
+            stack.append([element, parent[self.GROUP], False])
+
+    def startRoot(self, element: XmlElement) -> SvgGroupNode:
+        if element.tagName != 'svg':
+            raise self.FallbackRequired(f'<{element.tagName}> root')
+        svgTree = self.mSvgTree
+        svgTree.parseDimension(element)
+        if not svgTree.viewBox:
+            # Let Svg2Vector report it.
+            raise self.FallbackRequired('missing viewBox')
+        self.mRootTransform = svgTree.normalizeRootTransform()
+        root = SvgGroupNode(svgTree, element, 'root')
+        root.mStackedTransform.concatenate(root.mLocalTransform)
+        svgTree.setRoot(root)
+        return root
+
+    def endElement(self, name: str):
+        if self.mSkipDepth > 1:
+            self.mSkipDepth -= 1
+            return
+        element, group, hasContent = self.mStack.pop()
+        self.mSkipDepth = 0
+        if not element.attributes and not hasContent:
+            return
+        if name in self.LEAF_ELEMENTS:
+            self.writeLeaf(element, group)
+        elif name != Svg2Vector.SVG_GROUP and name in Svg2Vector.unsupportedSvgNodes:
+            self.mSvgTree.logError(f'<{name}> is not supported', element)
+
+    def characters(self, content: str):
+        if self.mStack and content.strip():
+            self.mStack[-1][self.HAS_CONTENT] = True
+
+    # Extracts a shape and writes it right away, the same way Svg2Vector does after flattening
+    # the whole tree.
+    def writeLeaf(self, element: XmlElement, group: SvgGroupNode):
+        svgTree = self.mSvgTree
+        leaf = SvgLeafNode(svgTree, element, element.tagName)
+        leaf.fillEmptyAttributes(group.mVdAttributesMap)
+        Svg2Vector.extractAllItemsAs(svgTree, leaf, element, group)
+        # Without <style> elements nothing is applied to the shapes registered by tag name.
+        svgTree.getStyleAffectedNodes().clear()
+        if not svgTree.getHasLeafNode():
+            svgTree.setHasLeafNode(True)
+            svgTree.writeHeader(self)
+        leaf.flatten(group.mStackedTransform)
+        leaf.validate()
+        leaf.transformIfNeeded(self.mRootTransform)
+        leaf.writeXml(self, SvgNode.INDENT_UNIT)
+
+    # Runs the parser over the source, which is a file path, bytes or str held in memory, a
+    # readable stream or the blocks of one as returned by StreamReader.readChunks.
+    # @param consumed if given, receives the blocks read from a stream, for the fallback
+    def feed(self, source, isPath: bool, consumed: list = None):
+        if isPath:
+            with open(source, 'rb') as file:
+                if StreamReader.isGzipFile(file):
+                    self.feedBlocks(StreamReader.readChunks(file), consumed)
+                else:
+                    self.mParser.ParseFile(file)
+        elif hasattr(source, 'read'):
+            self.feedBlocks(StreamReader.readChunks(source), consumed)
+        elif hasattr(source, '__next__'):
+            self.feedBlocks(source, consumed)
+        elif StreamReader.isGzip(source):
+            self.feedBlocks(StreamReader.readChunks(io.BytesIO(source)), consumed)
+        else:
+            self.mParser.Parse(source, True)
+        svgTree = self.mSvgTree
+        svgTree.validate()
+        if svgTree.getHasLeafNode():
+            svgTree.writeFooter(self)
+
+    def feedBlocks(self, blocks: Iterator, consumed: list):
+        for data in blocks:
+            if consumed is not None:
+                consumed.append(data)
+            self.mParser.Parse(data, False)
+        self.mParser.Parse(b'', True)
+
+    # Converts the source in a single pass if possible.
+    # @return the SvgTree holding the messages and the size, or None if the document needs the
+    #     tree based conversion
+    @classmethod
+    def tryConvert(cls, source, isPath: bool, fileName: str, writer: Writer, consumed: list = None) -> SvgTree:
+        svgTree = SvgTree()
+        svgTree.mFileName = fileName
+        converter = cls(svgTree)
+        start = time.perf_counter()
+        try:
+            converter.feed(source, isPath, consumed)
+        except cls.FallbackRequired as e:
+            cls.logger.info(f'{fileName}: {e} needs the whole document, converting the tree')
+            return None
+        except cls.PARSE_ERRORS as e:
+            cls.logger.info(f'{fileName}: {e}, converting the tree')
+            return None
+        finally:
+            svgTree.addPhaseTime(SvgTree.PHASE_STREAM, time.perf_counter() - start)
+        for chunk in converter.mChunks:
+            writer.write(chunk)
+        return svgTree
+
+    # Same as Svg2Vector.parseSvgToXml, but converts in a single pass when possible.
+    @classmethod
+    def parseSvgToXml(cls, inputSVG: str, writer: Writer) -> str:
+        return cls.convert(inputSVG, writer).getErrorMessage()
+
+    # Same as Svg2Vector.parseStringToXml, but converts in a single pass when possible.
+    @classmethod
+    def parseStringToXml(cls, data, writer: Writer, fileName: str = '') -> str:
+        return cls.convertData(data, writer, fileName).getErrorMessage()
+
+    # Same as Svg2Vector.convert, but converts in a single pass when possible.
+    @classmethod
+    def convert(cls, inputSVG, writer: Writer = None, fileName: str = '') -> ConversionResult:
+        if writer is None:
+            writer = OutputStreamWriter()
+        if hasattr(inputSVG, 'read'):
+            return cls.convertStream(inputSVG, writer, fileName)
+        svgTree = cls.tryConvert(inputSVG, True, os.path.basename(inputSVG), writer)
+        if svgTree is None:
+            return Svg2Vector.convert(inputSVG, writer)
+        return cls.createResult(svgTree, writer)
+
+    # A stream can't be read again, so the blocks read so far are kept for the fallback, which
+    # then gets them together with the rest of the blocks. Both come from the same iterator, as
+    # that holds the state of decompressing a gzip stream.
+    @classmethod
+    def convertStream(cls, stream, writer: Writer, fileName: str) -> ConversionResult:
+        blocks = StreamReader.readChunks(stream)
+        consumed = []
+        svgTree = cls.tryConvert(blocks, False, fileName, writer, consumed)
+        if svgTree is None:
+            consumed.extend(blocks)
+            data = ''.join(consumed) if consumed and isinstance(consumed[0], str) else b''.join(consumed)
+            return Svg2Vector.convertData(data, writer, fileName)
+        return cls.createResult(svgTree, writer)
+
+    # Same as Svg2Vector.convertData, but converts in a single pass when possible.
+    @classmethod
+    def convertData(cls, data, writer: Writer = None, fileName: str = '') -> ConversionResult:
+        if writer is None:
+            writer = OutputStreamWriter()
+        svgTree = cls.tryConvert(data, False, fileName, writer)
+        if svgTree is None:
+            return Svg2Vector.convertData(data, writer, fileName)
+        return cls.createResult(svgTree, writer)
+
+    @classmethod
+    def createResult(cls, svgTree: SvgTree, writer: Writer) -> ConversionResult:
+        xml = writer.toString() if isinstance(writer, OutputStreamWriter) else None
+        return ConversionResult.fromTree(svgTree, xml)
@@ -18,8 +18,9 @@ from __future__ import annotations
 from collections import deque
 import logging
 import re
-from xml.dom import minidom
+import time
 
+from ConversionResult import ConversionResult
 from OutputStreamWriter import OutputStreamWriter
 from PathBuilder import PathBuilder
 from SvgClipPathNode import SvgClipPathNode
@@ -28,6 +29,8 @@ from SvgGroupNode import SvgGroupNode
 from SvgLeafNode import SvgLeafNode
 from SvgNode import SvgNode
 from SvgTree import SvgTree
+from Writer import Writer
+from XmlElement import XmlDocument, XmlElement
 
 # Converts SVG to VectorDrawable's XML
 class Svg2Vector:
@@ -172,16 +175,39 @@ class Svg2Vector:
     def parse(cls, path: str) -> SvgTree:
         svgTree = SvgTree()
         parseErrors = []
-        doc = svgTree.parse(path, parseErrors)
+        return cls.parseDocument(svgTree, svgTree.parse(path, parseErrors), parseErrors)
+
+    # Same as parse, but reads the SVG content from a readable binary or text stream.
+    @classmethod
+    def parseStream(cls, stream, fileName: str = '') -> SvgTree:
+        svgTree = SvgTree()
+        parseErrors = []
+        return cls.parseDocument(svgTree, svgTree.parseStream(stream, fileName, parseErrors), parseErrors)
+
+    # Same as parse, but reads the SVG content from bytes or str held in memory.
+    @classmethod
+    def parseString(cls, data, fileName: str = '') -> SvgTree:
+        svgTree = SvgTree()
+        parseErrors = []
+        return cls.parseDocument(svgTree, svgTree.parseString(data, fileName, parseErrors), parseErrors)
+
+    # Builds the tree of SvgNodes from a parsed document. The caller shouldn't hold on to the
+    # document, so that it can be freed as soon as it has been traversed.
+    @classmethod
+    def parseDocument(cls, svgTree: SvgTree, doc: XmlDocument, parseErrors: list[str]) -> SvgTree:
+        start = time.perf_counter()
         for error in parseErrors:
             svgTree.logError(error, None)
+        # References into pruned content are ignored like those to unsupported elements.
+        for _id in doc.ignoredIds:
+            svgTree.addIgnoredId(_id)
 
         # Get <svg> elements.
         nSvgNode = doc.getElementsByTagName('svg')
         if len(nSvgNode) != 1:
             message = 'No <svg> tags found' if len(nSvgNode) == 0 else 'Multiple <svg> tags are not supported.'
             raise ValueError(message)
-        rootElement = nSvgNode.item(0)
+        rootElement = nSvgNode[0]
         svgTree.parseDimension(rootElement)
 
         if svgTree.viewBox is None:
@@ -193,6 +219,9 @@ class Svg2Vector:
 
         # Parse all the group and path node recursively.
         cls.traverseSvgAndExtract(svgTree, root, rootElement)
+        # The SvgNodes only keep snapshots of their elements, so drop the document before
+        # flattening; for big documents it is most of the memory.
+        doc = nSvgNode = rootElement = None
         cls.resolveUseNodes(svgTree)
         cls.resolveGradientReference(svgTree)
 
@@ -208,9 +237,12 @@ class Svg2Vector:
         for key, value in svgTree.getClipPathAffectedNodesSet().items():
             cls.handleClipPath(svgTree, key, value[0], value[1])
 
+        flattenStart = time.perf_counter()
+        svgTree.addPhaseTime(SvgTree.PHASE_EXTRACT, flattenStart - start)
         svgTree.flatten()
         svgTree.validate()
         svgTree.dump()
+        svgTree.addPhaseTime(SvgTree.PHASE_FLATTEN, time.perf_counter() - flattenStart)
 
         return svgTree
 
@@ -332,11 +364,9 @@ class Svg2Vector:
         return buf
 
     @classmethod
-    def traverseSvgAndExtract(cls, svgTree: SvgTree, currentGroup: SvgGroupNode, item:minidom.Element):
-        childNodes = item.childNodes
-
-        for idx, childNode in enumerate(childNodes):
-            if childNode.nodeType != minidom.Node.ELEMENT_NODE or not childNode.hasChildNodes() and not childNode.hasAttributes():
+    def traverseSvgAndExtract(cls, svgTree: SvgTree, currentGroup: SvgGroupNode, item: XmlElement):
+        for idx, childNode in enumerate(item.children):
+            if not childNode.hasChildNodes() and not childNode.attributes:
                 continue
 
             tagName = childNode.tagName
@@ -350,7 +380,7 @@ class Svg2Vector:
                 childGroup = SvgGroupNode(svgTree, childNode, f'child{idx}')
                 currentGroup.addChild(childGroup)
                 cls.processIdName(svgTree, childGroup)
-                cls.extractGroupNode(svgTree, childGroup, currentGroup)
+                cls.extractGroupNode(svgTree, childGroup, childNode, currentGroup)
                 cls.traverseSvgAndExtract(svgTree, childGroup, childNode)
             elif cls.SVG_USE == tagName:
                 childGroup = SvgGroupNode(svgTree, childNode, f'child{idx}')
@@ -369,13 +399,13 @@ class Svg2Vector:
             elif 'linearGradient' == tagName:
                 gradientNode = SvgGradientNode(svgTree, childNode, f'{tagName}{idx}')
                 cls.processIdName(svgTree, gradientNode)
-                cls.extractGradientNode(svgTree, gradientNode)
+                cls.extractGradientNode(svgTree, gradientNode, childNode)
                 gradientNode.fillPresentationAttributes('gradientType', 'linear')
                 svgTree.setHasGradient(True)
             elif 'radialGradient' == tagName:
                 gradientNode = SvgGradientNode(svgTree, childNode, f'{tagName}{idx}')
                 cls.processIdName(svgTree, gradientNode)
-                cls.extractGradientNode(svgTree, gradientNode)
+                cls.extractGradientNode(svgTree, gradientNode, childNode)
                 gradientNode.fillPresentationAttributes('gradientType', 'radial')
                 svgTree.setHasGradient(True)
             else:
@@ -393,35 +423,23 @@ class Svg2Vector:
     # Reads content from a gradient element's decumentNode and fills in attributes for the given
     # Svg gradient node.
     @classmethod
-    def extractGradientNode(cls, svg: SvgTree, gradientNode: SvgGradientNode):
-        element = gradientNode.getDocumentElement()
-        attrs = element.attributes
+    def extractGradientNode(cls, svg: SvgTree, gradientNode: SvgGradientNode, element: XmlElement):
         if element.getAttribute(cls.SVG_HREF) or element.getAttribute(cls.SVG_XLINK_HREF):
             svg.addToPendingGradientRefSet(gradientNode)
         
-        for i in range(attrs.length):
-            n = attrs.item(i)
-            name = n.nodeName
-            value = n.nodeValue
+        for name, value in element.attributes.items():
             if name in cls.gradientMap:
                 gradientNode.fillPresentationAttributes(name, value)
-        gradientChildren = element.childNodes
 
         # Default SVG gradient offset is the previous largets offset.
         greatestOffset = 0.0
-        for i in range(gradientChildren.length):
-            node = gradientChildren.item(i)
-            nodeName = node.nodeName
-            if nodeName == 'stop':
-                stopAttr = node.attributes
+        for node in element.children:
+            if node.tagName == 'stop':
                 # Default SVG gradient stop color is black.
                 color = 'rgb(0,0,0)'
                 # Default SVG gradient stop opacity is 1.
                 opacity = '1'
-                for k in range(stopAttr.length):
-                    stopItem = stopAttr.item(k)
-                    name = stopItem.nodeName
-                    value = stopItem.nodeValue
+                for name, value in node.attributes.items():
                     try:
                         if name == 'offset':
                             # If a gradient's value is not greater than all previous offset
@@ -467,12 +485,8 @@ class Svg2Vector:
     # Checks to see if the childGroup reference an clipPath or style elements. Saves the
     # reference in the svgTree to add the information to an SvgNode later.
     @classmethod
-    def extractGroupNode(cls, svgTree: SvgTree, childGroup:SvgGroupNode, currentGroup: SvgGroupNode):
-        a = childGroup.getDocumentElement().attributes
-        for j in range(a.length):
-            n = a.item(j)
-            name = n.nodeName
-            value = n.nodeValue
+    def extractGroupNode(cls, svgTree: SvgTree, childGroup:SvgGroupNode, element: XmlElement, currentGroup: SvgGroupNode):
+        for name, value in element.attributes.items():
             if name in [cls.SVG_CLIP_PATH, cls.SVG_MASK]:
                 if value:
                     svgTree.addClipPathAffectedNode(childGroup, currentGroup, value)
@@ -485,13 +499,9 @@ class Svg2Vector:
     # attribute. The style attribute will be filled into the tree after the svgTree calls
     # traverseSVGAndExtract().
     @classmethod
-    def extractStyleNode(cls, svgTree: SvgTree, currentNode: minidom.Node):
-        a = currentNode.childNodes
-        styleData = ''
-        for j in range(a.length):
-            n = a.item(j)
-            if n.nodeType == minidom.Node.CDATA_SECTION_NODE or a.length == 1:
-                styleData = n.nodeValue
+    def extractStyleNode(cls, svgTree: SvgTree, currentNode: XmlElement):
+        # Plain text and CDATA sections both end up in the element's text.
+        styleData = currentNode.text
         if styleData:
             # Separate each of the classes.
             classData = styleData.split('}')
@@ -557,13 +567,13 @@ class Svg2Vector:
     
     # Read the content from currentItem, and fill into the SvgLeafNode "child".
     @classmethod
-    def extractAllItemsAs(cls, svg: SvgTree, child: SvgLeafNode, currentItem: minidom.Node, currentGroup: SvgGroupNode):
+    def extractAllItemsAs(cls, svg: SvgTree, child: SvgLeafNode, currentItem: XmlElement, currentGroup: SvgGroupNode):
         parentNode = currentItem.parentNode
         hasNodeAttr = False
         styleContent = ''
         nothingToDisplay = False
 
-        while parentNode and parentNode.nodeName == 'g':
+        while parentNode and parentNode.tagName == 'g':
             # Parse the group's attributes.
             cls.logger.info('Printing current patent')
             cls.printlnCommon(parentNode)
@@ -597,238 +607,84 @@ class Svg2Vector:
         if hasNodeAttr and styleContent:
             cls.addStyleToPath(child, styleContent)
 
-        if cls.SVG_PATH == currentItem.nodeName:
+        if cls.SVG_PATH == currentItem.tagName:
             cls.extractPathItem(svg, child, currentItem, currentGroup)
         
-        if cls.SVG_RECT == currentItem.nodeName:
+        if cls.SVG_RECT == currentItem.tagName:
             cls.extractRectItem(svg, child, currentItem, currentGroup)
 
-        if cls.SVG_CIRCLE == currentItem.nodeName:
+        if cls.SVG_CIRCLE == currentItem.tagName:
             cls.extractCircleItem(svg, child, currentItem, currentGroup)
 
-        if currentItem.nodeName in {
+        if currentItem.tagName in {
             cls.SVG_POLYGON, cls.SVG_POLYLINE
         }:
             cls.extractPolyItem(svg, child, currentItem, currentGroup)
 
-        if cls.SVG_LINE == currentItem.nodeName:
+        if cls.SVG_LINE == currentItem.tagName:
             cls.extractLineItem(svg, child, currentItem, currentGroup)
 
-        if cls.SVG_ELLIPSE == currentItem.nodeName:
+        if cls.SVG_ELLIPSE == currentItem.tagName:
             cls.extractEllipseItem(svg, child, currentItem, currentGroup)
 
         # Add the type of node as a style class name for child.
-        svg.addAffectedNodeToStyleClass(currentItem.nodeName, child)
+        svg.addAffectedNodeToStyleClass(currentItem.tagName, child)
 
     @classmethod
-    def printlnCommon(cls, n: minidom.Node):
-        cls.logger.info(f'nodeName="{n.nodeName}"')
-
-        val = n.namespaceURI
-        if val:
-            cls.logger.info(f'uri="{val}"')
-            pass
-
-        val = n.prefix
-
-        if val:
-            cls.logger.info(f'pre="{val}"')
-            pass
-
-        val = n.localName
-        if val:
-            cls.logger.info(f'local="{val}"')
-            pass
-
-        val = n.nodeValue
-        if val:
-            cls.logger.info('nodeValue=')
-            if val.strip() == '':
-                # Whitespace
-                cls.logger.info('[WS]')
-                pass
-            else:
-                cls.logger.info(f'"{n.ndoeVlaue}"')
-                pass
-
+    def printlnCommon(cls, n: XmlElement):
+        cls.logger.info(f'nodeName="{n.tagName}"')
+        if n.text:
+            cls.logger.info(f'text="{n.text}"')
 
     # Convert polygon element into a path.
     @classmethod
-    def extractPolyItem(cls, svgTree: SvgTree, child: SvgLeafNode, currentGroupNode: minidom.Node, currentGroup: SvgGroupNode):
+    def extractPolyItem(cls, svgTree: SvgTree, child: SvgLeafNode, currentGroupNode: XmlElement, currentGroup: SvgGroupNode):
         cls.logger.info(f'Polyline or Polygon found{currentGroupNode}')
-        if currentGroupNode.nodeType == minidom.Node.ELEMENT_NODE:
-            attributes = currentGroupNode.attributes
-            for itemIndex in range(attributes.length):
-                n = attributes.item(itemIndex)
-                name = n.nodeName
-                value = n.nodeValue
-                try:
-                    if cls.SVG_STYLE == name:
-                        cls.addStyleToPath(child, value)
-                    elif name in cls.presentationMap:
-                        child.fillPresentationAttributes(name, value)
-                    elif name in [cls.SVG_CLIP_PATH, cls.SVG_MASK]:
-                        svgTree.addClipPathAffectedNode(child, currentGroup, value)
-                    elif name == cls.SVG_POINTS:
-                        builder = PathBuilder()
-                        splt = re.split(cls.SPACE_OR_COMMA, value)
-                        baseX = float(splt[0])
-                        baseY = float(splt[1])
-                        builder.absoluteMoveTo(baseX, baseY)
-                        for i in range(2, len(splt), 2):
-                            x = float(splt[i])
-                            y = float(splt[i + 1])
-                            builder.relativeLineTo(x - baseX, y - baseY)
-                            baseX = x
-                            baseY = y
-                        if currentGroupNode.nodeName == cls.SVG_POLYGON:
-                            builder.relativeClose()
-                        child.setPathData(builder.toString())
-                    elif name == 'class':
-                        svgTree.addAffectedNodeToStyleClass(f'.{value}', child)
-                        svgTree.addAffectedNodeToStyleClass(f'{currentGroupNode.nodeName}.{value}', child)
-                except Exception:
-                    svgTree.logError(f'Invalid value of "{name}" attribute', n)
-                
-    
-    # Convert rectangle element into a path
-    @classmethod
-    def extractRectItem(cls, svg: SvgTree, child: SvgLeafNode, currentGroupNode: minidom.Node, currentGroup: SvgGroupNode):
-        cls.logger.info(f'Rect found{currentGroupNode}')
-
-        if currentGroupNode.nodeType == minidom.Node.ELEMENT_NODE:
-            x = 0.0
-            y = 0.0
-            width = float('nan')
-            height = float('nan')
-            rx = 0.0
-            ry = 0.0
-
-            a = currentGroupNode.attributes
-            pureTransparent = False
-            for j in range(a.length):
-                n = a.item(j)
-                name = n.nodeName
-                value = n.nodeValue
-                try:
-                    if cls.SVG_STYLE == name:
-                        cls.addStyleToPath(child, value)
-                        if 'opacity:0;' in value:
-                            pureTransparent = True
-                    elif name in cls.presentationMap:
-                        child.fillPresentationAttributes(name, value)
-                    elif name in [cls.SVG_CLIP_PATH, cls.SVG_MASK]:
-                        svg.addClipPathAffectedNode(child, currentGroup, value)
-                    elif 'x' == name:
-                        x = svg.parseXValue(value)
-                    elif 'y' == name:
-                        y = svg.parseYValue(value)
-                    elif 'rx' == name:
-                        rx = svg.parseXValue(value)
-                    elif 'ry' == name:
-                        ry = svg.parseYValue(value)
-                    elif 'width' == name:
-                        width = svg.parseXValue(value)
-                    elif 'height' == name:
-                        height = svg.parseYValue(value)
-                    elif 'class' == name:
-                        svg.addAffectedNodeToStyleClass(f'rect.{value}', child)
-                        svg.addAffectedNodeToStyleClass(f'.{value}', child)
-                except Exception:
-                    svg.logError(f'Invalid attribute value: {name}="{value}"', currentGroupNode)
-            
-            if not pureTransparent and x != float('nan') and y != float('nan') and width != float('nan') and height != float('nan'):
-                builder = PathBuilder()
-                if rx <= 0 and ry <= 0:
-                    # "M x, y h width v height h -width z"
-                    builder.absoluteMoveTo(x, y)
-                    builder.relativeHorizontalTo(width)
-                    builder.relativeVerticalTo(height)
-                    builder.relativeHorizontalTo(-width)
-                else:
-                    # Refer to http://www.w3.org/TR/SVG/shapes.html#RectElement
-                    assert rx > 0 or ry > 0
-                    if ry == 0:
-                        ry = rx
-                    elif rx == 0:
-                        rx = ry
-                    if width / 2 < rx:
-                        rx = width / 2
-                    if height / 2 < ry:
-                        ry = height / 2
-                    
-                    builder.absoluteMoveTo(x + rx, y)
-                    builder.absoluteLineTo(x + width - rx, y)
-                    builder.absoluteArcTo(rx, ry, False, False, True, x + width, y + ry)
-                    builder.absoluteLineTo(x + width, y + height - ry)
-                    builder.absoluteArcTo(rx, ry, False, False, True, x + width - rx, y + height)
-                    builder.absoluteLineTo(x + rx,  y + height)
-                    builder.absoluteArcTo(rx, ry, False, False, True, x, y + height - ry)
-                    builder.absoluteLineTo(x,  y + ry)
-                    builder.absoluteArcTo(rx, ry, False, False, True, x + rx, y)
-
-                builder.relativeClose()
-                child.setPathData(builder.toString())
-
-    # Convert circle element into a path.
-    @classmethod
-    def extractCircleItem(cls, svg: SvgTree, child: SvgLeafNode, currentGroupNode: minidom.Node, currentGroup: SvgGroupNode):
-        cls.logger.info(f'circle found{currentGroupNode}')
-        if currentGroupNode.nodeType == minidom.Node.ELEMENT_NODE:
-            cx = 0
-            cy = 0
-            radius = 0
-
-            pureTransparent = False
-            a = currentGroupNode.attributes
-            for i in range(a.length):
-                n = a.item(i)
-                name = n.nodeName
-                value = n.nodeValue
+        for name, value in currentGroupNode.attributes.items():
+            try:
                 if cls.SVG_STYLE == name:
                     cls.addStyleToPath(child, value)
-                    if 'opacity:0;' in value:
-                        pureTransparent = True
                 elif name in cls.presentationMap:
                     child.fillPresentationAttributes(name, value)
                 elif name in [cls.SVG_CLIP_PATH, cls.SVG_MASK]:
-                    svg.addClipPathAffectedNode(child, currentGroup, value)
-                elif 'cx' == name:
-                    cx = float(value)
-                elif 'cy' == name:
-                    cy = float(value)
-                elif 'r' == name:
-                    radius = float(value)
-                elif 'class' == name:
-                    svg.addAffectedNodeToStyleClass(f'circle.{value}', child)
-                    svg.addAffectedNodeToStyleClass(f'.{value}', child)
-
-                if not pureTransparent and cx != float('nan') and cy != float('nan'):
-                    # "M cx cy m -r, 0 a r,r 0 1,1 (r * 2)0 a r,r 0 1,1 -(r * 2),0"
+                    svgTree.addClipPathAffectedNode(child, currentGroup, value)
+                elif name == cls.SVG_POINTS:
                     builder = PathBuilder()
-                    builder.absoluteMoveTo(cx, cy)
-                    builder.relativeMoveTo(-radius, 0)
-                    builder.relativeArcTo(radius, radius, False, True, True, 2 * radius, 0)
-                    builder.relativeArcTo(radius, radius, False, True, True, -2 * radius, 0)
-                    child.setPathData(builder.toString())
+                    splt = re.split(cls.SPACE_OR_COMMA, value)
+                    baseX = float(splt[0])
+                    baseY = float(splt[1])
+                    builder.absoluteMoveTo(baseX, baseY)
+                    for i in range(2, len(splt), 2):
+                        x = float(splt[i])
+                        y = float(splt[i + 1])
+                        builder.relativeLineTo(x - baseX, y - baseY)
+                        baseX = x
+                        baseY = y
+                    if currentGroupNode.tagName == cls.SVG_POLYGON:
+                        builder.relativeClose()
+                    child.setPathNodes(builder.toNodes())
+                elif name == 'class':
+                    svgTree.addAffectedNodeToStyleClass(f'.{value}', child)
+                    svgTree.addAffectedNodeToStyleClass(f'{currentGroupNode.tagName}.{value}', child)
+            except Exception:
+                svgTree.logError(f'Invalid value of "{name}" attribute', currentGroupNode)
+                
     
-    # Convert ellipse element into a path
+    # Convert rectangle element into a path
     @classmethod
-    def extractEllipseItem(cls, svg: SvgTree, child: SvgLeafNode, currentGroupNode: minidom.Node, currentGroup: SvgGroupNode):
-        cls.logger.info(f'ellipse found{currentGroupNode}')
+    def extractRectItem(cls, svg: SvgTree, child: SvgLeafNode, currentGroupNode: XmlElement, currentGroup: SvgGroupNode):
+        cls.logger.info(f'Rect found{currentGroupNode}')
 
-        if currentGroupNode.nodeType == minidom.Node.ELEMENT_NODE:
-            cx = 0.0
-            cy = 0.0
-            rx = 0.0
-            ry = 0.0
-
-            a = currentGroupNode.attributes
-            pureTransparent = False
-            for j in range(a.length):
-                n = a.item(j)
-                name = n.nodeName
-                value = n.nodeValue
+        x = 0.0
+        y = 0.0
+        width = float('nan')
+        height = float('nan')
+        rx = 0.0
+        ry = 0.0
+
+        pureTransparent = False
+        for name, value in currentGroupNode.attributes.items():
+            try:
                 if cls.SVG_STYLE == name:
                     cls.addStyleToPath(child, value)
                     if 'opacity:0;' in value:
@@ -837,93 +693,191 @@ class Svg2Vector:
                     child.fillPresentationAttributes(name, value)
                 elif name in [cls.SVG_CLIP_PATH, cls.SVG_MASK]:
                     svg.addClipPathAffectedNode(child, currentGroup, value)
-                elif 'cx' == name:
-                    cx = float(value)
-                elif 'cy' == name:
-                    cy = float(value)
+                elif 'x' == name:
+                    x = svg.parseXValue(value)
+                elif 'y' == name:
+                    y = svg.parseYValue(value)
                 elif 'rx' == name:
-                    rx = float(value)
+                    rx = svg.parseXValue(value)
                 elif 'ry' == name:
-                    ry = float(value)
+                    ry = svg.parseYValue(value)
+                elif 'width' == name:
+                    width = svg.parseXValue(value)
+                elif 'height' == name:
+                    height = svg.parseYValue(value)
                 elif 'class' == name:
-                    svg.addAffectedNodeToStyleClass(f'ellipse.{value}', child)
+                    svg.addAffectedNodeToStyleClass(f'rect.{value}', child)
                     svg.addAffectedNodeToStyleClass(f'.{value}', child)
+            except Exception:
+                svg.logError(f'Invalid attribute value: {name}="{value}"', currentGroupNode)
+            
+        if not pureTransparent and x != float('nan') and y != float('nan') and width != float('nan') and height != float('nan'):
+            builder = PathBuilder()
+            if rx <= 0 and ry <= 0:
+                # "M x, y h width v height h -width z"
+                builder.absoluteMoveTo(x, y)
+                builder.relativeHorizontalTo(width)
+                builder.relativeVerticalTo(height)
+                builder.relativeHorizontalTo(-width)
+            else:
+                # Refer to http://www.w3.org/TR/SVG/shapes.html#RectElement
+                assert rx > 0 or ry > 0
+                if ry == 0:
+                    ry = rx
+                elif rx == 0:
+                    rx = ry
+                if width / 2 < rx:
+                    rx = width / 2
+                if height / 2 < ry:
+                    ry = height / 2
+                    
+                builder.absoluteMoveTo(x + rx, y)
+                builder.absoluteLineTo(x + width - rx, y)
+                builder.absoluteArcTo(rx, ry, False, False, True, x + width, y + ry)
+                builder.absoluteLineTo(x + width, y + height - ry)
+                builder.absoluteArcTo(rx, ry, False, False, True, x + width - rx, y + height)
+                builder.absoluteLineTo(x + rx,  y + height)
+                builder.absoluteArcTo(rx, ry, False, False, True, x, y + height - ry)
+                builder.absoluteLineTo(x,  y + ry)
+                builder.absoluteArcTo(rx, ry, False, False, True, x + rx, y)
+
+            builder.relativeClose()
+            child.setPathNodes(builder.toNodes())
 
-            if not pureTransparent and cx != float('nan') and cy != float('nan') and 0 < rx and 0 < ry:
-                # "M cx -rx, cy a rx,ry 0 1,0 (rx * 2),0 a rx,ry 0 1,0 -(rx * 2),0"
+    # Convert circle element into a path.
+    @classmethod
+    def extractCircleItem(cls, svg: SvgTree, child: SvgLeafNode, currentGroupNode: XmlElement, currentGroup: SvgGroupNode):
+        cls.logger.info(f'circle found{currentGroupNode}')
+        cx = 0
+        cy = 0
+        radius = 0
+
+        pureTransparent = False
+        for name, value in currentGroupNode.attributes.items():
+            if cls.SVG_STYLE == name:
+                cls.addStyleToPath(child, value)
+                if 'opacity:0;' in value:
+                    pureTransparent = True
+            elif name in cls.presentationMap:
+                child.fillPresentationAttributes(name, value)
+            elif name in [cls.SVG_CLIP_PATH, cls.SVG_MASK]:
+                svg.addClipPathAffectedNode(child, currentGroup, value)
+            elif 'cx' == name:
+                cx = float(value)
+            elif 'cy' == name:
+                cy = float(value)
+            elif 'r' == name:
+                radius = float(value)
+            elif 'class' == name:
+                svg.addAffectedNodeToStyleClass(f'circle.{value}', child)
+                svg.addAffectedNodeToStyleClass(f'.{value}', child)
+
+            if not pureTransparent and cx != float('nan') and cy != float('nan'):
+                # "M cx cy m -r, 0 a r,r 0 1,1 (r * 2)0 a r,r 0 1,1 -(r * 2),0"
                 builder = PathBuilder()
-                builder.absoluteMoveTo(cx - rx, cy)
-                builder.relativeArcTo(rx, ry, False, True, False, 2 * rx, 0)
-                builder.relativeArcTo(rx, ry, False, True, False, -2 * rx, 0)
-                builder.relativeClose()
-                child.setPathData(builder.toString())
+                builder.absoluteMoveTo(cx, cy)
+                builder.relativeMoveTo(-radius, 0)
+                builder.relativeArcTo(radius, radius, False, True, True, 2 * radius, 0)
+                builder.relativeArcTo(radius, radius, False, True, True, -2 * radius, 0)
+                child.setPathNodes(builder.toNodes())
+    
+    # Convert ellipse element into a path
+    @classmethod
+    def extractEllipseItem(cls, svg: SvgTree, child: SvgLeafNode, currentGroupNode: XmlElement, currentGroup: SvgGroupNode):
+        cls.logger.info(f'ellipse found{currentGroupNode}')
+
+        cx = 0.0
+        cy = 0.0
+        rx = 0.0
+        ry = 0.0
+
+        pureTransparent = False
+        for name, value in currentGroupNode.attributes.items():
+            if cls.SVG_STYLE == name:
+                cls.addStyleToPath(child, value)
+                if 'opacity:0;' in value:
+                    pureTransparent = True
+            elif name in cls.presentationMap:
+                child.fillPresentationAttributes(name, value)
+            elif name in [cls.SVG_CLIP_PATH, cls.SVG_MASK]:
+                svg.addClipPathAffectedNode(child, currentGroup, value)
+            elif 'cx' == name:
+                cx = float(value)
+            elif 'cy' == name:
+                cy = float(value)
+            elif 'rx' == name:
+                rx = float(value)
+            elif 'ry' == name:
+                ry = float(value)
+            elif 'class' == name:
+                svg.addAffectedNodeToStyleClass(f'ellipse.{value}', child)
+                svg.addAffectedNodeToStyleClass(f'.{value}', child)
+
+        if not pureTransparent and cx != float('nan') and cy != float('nan') and 0 < rx and 0 < ry:
+            # "M cx -rx, cy a rx,ry 0 1,0 (rx * 2),0 a rx,ry 0 1,0 -(rx * 2),0"
+            builder = PathBuilder()
+            builder.absoluteMoveTo(cx - rx, cy)
+            builder.relativeArcTo(rx, ry, False, True, False, 2 * rx, 0)
+            builder.relativeArcTo(rx, ry, False, True, False, -2 * rx, 0)
+            builder.relativeClose()
+            child.setPathNodes(builder.toNodes())
 
     # Convert line element into a path
     @classmethod
-    def extractLineItem(cls, svg: SvgTree, child: SvgLeafNode, currentGroupNode: minidom.Node, currentGroup: SvgGroupNode):
+    def extractLineItem(cls, svg: SvgTree, child: SvgLeafNode, currentGroupNode: XmlElement, currentGroup: SvgGroupNode):
         cls.logger.info(f'line found{currentGroupNode}')
 
-        if currentGroupNode.nodeType == minidom.Node.ELEMENT_NODE:
-            x1 = 0.0
-            y1 = 0.0
-            x2 = 0.0
-            y2 = 0.0
-
-            a = currentGroupNode.attributes
-            pureTransparent = False
-            for j in range(a.length):
-                n = a.item(j)
-                name = n.nodeName
-                value = n.nodeValue
-                if cls.SVG_STYLE == name:
-                    cls.addStyleToPath(child, value)
-                    if 'opacity:0;' in value:
-                        pureTransparent = True
-                elif name in cls.presentationMap:
-                    child.fillPresentationAttributes(name, value)
-                elif name in [cls.SVG_CLIP_PATH, cls.SVG_MASK]:
-                    svg.addClipPathAffectedNode(child, currentGroup, value)
-                elif 'x1' == name:
-                    x1 = float(value)
-                elif 'y1' == name:
-                    y1 = float(value)
-                elif 'x2' == name:
-                    x2 = float(value)
-                elif 'y2' == name:
-                    y2 = float(value)
-                elif 'class' == name:
-                    svg.addAffectedNodeToStyleClass(f'line.{value}', child)
-                    svg.addAffectedNodeToStyleClass(f'.{value}', child)
-
-            if pureTransparent is False and svg and x1 != float('nan') and y1 != float('nan') and x2 != float('nan') and y2 != float('nan'):
-                # "M x1, y1 L x2, y2"
-                builder = PathBuilder()
-                builder.absoluteMoveTo(x1, y1)
-                builder.absoluteLineTo(x2, y2)
-                child.setPathData(builder.toString())
+        x1 = 0.0
+        y1 = 0.0
+        x2 = 0.0
+        y2 = 0.0
+
+        pureTransparent = False
+        for name, value in currentGroupNode.attributes.items():
+            if cls.SVG_STYLE == name:
+                cls.addStyleToPath(child, value)
+                if 'opacity:0;' in value:
+                    pureTransparent = True
+            elif name in cls.presentationMap:
+                child.fillPresentationAttributes(name, value)
+            elif name in [cls.SVG_CLIP_PATH, cls.SVG_MASK]:
+                svg.addClipPathAffectedNode(child, currentGroup, value)
+            elif 'x1' == name:
+                x1 = float(value)
+            elif 'y1' == name:
+                y1 = float(value)
+            elif 'x2' == name:
+                x2 = float(value)
+            elif 'y2' == name:
+                y2 = float(value)
+            elif 'class' == name:
+                svg.addAffectedNodeToStyleClass(f'line.{value}', child)
+                svg.addAffectedNodeToStyleClass(f'.{value}', child)
+
+        if pureTransparent is False and svg and x1 != float('nan') and y1 != float('nan') and x2 != float('nan') and y2 != float('nan'):
+            # "M x1, y1 L x2, y2"
+            builder = PathBuilder()
+            builder.absoluteMoveTo(x1, y1)
+            builder.absoluteLineTo(x2, y2)
+            child.setPathNodes(builder.toNodes())
 
     @classmethod
-    def extractPathItem(cls, svg: SvgTree, child: SvgLeafNode, currentGroupNode: minidom.Node, currentGroup: SvgGroupNode):
+    def extractPathItem(cls, svg: SvgTree, child: SvgLeafNode, currentGroupNode: XmlElement, currentGroup: SvgGroupNode):
         cls.logger.info(f'Path found{currentGroupNode}')
 
-        if currentGroupNode.nodeType == minidom.Node.ELEMENT_NODE:
-            a = currentGroupNode.attributes
-            for i in range(a.length):
-                n = a.item(i)
-                name = n.nodeName
-                value = n.nodeValue
-                if cls.SVG_STYLE == name:
-                    cls.addStyleToPath(child, value)
-                elif name in cls.presentationMap:
-                    child.fillPresentationAttributes(name, value)
-                elif name in [cls.SVG_CLIP_PATH, cls.SVG_MASK]:
-                    svg.addClipPathAffectedNode(child, currentGroup, value)
-                elif cls.SVG_D == name:
-                    pathData = re.sub(r'(\d)-', r'\1,-', value)
-                    child.setPathData(pathData)
-                elif 'class' == name:
-                    svg.addAffectedNodeToStyleClass(f'path.{value}', child)
-                    svg.addAffectedNodeToStyleClass(f'.{value}', child)
+        for name, value in currentGroupNode.attributes.items():
+            if cls.SVG_STYLE == name:
+                cls.addStyleToPath(child, value)
+            elif name in cls.presentationMap:
+                child.fillPresentationAttributes(name, value)
+            elif name in [cls.SVG_CLIP_PATH, cls.SVG_MASK]:
+                svg.addClipPathAffectedNode(child, currentGroup, value)
+            elif cls.SVG_D == name:
+                pathData = re.sub(r'(\d)-', r'\1,-', value)
+                child.setPathData(pathData)
+            elif 'class' == name:
+                svg.addAffectedNodeToStyleClass(f'path.{value}', child)
+                svg.addAffectedNodeToStyleClass(f'.{value}', child)
 
     @classmethod
     def addStyleToPath(cls, path: SvgNode, value: str):
@@ -951,7 +905,7 @@ class Svg2Vector:
     # def getSizeString(cls. w, h, scaleFactor):
     #     return f'        android:width="{int(w * scaleFactor)}dp"\n        android:height="{int(h * scaleFactor)}dp"\n'
     @classmethod
-    def writeFile(cls, OutputStreamWriter: OutputStreamWriter, svgTree: SvgTree):
+    def writeFile(cls, OutputStreamWriter: Writer, svgTree: SvgTree):
         svgTree.writeXml(OutputStreamWriter)
 
     # Converts an SVG file into VectorDrawable's XML content, if no error is found.
@@ -961,8 +915,85 @@ class Svg2Vector:
     # @return the error message that combines all logged errors and warnings, or an empty string if
     #     there were no errors
     @classmethod
-    def parseSvgToXml(cls, inputSVG: str, OutputStreamWriter: OutputStreamWriter) -> str:
+    def parseSvgToXml(cls, inputSVG: str, OutputStreamWriter: Writer) -> str:
         svgTree = cls.parse(inputSVG)
+        return cls.writeTree(svgTree, OutputStreamWriter)
+
+    # Same as parseSvgToXml, but reads the SVG content from a readable binary or text stream.
+    @classmethod
+    def parseStreamToXml(cls, stream, OutputStreamWriter: Writer, fileName: str = '') -> str:
+        svgTree = cls.parseStream(stream, fileName)
+        return cls.writeTree(svgTree, OutputStreamWriter)
+
+    # Same as parseSvgToXml, but reads the SVG content from bytes or str held in memory.
+    @classmethod
+    def parseStringToXml(cls, data, OutputStreamWriter: Writer, fileName: str = '') -> str:
+        svgTree = cls.parseString(data, fileName)
+        return cls.writeTree(svgTree, OutputStreamWriter)
+
+    @classmethod
+    def writeTree(cls, svgTree: SvgTree, OutputStreamWriter: Writer) -> str:
         if svgTree.getHasLeafNode():
+            start = time.perf_counter()
             cls.writeFile(OutputStreamWriter, svgTree)
-        return svgTree.getErrorMessage()
\ No newline at end of file
+            svgTree.addPhaseTime(SvgTree.PHASE_WRITE, time.perf_counter() - start)
+        return svgTree.getErrorMessage()
+
+    # Converts an SVG file into VectorDrawable's XML content and describes the outcome.
+    # @param inputSVG the input SVG file, or a readable binary or text stream such as a pipe, an
+    #     HTTP request body or a tar member, which is parsed in blocks as it is read
+    # @param writer receives the converted content; when omitted, the content is collected in
+    #     memory and available from the result
+    # @param fileName the name used in log messages when reading from a stream
+    # @return the result carrying the XML (if written to memory), the logged messages, the
+    #     size and viewport of the drawable and the time spent in each phase
+    @classmethod
+    def convert(cls, inputSVG, writer: Writer = None, fileName: str = '') -> ConversionResult:
+        if hasattr(inputSVG, 'read'):
+            return cls.convertTree(cls.parseStream(inputSVG, fileName), writer)
+        return cls.convertTree(cls.parse(inputSVG), writer)
+
+    # Same as convert, but reads the SVG content from bytes or str held in memory.
+    @classmethod
+    def convertData(cls, data, writer: Writer = None, fileName: str = '') -> ConversionResult:
+        return cls.convertTree(cls.parseString(data, fileName), writer)
+
+    @classmethod
+    def convertTree(cls, svgTree: SvgTree, writer: Writer) -> ConversionResult:
+        if writer is None:
+            writer = OutputStreamWriter()
+        cls.writeTree(svgTree, writer)
+        xml = writer.toString() if isinstance(writer, OutputStreamWriter) else None
+        return ConversionResult.fromTree(svgTree, xml)
+
+    # Converts SVG content held in memory into VectorDrawable's XML content without touching the
+    # file system.
+    # @param data the SVG document
+    # @param errors if given, receives the combined error message when there is one
+    # @return the converted VectorDrawable's content. This can be empty if there is any error
+    #     found during parsing
+    @classmethod
+    def convertBytes(cls, data: bytes, errors: list[str] = None) -> str:
+        writer = OutputStreamWriter()
+        cls.collectErrors(cls.parseStringToXml(data, writer), errors)
+        return writer.toString()
+
+    # Same as convertBytes, for SVG content given as str.
+    @classmethod
+    def convertString(cls, data: str, errors: list[str] = None) -> str:
+        writer = OutputStreamWriter()
+        cls.collectErrors(cls.parseStringToXml(data, writer), errors)
+        return writer.toString()
+
+    # Same as convertBytes, for SVG content read from a binary or text stream such as an
+    # uploaded file.
+    @classmethod
+    def convertStream(cls, stream, errors: list[str] = None) -> str:
+        writer = OutputStreamWriter()
+        cls.collectErrors(cls.parseStreamToXml(stream, writer), errors)
+        return writer.toString()
+
+    @classmethod
+    def collectErrors(cls, errorLog: str, errors: list[str]):
+        if errorLog and errors is not None:
+            errors.append(errorLog)
\ No newline at end of file
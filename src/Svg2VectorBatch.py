@@ -0,0 +1,250 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import hashlib
+import logging
+import os
+from typing import Iterator
+
+from AtomicFileWriter import AtomicFileWriter
+from BuildManifest import BuildManifest
+from ConversionCache import ConversionCache
+from ConversionResult import ConversionResult
+from StreamingConverter import StreamingConverter
+from Svg2Vector import Svg2Vector
+
+# Converts many SVG files in one go. The files are fanned out across a pool of worker processes
+# in chunks, so that a pack of icons is converted with all available cores.
+class Svg2VectorBatch:
+    logger = logging.getLogger('Svg2Vector')
+
+    SVG_EXTENSION = '.svg'
+    SVGZ_EXTENSION = '.svgz'
+    XML_EXTENSION = '.xml'
+    # Upper bound of files handed to a worker at a time. Smaller chunks balance the load better,
+    # bigger chunks cost less inter-process communication.
+    MAX_CHUNK_SIZE = 64
+
+    # One unit of work handed to a worker process.
+    # @param cacheDir directory of the ConversionCache to use, or None to always convert
+    # @param streaming whether to convert with StreamingConverter where the document allows it
+    class Job:
+        def __init__(self, inputPath: str, outputPath: str, cacheDir: str = None, cacheMaxBytes: int = ConversionCache.DEFAULT_MAX_BYTES,
+                     streaming: bool = False):
+            self.inputPath = inputPath
+            self.outputPath = outputPath
+            self.cacheDir = cacheDir
+            self.cacheMaxBytes = cacheMaxBytes
+            self.streaming = streaming
+
+    # Outcome of converting one file.
+    # @param inputPath the converted SVG file
+    # @param outputPath the written VectorDrawable file, or None if nothing was written
+    # @param errorMessage the combined errors and warnings, or an empty string
+    # @param result the converter's result, or None if the conversion raised or was skipped
+    # @param inputHash the SHA-256 digest of the input, or None if it couldn't be read
+    # @param outputHash the SHA-256 digest of the written output, or None if nothing was written
+    # @param upToDate whether the conversion was skipped because the output was up to date
+    class FileResult:
+        def __init__(self, inputPath: str, outputPath: str, errorMessage: str, result: ConversionResult = None,
+                     inputHash: str = None, outputHash: str = None, upToDate: bool = False):
+            self.inputPath = inputPath
+            self.outputPath = outputPath
+            self.errorMessage = errorMessage
+            self.result = result
+            self.inputHash = inputHash
+            self.outputHash = outputHash
+            self.upToDate = upToDate
+
+        def hasOutput(self) -> bool:
+            return self.outputPath is not None
+
+        def hasErrors(self) -> bool:
+            return self.result is None or self.result.hasErrors()
+
+    # Returns the SVG files matched by the given inputs together with the directory that output
+    # paths are mirrored from. An input can be a directory, which is searched recursively, a
+    # single file or a glob pattern.
+    # @param missing receives the inputs that don't exist or match no file, if given
+    @classmethod
+    def collectInputs(cls, inputs: list[str], missing: list[str] = None) -> list[tuple[str, str]]:
+        result = []
+        for item in inputs:
+            if os.path.isdir(item):
+                for dirPath, dirNames, fileNames in os.walk(item):
+                    dirNames.sort()
+                    for fileName in sorted(fileNames):
+                        if cls.isSvgFile(fileName):
+                            result.append((os.path.join(dirPath, fileName), item))
+            elif os.path.isfile(item):
+                result.append((item, os.path.dirname(item)))
+            else:
+                matches = sorted(p for p in glob.glob(item, recursive=True) if os.path.isfile(p))
+                if matches:
+                    base = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in matches])
+                    result.extend((p, base) for p in matches)
+                elif missing is not None:
+                    missing.append(item)
+        return result
+
+    # Returns a failed result for an input that doesn't exist or matches no file.
+    @classmethod
+    def missingInput(cls, inputPath: str) -> FileResult:
+        return cls.FileResult(inputPath, None, f'No such file or directory, or no file matches: {inputPath}')
+
+    # Returns the SVG files matched by the given inputs together with their output paths, see
+    # collectInputs and getOutputPath. A file whose output is already written for an earlier one,
+    # e.g. icon.svgz next to icon.svg, is left out.
+    # @param failed receives a failed FileResult for every left out file and for every input that
+    #     doesn't exist or matches no file
+    @classmethod
+    def collectOutputs(cls, inputs: list[str], outputDir: str, failed: list[FileResult]) -> list[tuple[str, str]]:
+        missing = []
+        result = []
+        # Input of each output path, both absolute.
+        owners = dict()
+        for path, base in cls.collectInputs(inputs, missing):
+            outputPath = cls.getOutputPath(path, base, outputDir)
+            owner = owners.setdefault(os.path.abspath(outputPath), os.path.abspath(path))
+            if owner == os.path.abspath(path):
+                result.append((path, outputPath))
+            else:
+                failed.append(cls.FileResult(path, None, f'{outputPath} is already written for {owner}'))
+        failed.extend(cls.missingInput(path) for path in missing)
+        return result
+
+    @classmethod
+    def isSvgFile(cls, fileName: str) -> bool:
+        return fileName.lower().endswith((cls.SVG_EXTENSION, cls.SVGZ_EXTENSION))
+
+    # Returns where the VectorDrawable for inputPath is written. Without an output directory
+    # the file is placed next to its source, otherwise the layout below baseDir is mirrored.
+    @classmethod
+    def getOutputPath(cls, inputPath: str, baseDir: str, outputDir: str) -> str:
+        stem = os.path.splitext(inputPath)[0]
+        if outputDir is None:
+            return stem + cls.XML_EXTENSION
+        if baseDir and stem.startswith(baseDir + os.sep):
+            # Found by walking baseDir, so there is no need to normalize anything.
+            return os.path.join(outputDir, stem[len(baseDir) + 1:] + cls.XML_EXTENSION)
+        relative = os.path.relpath(os.path.abspath(stem), os.path.abspath(baseDir) if baseDir else os.getcwd())
+        return os.path.join(outputDir, relative + cls.XML_EXTENSION)
+
+    # Converts a single file. Runs inside a worker process, so it must never raise.
+    @classmethod
+    def convertFile(cls, job: Job) -> FileResult:
+        try:
+            with open(job.inputPath, 'rb') as file:
+                data = file.read()
+            inputHash = hashlib.sha256(data).hexdigest()
+            result = cls.convertData(job, data, os.path.basename(job.inputPath))
+            # The XML is written here, so don't ship it back to the parent process.
+            content = result.xml
+            result.xml = None
+            if not content:
+                return cls.FileResult(job.inputPath, None, result.getErrorMessage(), result, inputHash)
+            data = content.encode('utf-8')
+            AtomicFileWriter.update(job.outputPath, data)
+            outputHash = hashlib.sha256(data).hexdigest()
+            return cls.FileResult(job.inputPath, job.outputPath, result.getErrorMessage(), result, inputHash, outputHash)
+        except Exception as e:
+            return cls.FileResult(job.inputPath, None, f'EXCEPTION in parsing {os.path.basename(job.inputPath)}:\n{e}')
+
+    # Converts SVG content held in memory with the options of the job, i.e. its cacheDir,
+    # cacheMaxBytes and streaming.
+    @classmethod
+    def convertData(cls, job, data, fileName: str) -> ConversionResult:
+        if job.cacheDir:
+            return ConversionCache.getInstance(job.cacheDir, job.cacheMaxBytes).convertData(data, fileName)
+        if job.streaming:
+            return StreamingConverter.convertData(data, fileName=fileName)
+        return Svg2Vector.convertData(data, fileName=fileName)
+
+    # Returns the time spent in each conversion phase summed over all results, in seconds.
+    @classmethod
+    def getPhaseTimes(cls, results: list[FileResult]) -> dict:
+        total = dict()
+        for fileResult in results:
+            if fileResult.result is not None:
+                for phase, seconds in fileResult.result.getPhaseTimes().items():
+                    total[phase] = total.get(phase, 0.0) + seconds
+        return total
+
+    # Converts every SVG file matched by inputs.
+    # @param inputs directories, files or glob patterns
+    # @param outputDir root of the mirrored output tree, or None to write next to the sources
+    # @param maxWorkers number of worker processes, defaults to the number of CPUs
+    # @param chunkSize number of files dispatched to a worker at a time, or None to derive it
+    #     from the number of files and workers
+    # @param cacheDir directory of a ConversionCache that unchanged files are answered from
+    # @param cacheMaxBytes size bound of the cache
+    # @param manifestPath BuildManifest file of an incremental rebuild, or None to convert all
+    #     inputs
+    # @param streaming whether to convert in a single pass where the document allows it
+    # @return a FileResult per input file, in input order, followed by the failed FileResults of
+    #     collectOutputs
+    @classmethod
+    def convert(cls, inputs: list[str], outputDir: str = None, maxWorkers: int = None, chunkSize: int = None,
+                cacheDir: str = None, cacheMaxBytes: int = ConversionCache.DEFAULT_MAX_BYTES,
+                manifestPath: str = None, streaming: bool = False) -> list[FileResult]:
+        failed = []
+        jobs = [cls.Job(path, outputPath, cacheDir, cacheMaxBytes, streaming) for path, outputPath in cls.collectOutputs(inputs, outputDir, failed)]
+        if manifestPath:
+            results = cls.runIncremental(jobs, BuildManifest(manifestPath), maxWorkers, chunkSize)
+        else:
+            results = cls.runJobs(jobs, maxWorkers, chunkSize)
+        if cacheDir:
+            # Workers only see their own additions, so enforce the size bound once at the end.
+            ConversionCache.getInstance(cacheDir, cacheMaxBytes).trim()
+        results.extend(failed)
+        return results
+
+    # Converts only the jobs whose input or output changed since the manifest was written, and
+    # deletes the outputs of inputs that are gone.
+    @classmethod
+    def runIncremental(cls, jobs: list[Job], manifest: BuildManifest, maxWorkers: int = None, chunkSize: int = None) -> list[FileResult]:
+        results = [None] * len(jobs)
+        pending = []
+        inputPaths = [BuildManifest.normalizePath(job.inputPath) for job in jobs]
+        for i, job in enumerate(jobs):
+            stat = os.stat(job.inputPath)
+            outputPath = BuildManifest.normalizePath(job.outputPath)
+            entry = manifest.getUpToDateEntry(inputPaths[i], outputPath, stat)
+            if entry is None:
+                pending.append((i, stat, outputPath))
+            else:
+                results[i] = cls.FileResult(job.inputPath, entry.output and job.outputPath, entry.errors,
+                                            inputHash=entry.hash, outputHash=entry.outputHash, upToDate=True)
+        converted = cls.runJobs([jobs[i] for i, stat, outputPath in pending], maxWorkers, chunkSize)
+        for (i, stat, outputPath), result in zip(pending, converted):
+            results[i] = result
+            if result.inputHash is not None:
+                manifest.update(inputPaths[i], stat, result.inputHash, result.outputPath and outputPath, result.outputHash, result.errorMessage)
+        for output in manifest.removeStale(set(inputPaths)):
+            cls.logger.info(f'Deleted {output}, whose source is gone')
+        manifest.save()
+        return results
+
+    @classmethod
+    def runJobs(cls, jobs: list[Job], maxWorkers: int = None, chunkSize: int = None) -> list[FileResult]:
+        if not jobs:
+            return []
+        if maxWorkers == 1 or len(jobs) == 1:
+            # Not worth the cost of starting worker processes.
+            return [cls.convertFile(job) for job in jobs]
+        workers = cls.getWorkerCount(maxWorkers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(cls.mapJobs(executor, workers, cls.convertFile, jobs, chunkSize))
+
+    @classmethod
+    def getWorkerCount(cls, maxWorkers: int = None) -> int:
+        return maxWorkers or os.cpu_count() or 1
+
+    # Fans the jobs out across the executor's workers in chunks. The jobs are submitted right
+    # away, and the results are returned in job order as they become available.
+    @classmethod
+    def mapJobs(cls, executor: ProcessPoolExecutor, workers: int, function, jobs: list, chunkSize: int = None) -> Iterator:
+        if chunkSize is None:
+            # Aim for a few chunks per worker so that a slow chunk doesn't stall the tail.
+            chunkSize = min(cls.MAX_CHUNK_SIZE, len(jobs) // (workers * 4))
+        return executor.map(function, jobs, chunksize=max(1, chunkSize))
@@ -0,0 +1,104 @@
+from __future__ import annotations
+import argparse
+import os
+import sys
+
+from ConversionCache import ConversionCache
+from ConversionDaemon import ConversionClient, ConversionDaemon
+from PathParser import PathParser
+from PersistentWorker import PersistentWorker
+from SqliteBatch import SqliteBatch
+from Svg2VectorBatch import Svg2VectorBatch
+
+# Command line front-end of the converter.
+class Svg2VectorCli:
+    @classmethod
+    def createArgumentParser(cls) -> argparse.ArgumentParser:
+        parser = argparse.ArgumentParser(description='Converts SVG files to Android VectorDrawable XML.')
+        parser.add_argument('inputs', nargs='*', help='SVG files, directories or glob patterns')
+        parser.add_argument('-o', '--output-dir', help='write outputs into a tree mirroring the inputs instead of next to them')
+        parser.add_argument('-j', '--jobs', type=int, help='number of worker processes (default: number of CPUs)')
+        parser.add_argument('--chunk-size', type=int, help='number of files handed to a worker at a time')
+        parser.add_argument('--cache-dir', help='reuse results of unchanged inputs from this directory')
+        parser.add_argument('--cache-size', type=int, default=ConversionCache.DEFAULT_MAX_BYTES // (1024 * 1024), help='size bound of the cache in MiB (default: %(default)s)')
+        parser.add_argument('--manifest', help='only convert inputs that changed since the last run recorded in this file, and delete outputs of removed inputs')
+        parser.add_argument('--streaming', action='store_true', help='convert documents without forward references in a single pass, without building their trees')
+        parser.add_argument('--sqlite', metavar='DATABASE', help='convert the SVG blobs of a SQLite database and store the results in the same rows')
+        parser.add_argument('--table', default=SqliteBatch.DEFAULT_TABLE, help='table holding the SVG blobs (default: %(default)s)')
+        parser.add_argument('--key-column', default=SqliteBatch.DEFAULT_KEY_COLUMN, help='column identifying a row (default: %(default)s)')
+        parser.add_argument('--svg-column', default=SqliteBatch.DEFAULT_SVG_COLUMN, help='column holding the SVG content (default: %(default)s)')
+        parser.add_argument('--xml-column', default=SqliteBatch.DEFAULT_XML_COLUMN, help='column receiving the VectorDrawable XML (default: %(default)s)')
+        parser.add_argument('--errors-column', default=SqliteBatch.DEFAULT_ERRORS_COLUMN, help='column receiving the error messages (default: %(default)s)')
+        parser.add_argument('--query', help='SELECT returning the key and the SVG content of the rows to convert (default: all rows of the table)')
+        parser.add_argument('--batch-size', type=int, default=SqliteBatch.DEFAULT_BATCH_SIZE, help='rows written back per transaction (default: %(default)s)')
+        parser.add_argument('--serve', metavar='SOCKET', help='run as a daemon serving conversion requests on a Unix domain socket')
+        parser.add_argument('--connect', metavar='SOCKET', help='send the inputs to a daemon started with --serve instead of converting them here')
+        parser.add_argument('--persistent-worker', action='store_true', help='serve JSON line requests on stdin/stdout for build systems')
+        parser.add_argument('--path-cache-size', type=int, default=0, help='number of parsed path data strings a --serve or --persistent-worker process keeps for reuse (default: %(default)s, no cache)')
+        return parser
+
+    @classmethod
+    def main(cls, argv: list[str] = None) -> int:
+        parser = cls.createArgumentParser()
+        args = parser.parse_args(argv)
+        if args.persistent_worker:
+            PathParser.setCacheSize(args.path_cache_size)
+            PersistentWorker.run()
+            return 0
+        if args.serve:
+            try:
+                ConversionDaemon.serve(args.serve, args.jobs, args.path_cache_size)
+            except FileExistsError as e:
+                print(f'Cannot serve on {args.serve}: {e.strerror}', file=sys.stderr)
+                return 1
+            return 0
+        if args.sqlite:
+            return cls.convertDatabase(args)
+        if not args.inputs:
+            parser.error('no inputs given')
+        if args.connect:
+            return cls.report(cls.convertWithDaemon(args.connect, args.inputs, args.output_dir))
+        results = Svg2VectorBatch.convert(args.inputs, args.output_dir, args.jobs, args.chunk_size, args.cache_dir, args.cache_size * 1024 * 1024, args.manifest, args.streaming)
+        return cls.report(results)
+
+    @classmethod
+    def convertWithDaemon(cls, socketPath: str, inputs: list[str], outputDir: str) -> list[Svg2VectorBatch.FileResult]:
+        results = []
+        failed = []
+        with ConversionClient(socketPath) as client:
+            for path, outputPath in Svg2VectorBatch.collectOutputs(inputs, outputDir, failed):
+                if os.path.dirname(outputPath):
+                    os.makedirs(os.path.dirname(outputPath), exist_ok=True)
+                response = client.convertFile(path, outputPath)
+                results.append(Svg2VectorBatch.FileResult(path, outputPath if response['ok'] and response['written'] else None, response['errors']))
+        results.extend(failed)
+        return results
+
+    @classmethod
+    def convertDatabase(cls, args: argparse.Namespace) -> int:
+        converted, failed = SqliteBatch.convert(args.sqlite, args.table, args.key_column, args.svg_column, args.xml_column,
+                                                args.errors_column, args.query, args.jobs, args.chunk_size, args.batch_size,
+                                                args.cache_dir, args.cache_size * 1024 * 1024, args.streaming)
+        print(f'Converted {converted} of {converted + failed} rows', file=sys.stderr)
+        return 1 if failed else 0
+
+    # Prints the error messages of the results and returns the process exit code.
+    @classmethod
+    def report(cls, results: list[Svg2VectorBatch.FileResult]) -> int:
+        failed = 0
+        upToDate = 0
+        for result in results:
+            if result.upToDate:
+                upToDate += 1
+            if result.errorMessage:
+                print(f'{result.inputPath}: {result.errorMessage}', file=sys.stderr)
+            if not result.hasOutput():
+                failed += 1
+        summary = f'Converted {len(results) - failed} of {len(results)} files'
+        if upToDate:
+            summary += f', {upToDate} up to date'
+        print(summary, file=sys.stderr)
+        return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(Svg2VectorCli.main())
@@ -1,14 +1,14 @@
 from __future__ import annotations
 import os
 from typing_compat import Self, TYPE_CHECKING
-from xml.dom import minidom
 
-from OutputStreamWriter import OutputStreamWriter
 from AffineTransform import AffineTransform
 from SvgGroupNode import SvgGroupNode
 from SvgLeafNode import SvgLeafNode
 from SvgNode import SvgNode
 from VdUtil import VdUtil
+from Writer import Writer
+from XmlElement import XmlElement
 
 if TYPE_CHECKING:
     from SvgTree import SvgTree
@@ -19,7 +19,7 @@ if TYPE_CHECKING:
 # nodes that are clipped by the path.
 
 class SvgClipPathNode(SvgGroupNode):
-    def __init__(self, svgTree: SvgTree, element: minidom.Element, name: str):
+    def __init__(self, svgTree: SvgTree, element: XmlElement, name: str):
         super().__init__(svgTree, element, name)
         self.mAffectedNodes = []
 
@@ -84,7 +84,7 @@ class SvgClipPathNode(SvgGroupNode):
         for p in self.mAffectedNodes:
             p.transformIfNeeded(rootTransform)
    
-    def writeXml(self, writer: OutputStreamWriter, indent: str):
+    def writeXml(self, writer: Writer, indent: str):
         writer.write(indent)
         writer.write('<group>')
         writer.write(os.linesep)
@@ -3,17 +3,14 @@ from enum import Enum
 import logging
 import os
 from typing_compat import Self, TYPE_CHECKING
-from xml.dom import minidom
 
 from AffineTransform import AffineTransform
 from GradientStop import GradientStop
-from OutputStreamWriter import OutputStreamWriter
-from Path2D import Path2DF
-from PathParser import PathParser
 from Point2D import Point2DF
 from SvgNode import SvgNode
+from Writer import Writer
+from XmlElement import XmlElement
 from XmlUtils import XmlUtils
-from VdNodeRender import VdNodeRender
 from VdPath import VdPath
 from VdUtil import VdUtil
 
@@ -45,7 +42,7 @@ class SvgGradientNode(SvgNode):
         'gradientType': 'android:type',
     }
 
-    def __init__(self, svgTree: SvgTree, element: minidom.Element, nodeName: str):
+    def __init__(self, svgTree: SvgTree, element: XmlElement, nodeName: str):
         super().__init__(svgTree, element, nodeName)
         self.mGradientStops = []
         self.mSvgLeafNode = None
@@ -143,7 +140,7 @@ class SvgGradientNode(SvgNode):
             pass
         return self.GradientCoordResult(val, isPercentage)
 
-    def writeXml(self, writer: OutputStreamWriter, indent: str):
+    def writeXml(self, writer: Writer, indent: str):
         if not self.mGradientStops:
             self.logError("Gradient has no stop info")
             return
@@ -320,7 +317,7 @@ class SvgGradientNode(SvgNode):
         writer.write('</aapt:attr>')
         writer.write(os.linesep)
     
-    def writeGradientStops(self, writer: OutputStreamWriter, indent: str):
+    def writeGradientStops(self, writer: Writer, indent: str):
         for g in self.mGradientStops:
             color = g.getColor()
             opacity = 1.0
@@ -369,7 +366,4 @@ class SvgGradientNode(SvgNode):
         self.mSvgLeafNode = svgLeafNode
     
     def setBoundingBox(self):
-        svgPath = Path2DF()
-        nodes = PathParser.parsePath(self.mSvgLeafNode.getPathData(), PathParser.ParseMode.SVG)
-        VdNodeRender.createPath(nodes, svgPath)
-        self.mBoundingBox = svgPath.getBounds2D()
+        self.mBoundingBox = self.mSvgLeafNode.getBoundingBox()
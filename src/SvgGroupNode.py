@@ -1,11 +1,11 @@
 from __future__ import annotations
 import logging
 from typing_compat import Self, TYPE_CHECKING
-from xml.dom import minidom
 
 from AffineTransform import AffineTransform
-from OutputStreamWriter import OutputStreamWriter
 from SvgNode import SvgNode
+from Writer import Writer
+from XmlElement import XmlElement
 
 if TYPE_CHECKING:
     from SvgTree import SvgTree
@@ -13,7 +13,7 @@ if TYPE_CHECKING:
 # Represent a SVG file's group element
 class SvgGroupNode(SvgNode):
     logger = logging.getLogger('Svg2Vector')
-    def __init__(self, svgTree: SvgTree, docNode: minidom.Element, name: str):
+    def __init__(self, svgTree: SvgTree, docNode: XmlElement, name: str):
         super().__init__(svgTree, docNode, name)
         self.mChildren = []
         self.mUseReferenceNode = None
@@ -120,7 +120,7 @@ class SvgGroupNode(SvgNode):
         for node in self.mChildren:
             node.validate()
 
-    def writeXml(self, OutputStreamWriter: OutputStreamWriter, indent: str):
+    def writeXml(self, OutputStreamWriter: Writer, indent: str):
         for node in self.mChildren:
             node.writeXml(OutputStreamWriter, indent)
     
@@ -5,14 +5,18 @@ import os
 from typing_compat import Self, TYPE_CHECKING
 
 from AffineTransform import AffineTransform
-from OutputStreamWriter import OutputStreamWriter
+from Path2D import Path2DF
 from PathParser import PathParser
 from SvgGradientNode import SvgGradientNode
 from SvgNode import SvgNode
+from VdNodeRender import VdNodeRender
 from VdPath import VdPath
+from Writer import Writer
 from XmlUtils import XmlUtils
 
 if TYPE_CHECKING:
+    from PathNodes import PathNodes
+    from Rectangle2D import Rectangle2DF
     from SvgTree import SvgTree
 
 # Represent a SVG file's leave element
@@ -20,7 +24,15 @@ class SvgLeafNode(SvgNode):
     logger = logging.getLogger('Svg2Vector')
     def __init__(self, svgTree: SvgTree, node, nodeName):
         super().__init__(svgTree, node, nodeName)
+        # The path data as given by the d attribute, or serialized from mPathNodes on demand.
         self.mPathData = None
+        # The geometry of the path. Built by basic shapes, or parsed from mPathData when the path
+        # is transformed, after which it is kept for the bounding box of gradients and for output.
+        # Once serialized, it is rounded the same way as mPathData, so it is always the same as
+        # what parsing mPathData would give.
+        self.mPathNodes = None
+        # Bounds of mPathNodes, shared by the gradients of fill and stroke.
+        self.mBoundingBox = None
         self.mFillGradientNode = None
         self.mStrokeGradientNode = None
 
@@ -34,9 +46,11 @@ class SvgLeafNode(SvgNode):
     def copyFrom(self, frm: Self):
         super().copyFrom(frm)
         self.mPathData = frm.mPathData
+        # The nodes are transformed in place, so every copy needs its own.
+        self.mPathNodes = None if frm.mPathNodes is None else frm.mPathNodes.copy()
         
     # Writes attributes of this node
-    def writeAttributeValues(self, writer: OutputStreamWriter, indent: str):
+    def writeAttributeValues(self, writer: Writer, indent: str):
         # There could be some redundent opacity information in the attribute's map,
         # like opacity vs fill-opacity / stroke-opacity.
         self.parsePathOpacity()
@@ -116,17 +130,49 @@ class SvgLeafNode(SvgNode):
             self.mVdAttributesMap[attributeName] = attributeValue
     
     def dumpNode(self, indent: str):
-        pathData = 'None pathData' if self.mPathData is None else self.mPathData
+        pathData = self.mPathData
+        if pathData is None:
+            pathData = 'None pathData' if self.mPathNodes is None else repr(self.mPathNodes)
         name = 'null name' if self.mName is None else self.mName
         self.logger.info(f'{indent} {pathData} {name}')
         pass
 
     def setPathData(self, pathData: str):
         self.mPathData = pathData
+        self.mPathNodes = None
+        self.mBoundingBox = None
 
+    # Returns the path data, serializing the geometry if it changed since the last call.
     def getPathData(self) -> str:
+        if self.mPathData is None and self.mPathNodes is not None:
+            if self.mPathNodes.mShared:
+                self.mPathNodes = self.mPathNodes.copy()
+            self.mPathData = VdPath.Node.NodeListToString(self.mPathNodes, self.mSvgTree, True)
         return self.mPathData
 
+    # Sets the geometry of a basic shape, replacing any path data.
+    def setPathNodes(self, nodes: PathNodes):
+        self.mPathNodes = nodes
+        self.mPathData = None
+        self.mBoundingBox = None
+
+    # Returns the geometry of the path, parsing the path data if there is none yet.
+    def getPathNodes(self) -> PathNodes:
+        if self.mPathNodes is None and self.mPathData:
+            self.mPathNodes = PathParser.parsePath(self.mPathData, PathParser.ParseMode.SVG)
+        return self.mPathNodes
+
+    # Returns the bounding box of the path, computed once for all gradients of this node. It is
+    # taken from the geometry as written, so that gradients match the rounded coordinates.
+    def getBoundingBox(self) -> Rectangle2DF:
+        if self.mBoundingBox is None:
+            svgPath = Path2DF()
+            # Rounds the geometry if it hasn't been written yet.
+            self.getPathData()
+            VdNodeRender.createPath(self.getPathNodes(), svgPath)
+            self.mBoundingBox = svgPath.getBounds2D()
+        return self.mBoundingBox
+
     def isGroupNode(self) -> bool:
         return False
 
@@ -134,15 +180,18 @@ class SvgLeafNode(SvgNode):
         return self.mFillGradientNode or self.mStrokeGradientNode
 
     def transformIfNeeded(self, rootTransform: AffineTransform):
-        if not self.mPathData:
+        nodes = self.getPathNodes()
+        if nodes is None:
             # Nothing to draw and transform, early return.
             return
-        nodes = PathParser.parsePath(self.mPathData, PathParser.ParseMode.SVG)
         self.mStackedTransform.preConcatenate(rootTransform)
         needsConvertRelativeModeAfterClose = VdPath.Node.hasRelMoveAfterClose(nodes)
         if not self.mStackedTransform.isIdentity() or needsConvertRelativeModeAfterClose:
             VdPath.Node.transform(self.mStackedTransform, nodes)
-        self.mPathData = VdPath.Node.NodeListToString(nodes, self.mSvgTree)
+        # Serialized right away, which rounds the nodes, as a <use> copy is transformed again
+        # from the rounded coordinates.
+        self.setPathNodes(nodes)
+        self.getPathData()
 
     def flatten(self, transform: AffineTransform):
         self.mStackedTransform.setTransform(transform)
@@ -167,8 +216,8 @@ class SvgLeafNode(SvgNode):
                 except Exception:
                     pass
 
-    def writeXml(self, writer: OutputStreamWriter, indent: str):
-        if not self.mPathData:
+    def writeXml(self, writer: Writer, indent: str):
+        if not self.getPathData():
             return  # No path to draw
         
         if self.mStrokeBeforeFill:
@@ -179,7 +228,7 @@ class SvgLeafNode(SvgNode):
         else:
             self.writePathElement(writer, indent)
         
-    def writePathElementWithSuppressedFillOrStroke(self, writer: OutputStreamWriter, attribute: str, indent: str):
+    def writePathElementWithSuppressedFillOrStroke(self, writer: Writer, attribute: str, indent: str):
         savedValue = self.mVdAttributesMap.get(attribute)
         self.mVdAttributesMap[attribute] = '#00000000'
         self.writePathElement(writer, indent)
@@ -188,7 +237,7 @@ class SvgLeafNode(SvgNode):
         else:
             self.mVdAttributesMap[attribute] = savedValue
 
-    def writePathElement(self, writer: OutputStreamWriter, indent: str):
+    def writePathElement(self, writer: Writer, indent: str):
         fillColor = self.mVdAttributesMap.get('fill')
         strokeColor = self.mVdAttributesMap.get('stroke')
         emptyFill = 'none' == fillColor or '#00000000' == fillColor
@@ -213,7 +262,7 @@ class SvgLeafNode(SvgNode):
         # Last, write the path data and all associated attributes.
         writer.write(indent)
         writer.write(self.CONTINUATION_INDENT)
-        writer.write(f'android:pathData="{self.mPathData}"')
+        writer.write(f'android:pathData="{self.getPathData()}"')
         self.writeAttributeValues(writer, indent)
         if not self.hasGradient():
             writer.write('/')
@@ -6,11 +6,11 @@ import logging
 import math
 import re
 from typing_compat import Self, TYPE_CHECKING
-from xml.dom import minidom
 
 from AffineTransform import AffineTransform
-from OutputStreamWriter import OutputStreamWriter
 from SvgColor import SvgColor
+from Writer import Writer
+from XmlElement import XmlElement
 
 if TYPE_CHECKING:
     from SvgTree import SvgTree
@@ -43,14 +43,18 @@ class SvgNode(metaclass=abc.ABCMeta):
         'stroke-opacity': 'android:strokeAlpha',
         'stroke-width': 'android:strokeWidth'
     }
+    # Attributes that nodes read after the document has been traversed: for copies made by
+    # deepCopy, for references and for the position of <use>.
+    SNAPSHOT_ATTRIBUTES = {*presentationMap, TRANSFORM_TAG, 'id', 'href', 'xlink:href', 'x', 'y'}
 
     # While parsing the translate() rotate() ..., update the {@code mLocalTransform}.
-    def __init__(self, svgTree: SvgTree, element, name: str):
+    def __init__(self, svgTree: SvgTree, element: XmlElement, name: str):
         self.mName = name
         # Keep a reference to the tree in order to dump the error log.
         self.mSvgTree = svgTree
-        # Use document node to get the line number for error reporting.
-        self.mDocumentElement = element
+        # Use document node to get the line number for error reporting. Only a snapshot is kept,
+        # so that the document can be freed once it has been traversed.
+        self.mDocumentElement = element.detach(self.SNAPSHOT_ATTRIBUTES)
 
         # Key is the attributes for vector drawable, and the value is the converted from SVG.
         self.mVdAttributesMap = dict()
@@ -62,11 +66,7 @@ class SvgNode(metaclass=abc.ABCMeta):
         # This is the stacked transformation. And this will be used for the path data transform().
         self.mStackedTransform = AffineTransform()
 
-        attrs = element.attributes
-        for itemIndex in range(attrs.length):
-            n = attrs.item(itemIndex)
-            nodeName = n.nodeName
-            nodeValue = n.nodeValue
+        for nodeName, nodeValue in element.attributes.items():
             # TODO: Handle style here. Refer to Svg2Vector::addStyleToPath()
             if nodeName in self.presentationMap:
                 self.fillPresentationAttributesInternal(nodeName, nodeValue)
@@ -139,7 +139,7 @@ class SvgNode(metaclass=abc.ABCMeta):
     def getName(self) -> str:
         return self.mName
     
-    def getDocumentElement(self) -> minidom.Element:
+    def getDocumentElement(self) -> XmlElement:
         return self.mDocumentElement
     
     # Dumps the current node's debug info.
@@ -151,7 +151,7 @@ class SvgNode(metaclass=abc.ABCMeta):
     # @param writer the writer to write the group XML element to
     # @param indent whitespace used for indenting output XML
     @abc.abstractmethod
-    def writeXml(self, writer: OutputStreamWriter, indent: str):
+    def writeXml(self, writer: Writer, indent: str):
         raise Exception()
 
     class VisitResult(Enum):
@@ -0,0 +1,91 @@
+from __future__ import annotations
+import io
+from xml.parsers import expat
+
+from StreamReader import StreamReader
+from SvgTree import SvgTree
+from XmlElement import XmlElement
+
+# This is not original class.
+# Size and viewport of an SVG document, read from the root element alone. Parsing stops right
+# after the root start tag, so this costs about the same for a huge map as for a small icon;
+# meant for indexing many files without converting them.
+class SvgProbe:
+    SVG_NAMESPACE = 'http://www.w3.org/2000/svg'
+    # The root start tag is usually within the first few hundred bytes.
+    READ_SIZE = 4 * 1024
+
+    # Raised from the start tag handler to stop the parser.
+    class RootFound(Exception):
+        pass
+
+    # @param tagName the name of the root element
+    # @param compressed whether the document is gzip compressed (.svgz)
+    # @param width the drawable's width in dp, as Svg2Vector would write it
+    # @param height the drawable's height in dp
+    # @param viewBox the viewBox as [x, y, width, height], derived from the size if missing, or
+    #     None if neither is given
+    # @param hasViewBox whether the root element has a viewBox attribute
+    # @param hasNamespace whether the root element declares the SVG namespace
+    def __init__(self, tagName: str, compressed: bool, width: float, height: float, viewBox: list[float],
+                 hasViewBox: bool, hasNamespace: bool):
+        self.tagName = tagName
+        self.compressed = compressed
+        self.width = width
+        self.height = height
+        self.viewBox = viewBox
+        self.hasViewBox = hasViewBox
+        self.hasNamespace = hasNamespace
+
+    # Whether the document is an SVG that Svg2Vector can size, which it can't without a viewBox
+    # or a width and height.
+    def isConvertible(self) -> bool:
+        return self.tagName == 'svg' and bool(self.viewBox)
+
+    # Returns a JSON-compatible representation of the probe.
+    def toDict(self) -> dict:
+        return {
+            'tagName': self.tagName,
+            'compressed': self.compressed,
+            'width': self.width,
+            'height': self.height,
+            'viewBox': self.viewBox,
+            'hasViewBox': self.hasViewBox,
+            'hasNamespace': self.hasNamespace,
+        }
+
+    # Reads the root element of an SVG document.
+    # @param source a file path, the document as bytes, or a readable binary or text stream
+    # @raises ExpatError if the document ends or is malformed before the root start tag
+    # @raises ValueError if the size or viewBox can't be parsed
+    @classmethod
+    def probe(cls, source) -> SvgProbe:
+        if isinstance(source, (bytes, bytearray)):
+            return cls.probeStream(io.BytesIO(source))
+        if hasattr(source, 'read'):
+            return cls.probeStream(source)
+        with open(source, 'rb') as file:
+            return cls.probeStream(file)
+
+    @classmethod
+    def probeStream(cls, stream) -> SvgProbe:
+        root = []
+
+        def startElement(name: str, attrs: dict):
+            root.append(XmlElement(name, attrs, None, 0))
+            raise cls.RootFound()
+
+        parser = expat.ParserCreate()
+        parser.StartElementHandler = startElement
+        blocks, compressed = StreamReader.open(stream, cls.READ_SIZE)
+        try:
+            for data in blocks:
+                parser.Parse(data, False)
+            parser.Parse(b'', True)
+        except cls.RootFound:
+            pass
+        element = root[0]
+        svgTree = SvgTree()
+        svgTree.parseDimension(element)
+        return cls(element.tagName, compressed, svgTree.getWidth(), svgTree.getHeight(), svgTree.viewBox or None,
+                   SvgTree.SVG_VIEW_BOX in element.attributes, element.getAttribute('xmlns') == cls.SVG_NAMESPACE)
@@ -3,17 +3,18 @@ from enum import Enum
 import logging
 import os
 import struct
-from xml.dom import minidom
+import time
 
 from typing_compat import Self
 
 from AffineTransform import AffineTransform
-from OutputStreamWriter import OutputStreamWriter
 from PositionXmlParser import PositionXmlParser
 from SvgGradientNode import SvgGradientNode
 from SvgGroupNode import SvgGroupNode
 from SvgNode import SvgNode
 from VdUtil import VdUtil
+from Writer import Writer
+from XmlElement import XmlDocument, XmlElement
 from XmlUtils import XmlUtils
 
 #Represent the SVG file in an internal data structure as a tree
@@ -26,6 +27,14 @@ class SvgTree:
     SVG_WIDTH = 'width'
     SVG_HEIGHT = 'height'
     SVG_VIEW_BOX = 'viewBox'
+
+    # Names of the conversion phases whose duration is recorded.
+    PHASE_PARSE = 'parse'
+    PHASE_EXTRACT = 'extract'
+    PHASE_FLATTEN = 'flatten'
+    PHASE_WRITE = 'write'
+    # Conversion by StreamingConverter, which doesn't have separate phases.
+    PHASE_STREAM = 'stream'
     def __init__(self):
         self.w = -1.0
         self.h = -1.0
@@ -34,6 +43,12 @@ class SvgTree:
 
         self.mRoot = None
         self.mFileName = ''
+        # Where the document came from, to recover line numbers that the parser left out.
+        self.mSourcePath = None
+        self.mSourceData = None
+        # Line numbers of all start tags, once recovered for a document parsed with lazy line
+        # numbers.
+        self.mSourceLines = None
 
         self.mLogMessages = []
 
@@ -63,6 +78,9 @@ class SvgTree:
 
         self.mCoordinateFormat = None
 
+        # Key is the name of a conversion phase, and the value is the time spent in it in seconds.
+        self.mPhaseTimes = dict()
+
     class SvgLogLevel(Enum):
         ERROR = 1
         WARNING = 2
@@ -124,19 +142,57 @@ class SvgTree:
         if not self.mLogMessages and not self.getHasLeafNode():
             self.logError('No vector content found', None)
 
-    def parse(self, path: str, parseErrors: list[str]) -> minidom.Document:
+    # Parses the SVG file at path.
+    # @param backend the PositionXmlParser backend, or None for the default one
+    def parse(self, path: str, parseErrors: list[str], backend: str = None) -> XmlDocument:
         self.mFileName = os.path.basename(path)
+        self.mSourcePath = path
+        start = time.perf_counter()
+        try:
+            return PositionXmlParser.parse(path, backend)
+        except Exception as e:
+            raise Exception(f'Internal error {e}')
+        finally:
+            self.addPhaseTime(self.PHASE_PARSE, time.perf_counter() - start)
+
+    # Parses a document from a readable binary or text stream.
+    # @param fileName the name used in log messages
+    def parseStream(self, stream, fileName: str, parseErrors: list[str], backend: str = None) -> XmlDocument:
+        self.mFileName = fileName
+        start = time.perf_counter()
+        try:
+            return PositionXmlParser.parse(stream, backend)
+        except Exception as e:
+            raise Exception(f'Internal error {e}')
+        finally:
+            self.addPhaseTime(self.PHASE_PARSE, time.perf_counter() - start)
+
+    # Parses a document held in memory as bytes or str.
+    # @param fileName the name used in log messages
+    def parseString(self, data, fileName: str, parseErrors: list[str], backend: str = None) -> XmlDocument:
+        self.mFileName = fileName
+        if PositionXmlParser.lazyLineNumbers:
+            # Needed to recover the line numbers.
+            self.mSourceData = data
+        start = time.perf_counter()
         try:
-            return PositionXmlParser.parse(path)
+            return PositionXmlParser.parseString(data, backend)
         except Exception as e:
             raise Exception(f'Internal error {e}')
+        finally:
+            self.addPhaseTime(self.PHASE_PARSE, time.perf_counter() - start)
 
     def normalize(self):
-        # mRootTransform is always setup, now just need to apply th viewbox info into.
-        self.mRootTransform.preConcatenate(AffineTransform(1, 0, 0, 1, -self.viewBox[0], -self.viewBox[1]))
+        self.normalizeRootTransform()
         self.transform(self.mRootTransform)
         self.logger.info(f'matrix={self.mRootTransform}')
 
+    # Returns the transformation from user space to the viewport.
+    def normalizeRootTransform(self) -> AffineTransform:
+        # mRootTransform is always setup, now just need to apply th viewbox info into.
+        self.mRootTransform.preConcatenate(AffineTransform(1, 0, 0, 1, -self.viewBox[0], -self.viewBox[1]))
+        return self.mRootTransform
+
     def transform(self, rootTransform: AffineTransform):
         self.mRoot.transformIfNeeded(rootTransform)
 
@@ -150,13 +206,13 @@ class SvgTree:
     def getRoot(self) -> SvgGroupNode:
         return self.mRoot
 
-    def logError(self, s: str, node: minidom.Node):
+    def logError(self, s: str, node: XmlElement):
         self.logErrorLine(s, node, self.SvgLogLevel.ERROR)
 
-    def logWarning(self, s: str, node: minidom.Node):
+    def logWarning(self, s: str, node: XmlElement):
         self.logErrorLine(s, node, self.SvgLogLevel.WARNING)
 
-    def logErrorLine(self, s: str, node: minidom.Node, level: SvgLogLevel):
+    def logErrorLine(self, s: str, node: XmlElement, level: SvgLogLevel):
         if not s:
             ValueError('s must not be empty')
         line = self.getStartLine(node) if node else 0
@@ -175,6 +231,16 @@ class SvgTree:
             result += message.getFormattedMessage()
         return result
 
+    def getLogMessages(self) -> list[LogMessage]:
+        return sorted(self.mLogMessages)
+
+    def addPhaseTime(self, phase: str, seconds: float):
+        self.mPhaseTimes[phase] = self.mPhaseTimes.get(phase, 0.0) + seconds
+
+    # Returns the time spent in each conversion phase in seconds.
+    def getPhaseTimes(self) -> dict:
+        return self.mPhaseTimes
+
     # Returns true when there is at least one valid child.
     def getHasLeafNode(self) -> bool:
         return self.mHasLeafNode
@@ -184,10 +250,30 @@ class SvgTree:
 
     # Returns the 1-based start line number of the given node.
     def getStartLine(self, node) -> int:
-        if hasattr(node, '__line_number__'):
-            return node.__line_number__
-        else:
+        if not isinstance(node, XmlElement):
+            return 0
+        if node.lineNumber is None:
+            node.lineNumber = self.recoverLineNumber(node.index)
+        return node.lineNumber
+
+    # Returns the line number of the element at the given position in document order of a
+    # document parsed with lazy line numbers. The source is scanned again at most once per
+    # document, when the first message is logged.
+    def recoverLineNumber(self, index: int) -> int:
+        if self.mSourceLines is None:
+            try:
+                if self.mSourceData is not None:
+                    self.mSourceLines = PositionXmlParser.scanLineNumbers(self.mSourceData)
+                else:
+                    with open(self.mSourcePath, 'rb') as file:
+                        self.mSourceLines = PositionXmlParser.scanLineNumbers(file)
+            except Exception:
+                self.mSourceLines = []
+            self.mSourceData = None
+        # The source changed if it has fewer elements now; there is nothing better to say.
+        if index is None or len(self.mSourceLines) <= index:
             return 0
+        return self.mSourceLines[index]
 
     def getViewportWidth(self) -> float:
         return self.viewBox[2] if self.viewBox else -1.0
@@ -195,14 +281,12 @@ class SvgTree:
     def getViewportHeight(self) -> float:
         return self.viewBox[3] if self.viewBox else -1.0
 
-    def parseDimension(self, nNode: minidom.Node):
-        a = nNode.attributes
+    def parseDimension(self, nNode: XmlElement):
         widthType = self.SizeType.PIXEL
         heightType = self.SizeType.PIXEL
-        for i in range(a.length):
-            n = a.item(i)
-            name = n.nodeName.strip()
-            value = n.nodeValue.strip()
+        for name, value in nNode.attributes.items():
+            name = name.strip()
+            value = value.strip()
             subStringSize = len(value)
             currentType = self.SizeType.PIXEL
             unit = value[max(len(value) - 2, 0):]
@@ -339,9 +423,16 @@ class SvgTree:
             self.mCoordinateFormat = VdUtil.getCoordinateFormat(max(viewportHeight, viewportWidth))
         return self.mCoordinateFormat
 
-    def writeXml(self, writer: OutputStreamWriter):
+    def writeXml(self, writer: Writer):
         if not self.mRoot:
             raise ValueError('SvgTree is not fully initialized')
+        self.writeHeader(writer)
+        self.normalize()
+        self.mRoot.writeXml(writer, SvgNode.INDENT_UNIT)
+        self.writeFooter(writer)
+
+    # Writes the <vector> start tag with the size and the viewport.
+    def writeHeader(self, writer: Writer):
         writer.write(self.HEAD)
         writer.write(os.linesep)
         if self.getHasGradient():
@@ -368,8 +459,8 @@ class SvgTree:
         writer.write(self.formatCoordinate(self.to32Float(self.getViewportHeight())))
         writer.write('">')
         writer.write(os.linesep)
-        self.normalize()
-        self.mRoot.writeXml(writer, SvgNode.INDENT_UNIT)
+
+    def writeFooter(self, writer: Writer):
         writer.write('</vector>')
         writer.write(os.linesep)
 
@@ -1,22 +1,32 @@
+from __future__ import annotations
 import logging
 import math
+from typing import TYPE_CHECKING
 
 from Path2D import Path2D
-from VdPath import VdPath
+
+if TYPE_CHECKING:
+    from PathNodes import PathNodes
 
 class VdNodeRender:
     logger = logging.getLogger('Svg2Vector')
 
     @classmethod
-    def createPath(cls, nodes: list[VdPath.Node], path: Path2D):
+    def createPath(cls, nodes: PathNodes, path: Path2D):
         current = [0.0] * 6
         lastCmd = ' '
-        for node in nodes:
-            cls.addCommand(path, current, node.getType(), lastCmd, node.getParams())
-            lastCmd = node.getType()
+        params = nodes.mParams
+        offsets = nodes.mOffsets
+        for i, cmd in enumerate(nodes.mTypes):
+            cls.addCommand(path, current, cmd, lastCmd, params, offsets[i], offsets[i + 1])
+            lastCmd = cmd
 
+    # @param val the parameters, of which val[start:end] belong to the command; all of them by
+    #     default
     @classmethod
-    def addCommand(cls, path: Path2D, current: list[float], cmd: str, lastCmd: str, val: list[float]):
+    def addCommand(cls, path: Path2D, current: list[float], cmd: str, lastCmd: str, val, start: int = 0, end: int = None):
+        if end is None:
+            end = len(val)
         incr = 2
         cx = current[0]
         cy = current[1]
@@ -40,7 +50,10 @@ class VdNodeRender:
         elif cmd in ['a', 'A']:
             incr = 7
         
-        for k in range(0, len(val), incr):
+        for k in range(start, end, incr):
+            if end < k + incr:
+                # The parameters of the next command follow in val.
+                raise IndexError(f'Missing parameters of {cmd}')
             reflectCtrl = False
             tempReflectedX = 0.0
             tempReflectedY = 0.0
@@ -48,7 +61,7 @@ class VdNodeRender:
             if cmd == 'm':
                 cx += val[k]
                 cy += val[k + 1]
-                if k > 0:
+                if k > start:
                     path.lineTo(cx, cy)
                 else:
                     path.moveTo(cx, cy)
@@ -57,7 +70,7 @@ class VdNodeRender:
             elif cmd == 'M':
                 cx = val[k]
                 cy = val[k + 1]
-                if k > 0:
+                if k > start:
                     path.lineTo(cx, cy)
                 else:
                     path.moveTo(cx, cy)
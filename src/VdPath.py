@@ -1,13 +1,14 @@
 from __future__ import annotations
+from array import array
 import math
 from typing import TYPE_CHECKING
 
 from AffineTransform import AffineTransform
 from EllipseSolver import EllipseSolver
-from Point2D import Point2DF
 from VdElement import VdElement
 
 if TYPE_CHECKING:
+    from PathNodes import PathNodes
     from SvgTree import SvgTree
 
 # Used to represent one VectorDrawable's path element.
@@ -58,195 +59,217 @@ class VdPath(VdElement):
         'A': 7
     }
 
+    # Static helpers for the commands of a path, which are held in PathNodes.
     class Node:
-        def __init__(self, tp: str, params: list):
-            self.mType = tp
-            self.mParams = params
-
-        def getType(self) -> str:
-            return self.mType
-        
-        def getParams(self) -> list:
-            return self.mParams
-        
         @classmethod
-        def hasRelMoveAfterClose(cls, nodes: list) -> bool:
-            preType = ' '
-            for n in nodes:
-                if (preType == 'z' or preType == 'Z') and n.mType == 'm':
-                    return True
-                preType = n.mType
-            return False
+        def hasRelMoveAfterClose(cls, nodes: PathNodes) -> bool:
+            return nodes.hasRelMoveAfterClose()
 
+        # @param roundNodes whether to replace the parameters by the rounded values written, so
+        #     that the nodes are the same as those parsed from the returned string. The nodes
+        #     must not be shared.
         @classmethod
-        def NodeListToString(cls, nodes: list, svgTree: SvgTree) -> str:
-            result = ''
-            for node in nodes:
-                result += node.mType
-                ln = len(node.mParams)
+        def NodeListToString(cls, nodes: PathNodes, svgTree: SvgTree, roundNodes: bool = False) -> str:
+            result = []
+            params = nodes.mParams
+            offsets = nodes.mOffsets
+            for i, tp in enumerate(nodes.mTypes):
+                result.append(tp)
+                start = offsets[i]
+                ln = offsets[i + 1] - start
                 implicitLineTo = False
                 lineToType = ' '
-                if (node.mType == 'm' or node.mType == 'M') and 2 < ln:
+                if (tp == 'm' or tp == 'M') and 2 < ln:
                     implicitLineTo = True
-                    lineToType = 'l' if node.mType == 'm' else 'L'
+                    lineToType = 'l' if tp == 'm' else 'L'
                 for j in range(ln):
                     if 0 < j:
-                        result += ',' if (j % 2) != 0 else ' '
+                        result.append(',' if (j % 2) != 0 else ' ')
                     if implicitLineTo and j == 2:
-                        result += lineToType
-                    param = node.mParams[j]
+                        result.append(lineToType)
+                    param = params[start + j]
                     if not math.isfinite(param):
                         raise ValueError(f'Invalid number: {param}')
-                    result += svgTree.formatCoordinate(svgTree.roundHalfUp(svgTree.to32Float(param)))
-            return result
+                    value = svgTree.formatCoordinate(svgTree.roundHalfUp(svgTree.to32Float(param)))
+                    result.append(value)
+                    if roundNodes:
+                        # PathParser drops the signs of arc radii.
+                        params[start + j] = abs(float(value)) if (tp == 'a' or tp == 'A') and j % 7 < 2 else float(value)
+            return ''.join(result)
 
+        # Transforms the path in place. The parameters are transformed right in the array that
+        # holds them, unless horizontal or vertical lines have to be converted to LineTo with 2
+        # parameters per point, or the array is shared; then all of them are copied to a new
+        # array.
         @classmethod
-        def transform(cls, totalTransform: AffineTransform, nodes: list):
-            currentPoint = Point2DF()
-            currentSegmentStartPoint = Point2DF()
-            previousType = VdPath.INIT_TYPE
-            for n in nodes:
-                n.transformImpl(totalTransform, currentPoint, currentSegmentStartPoint, previousType)
-                previousType = n.mType
-
-        def transformImpl(self, totalTransform: AffineTransform, currentPoint: Point2DF, currentSegmentStartPoint: Point2DF, previousType: str):
-            # For horizontal and vertical lines, we have to convert to LineTo with 2 parameters.
-            # And for arcTo, we also need to isolate the parameters for transformation.
-            # Therefore, looping will be necessary for such commands.
-            #
-            # Note that if the matrix is translation only, then we can save many computations.
-            paramsLen = len(self.mParams)
-            tempParams = [0.0] * paramsLen * 2
+        def transform(cls, totalTransform: AffineTransform, nodes: PathNodes):
+            translationOnly = cls.isTranslationOnly(totalTransform)
+            types = nodes.mTypes
+            srcParams = nodes.mParams
+            srcOffsets = nodes.mOffsets
+            copy = 'H' in types or 'V' in types or not translationOnly and ('h' in types or 'v' in types)
+            if copy:
+                params = array('d')
+                offsets = array('l', [0])
+            elif nodes.mShared:
+                # The offsets don't change, but the parameters are shared, e.g. by the cache of
+                # PathParser.
+                params = array('d', srcParams)
+                offsets = srcOffsets
+            else:
+                params = srcParams
+                offsets = srcOffsets
+            newTypes = []
             # These have to be pre-transformed values. In other words, the same as it is
             # in the pathData.
-            currentX = currentPoint.x
-            currentY = currentPoint.y
-            currentSegmentStartX = currentSegmentStartPoint.x
-            currentSegmentStartY = currentSegmentStartPoint.y
-            step = VdPath.COMMAND_STEP_MAP.get(self.mType)
-            if self.mType in ['z', 'Z']:
-                currentX = currentSegmentStartX
-                currentY = currentSegmentStartY
-            elif self.mType == 'M':
-                currentSegmentStartX = self.mParams[0]
-                currentSegmentStartY = self.mParams[1]
-                currentX = self.mParams[paramsLen - 2]
-                currentY = self.mParams[paramsLen - 1]
-                totalTransform.transform(self.mParams, 0, self.mParams, 0, int(paramsLen / 2))
-            elif self.mType in ['L', 'T', 'C', 'S', 'Q']:
-                currentX = self.mParams[paramsLen - 2]
-                currentY = self.mParams[paramsLen - 1]
-                totalTransform.transform(self.mParams, 0, self.mParams, 0, int(paramsLen / 2))
-            elif self.mType == 'm':
-                if previousType == 'z' or previousType == 'Z':
-                    # Replace 'm' with 'M' to work around a bug in API 21 that is triggered
-                    # when 'm' follows 'z'.
-                    self.mType = 'M'
-                    self.mParams[0] += currentSegmentStartX
-                    self.mParams[1] += currentSegmentStartY
-                    currentSegmentStartX = self.mParams[0]   # Start a new segment.
-                    currentSegmentStartY = self.mParams[1]
-                    for i in range(step, paramsLen, step):
-                        self.mParams[i] += self.mParams[i - step]
-                        self.mParams[i + 1] += self.mParams[i + 1 - step]
-                    currentX = self.mParams[paramsLen - 2]
-                    currentY = self.mParams[paramsLen - 1]
-                    totalTransform.transform(self.mParams, 0, self.mParams, 0, int(paramsLen / 2))
+            currentX = 0.0
+            currentY = 0.0
+            currentSegmentStartX = 0.0
+            currentSegmentStartY = 0.0
+            previousType = VdPath.INIT_TYPE
+            for index, tp in enumerate(types):
+                srcStart = srcOffsets[index]
+                paramsLen = srcOffsets[index + 1] - srcStart
+                if copy:
+                    start = len(params)
+                    if tp == 'H' or tp == 'V' or not translationOnly and (tp == 'h' or tp == 'v'):
+                        # Filled in below.
+                        params.extend([0.0] * (paramsLen * 2))
+                    else:
+                        params.extend(srcParams[srcStart: srcStart + paramsLen])
                 else:
-                    headLen = 2
-                    currentX += self.mParams[0]
-                    currentY += self.mParams[1]
-                    currentSegmentStartX = currentX # Start a new segment.
-                    currentSegmentStartY = currentY
-                    if previousType == VdPath.INIT_TYPE:
-                        # 'm' at the start of a path is handled similar to 'M'.
-                        # The coordinates are transformed as absolute.
-                        totalTransform.transform(self.mParams, 0, self.mParams, 0, int(headLen / 2))
-                    elif not self.isTranslationOnly(totalTransform):
-                        self.deltaTransform(totalTransform, self.mParams, 0, headLen)
-                    for i in range(headLen, paramsLen, step):
-                        currentX += self.mParams[i]
-                        currentY += self.mParams[i + 1]
-                    if not self.isTranslationOnly(totalTransform):
-                        self.deltaTransform(totalTransform, self.mParams, headLen, paramsLen - headLen)
-            elif self.mType in ['l', 't', 'c', 's', 'q']:
-                for i in range(0, paramsLen - step + 1, step):
-                    currentX += self.mParams[i + step - 2]
-                    currentY += self.mParams[i + step - 1]
-                if not self.isTranslationOnly(totalTransform):
-                    self.deltaTransform(totalTransform, self.mParams, 0, paramsLen)
-            elif self.mType == 'H':
-                self.mType = 'L'
-                for i in range(paramsLen):
-                    tempParams[i * 2] = self.mParams[i]
-                    tempParams[i * 2 + 1] = currentY
-                    currentX = self.mParams[i]
-                totalTransform.transform(tempParams, 0, tempParams, 0, paramsLen)
-                self.mParams = tempParams
-            elif self.mType == 'V':
-                self.mType = 'L'
-                for i in range(paramsLen):
-                    tempParams[i * 2] = currentX
-                    tempParams[i * 2 + 1] = self.mParams[i]
-                    currentY = self.mParams[i]
-                totalTransform.transform(tempParams, 0, tempParams, 0, paramsLen)
-                self.mParams = tempParams
-            elif self.mType == 'h':
-                for i in range(paramsLen):
-                    currentX += self.mParams[i]
-                    # tempParams may not be used but is assigned here to avoid a second loop.
-                    tempParams[i * 2] = self.mParams[i]
-                    tempParams[i * 2 + 1] = 0
-                if not self.isTranslationOnly(totalTransform):
-                    self.mType = 'l'
-                    self.deltaTransform(totalTransform, tempParams, 0, 2 * paramsLen)
-                    self.mParams = tempParams
-            elif self.mType == 'v':
-                for i in range(paramsLen):
-                    # tempParams may not be used but is assigned here to avoid a second loop.
-                    tempParams[i * 2] = 0
-                    tempParams[i * 2 + 1] = self.mParams[i]
-                    currentY += self.mParams[i]
-                if not self.isTranslationOnly(totalTransform):
-                    self.mType = 'l'
-                    self.deltaTransform(totalTransform, tempParams, 0, 2 * paramsLen)
-                    self.mParams = tempParams
-            elif self.mType == 'A':
-                for i in range(0, paramsLen - step + 1, step):
-                    # (0:rx 1:ry 2:x-axis-rotation 3:large-arc-flag 4:sweep-flag 5:x 6:y)
-                    # [0, 1, 2]
-                    if not self.isTranslationOnly(totalTransform):
-                        ellipseSolver = EllipseSolver(totalTransform, currentX, currentY, self.mParams[i], self.mParams[i + 1], self.mParams[i + 2], self.mParams[i + 3], self.mParams[i + 4], self.mParams[i + 5], self.mParams[i + 6])
-                        self.mParams[i] = ellipseSolver.getMajorAxis()
-                        self.mParams[i + 1] = ellipseSolver.getMinorAxis()
-                        self.mParams[i + 2] = ellipseSolver.getRotationDegree()
-                        if ellipseSolver.getDirectionChanged():
-                            self.mParams[i + 4] = 1 - self.mParams[i + 4]
-                    # [5, 6]
-                    currentX = self.mParams[i + 5]
-                    currentY = self.mParams[i + 6]
-                    totalTransform.transform(self.mParams, i + 5, self.mParams, i + 5, 1)
-            elif self.mType == 'a':
-                for i in range(0, paramsLen - step + 1, step):
-                    oldCurrentX = currentX
-                    oldCurrentY = currentY
-                    currentX += self.mParams[i + 5]
-                    currentY += self.mParams[i + 6]
-                    if not self.isTranslationOnly(totalTransform):
-                        ellipseSolver = EllipseSolver(totalTransform, oldCurrentX, oldCurrentY, self.mParams[i], self.mParams[i + 1], self.mParams[i + 2], self.mParams[i + 3], self.mParams[i + 4], oldCurrentX + self.mParams[i + 5],  oldCurrentY + self.mParams[i + 6])
+                    start = srcStart
+                if paramsLen < 2 and (tp in 'Mm' or paramsLen == 0 and tp in 'LTCSQ'):
+                    raise IndexError(f'Missing parameters of {tp}')
+                step = VdPath.COMMAND_STEP_MAP.get(tp)
+                if tp == 'z' or tp == 'Z':
+                    currentX = currentSegmentStartX
+                    currentY = currentSegmentStartY
+                elif tp == 'M':
+                    currentSegmentStartX = params[start]
+                    currentSegmentStartY = params[start + 1]
+                    currentX = params[start + paramsLen - 2]
+                    currentY = params[start + paramsLen - 1]
+                    totalTransform.transform(params, start, params, start, int(paramsLen / 2))
+                elif tp in 'LTCSQ':
+                    if paramsLen == 1:
+                        # Incomplete, e.g. "L5". The value is kept as it is and stands for both
+                        # coordinates of the current point.
+                        currentX = currentY = params[start]
+                    else:
+                        currentX = params[start + paramsLen - 2]
+                        currentY = params[start + paramsLen - 1]
+                        totalTransform.transform(params, start, params, start, int(paramsLen / 2))
+                elif tp == 'm':
+                    if previousType == 'z' or previousType == 'Z':
+                        # Replace 'm' with 'M' to work around a bug in API 21 that is triggered
+                        # when 'm' follows 'z'.
+                        tp = 'M'
+                        params[start] += currentSegmentStartX
+                        params[start + 1] += currentSegmentStartY
+                        currentSegmentStartX = params[start]   # Start a new segment.
+                        currentSegmentStartY = params[start + 1]
+                        for i in range(start + step, start + paramsLen, step):
+                            params[i] += params[i - step]
+                            params[i + 1] += params[i + 1 - step]
+                        currentX = params[start + paramsLen - 2]
+                        currentY = params[start + paramsLen - 1]
+                        totalTransform.transform(params, start, params, start, int(paramsLen / 2))
+                    else:
+                        headLen = 2
+                        currentX += params[start]
+                        currentY += params[start + 1]
+                        currentSegmentStartX = currentX # Start a new segment.
+                        currentSegmentStartY = currentY
+                        if previousType == VdPath.INIT_TYPE:
+                            # 'm' at the start of a path is handled similar to 'M'.
+                            # The coordinates are transformed as absolute.
+                            totalTransform.transform(params, start, params, start, int(headLen / 2))
+                        elif not translationOnly:
+                            cls.deltaTransform(totalTransform, params, start, headLen)
+                        for i in range(start + headLen, start + paramsLen, step):
+                            currentX += params[i]
+                            currentY += params[i + 1]
+                        if not translationOnly:
+                            cls.deltaTransform(totalTransform, params, start + headLen, paramsLen - headLen)
+                elif tp in 'ltcsq':
+                    for i in range(start, start + paramsLen - step + 1, step):
+                        currentX += params[i + step - 2]
+                        currentY += params[i + step - 1]
+                    if not translationOnly:
+                        cls.deltaTransform(totalTransform, params, start, paramsLen)
+                elif tp == 'H':
+                    tp = 'L'
+                    for i in range(paramsLen):
+                        params[start + i * 2] = srcParams[srcStart + i]
+                        params[start + i * 2 + 1] = currentY
+                        currentX = srcParams[srcStart + i]
+                    totalTransform.transform(params, start, params, start, paramsLen)
+                elif tp == 'V':
+                    tp = 'L'
+                    for i in range(paramsLen):
+                        params[start + i * 2] = currentX
+                        params[start + i * 2 + 1] = srcParams[srcStart + i]
+                        currentY = srcParams[srcStart + i]
+                    totalTransform.transform(params, start, params, start, paramsLen)
+                elif tp == 'h':
+                    for i in range(paramsLen):
+                        currentX += srcParams[srcStart + i]
+                    if not translationOnly:
+                        tp = 'l'
+                        for i in range(paramsLen):
+                            params[start + i * 2] = srcParams[srcStart + i]
+                        cls.deltaTransform(totalTransform, params, start, 2 * paramsLen)
+                elif tp == 'v':
+                    for i in range(paramsLen):
+                        currentY += srcParams[srcStart + i]
+                    if not translationOnly:
+                        tp = 'l'
+                        for i in range(paramsLen):
+                            params[start + i * 2 + 1] = srcParams[srcStart + i]
+                        cls.deltaTransform(totalTransform, params, start, 2 * paramsLen)
+                elif tp == 'A':
+                    for i in range(start, start + paramsLen - step + 1, step):
                         # (0:rx 1:ry 2:x-axis-rotation 3:large-arc-flag 4:sweep-flag 5:x 6:y)
-                        # [5, 6]
-                        self.deltaTransform(totalTransform, self.mParams, i + 5, 2)
                         # [0, 1, 2]
-                        self.mParams[i] = ellipseSolver.getMajorAxis()
-                        self.mParams[i + 1] = ellipseSolver.getMinorAxis()
-                        self.mParams[i + 2] = ellipseSolver.getRotationDegree()
-                        if ellipseSolver.getDirectionChanged():
-                            self.mParams[i + 4] = 1 - self.mParams[i + 4]
-            else:
-                raise ValueError(f'Unexpected type {self.mType}')
-            currentPoint.setLocation(currentX, currentY)
-            currentSegmentStartPoint.setLocation(currentSegmentStartX, currentSegmentStartY)
+                        if not translationOnly:
+                            ellipseSolver = EllipseSolver(totalTransform, currentX, currentY, params[i], params[i + 1], params[i + 2], params[i + 3], params[i + 4], params[i + 5], params[i + 6])
+                            params[i] = ellipseSolver.getMajorAxis()
+                            params[i + 1] = ellipseSolver.getMinorAxis()
+                            params[i + 2] = ellipseSolver.getRotationDegree()
+                            if ellipseSolver.getDirectionChanged():
+                                params[i + 4] = 1 - params[i + 4]
+                        # [5, 6]
+                        currentX = params[i + 5]
+                        currentY = params[i + 6]
+                        totalTransform.transform(params, i + 5, params, i + 5, 1)
+                elif tp == 'a':
+                    for i in range(start, start + paramsLen - step + 1, step):
+                        oldCurrentX = currentX
+                        oldCurrentY = currentY
+                        currentX += params[i + 5]
+                        currentY += params[i + 6]
+                        if not translationOnly:
+                            ellipseSolver = EllipseSolver(totalTransform, oldCurrentX, oldCurrentY, params[i], params[i + 1], params[i + 2], params[i + 3], params[i + 4], oldCurrentX + params[i + 5],  oldCurrentY + params[i + 6])
+                            # (0:rx 1:ry 2:x-axis-rotation 3:large-arc-flag 4:sweep-flag 5:x 6:y)
+                            # [5, 6]
+                            cls.deltaTransform(totalTransform, params, i + 5, 2)
+                            # [0, 1, 2]
+                            params[i] = ellipseSolver.getMajorAxis()
+                            params[i + 1] = ellipseSolver.getMinorAxis()
+                            params[i + 2] = ellipseSolver.getRotationDegree()
+                            if ellipseSolver.getDirectionChanged():
+                                params[i + 4] = 1 - params[i + 4]
+                else:
+                    raise ValueError(f'Unexpected type {tp}')
+                if copy:
+                    offsets.append(len(params))
+                newTypes.append(tp)
+                previousType = tp
+            nodes.mTypes = ''.join(newTypes)
+            nodes.mParams = params
+            nodes.mOffsets = offsets
+            nodes.mShared = False
 
         @classmethod
         def isTranslationOnly(cls, totalTransform: AffineTransform) -> bool:
@@ -260,13 +283,8 @@ class VdPath(VdElement):
         # @param offset in number of floats, not points
         # @param paramsLen in number of floats, not points
         @classmethod
-        def deltaTransform(cls, totalTransform: AffineTransform, coordinates: list, offset: int, paramsLen: int):
-            doubleArray = [0.0] * paramsLen
-            for i in range(paramsLen):
-                doubleArray[i] = coordinates[i + offset]
-            totalTransform.deltaTransform(doubleArray, 0, doubleArray, 0, int(paramsLen / 2))
-            for i in range(paramsLen):
-                coordinates[i + offset] = doubleArray[i]
+        def deltaTransform(cls, totalTransform: AffineTransform, coordinates: array, offset: int, paramsLen: int):
+            totalTransform.deltaTransform(coordinates, offset, coordinates, offset, int(paramsLen / 2))
 
     @classmethod
     def applyAlpha(cls, color: int, alpha: float) -> int:
@@ -0,0 +1,21 @@
+import abc
+
+# This is not original class.
+# Abstraction of java.io.Writer that the converted VectorDrawable's content is written to.
+class Writer(metaclass=abc.ABCMeta):
+    @abc.abstractmethod
+    def write(self, out: str):
+        pass
+
+    # Writes any buffered content to the underlying destination.
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+# This is not original class.
+# Element of the compact document tree built by PositionXmlParser. It only keeps what the
+# converter reads: the tag name, the attributes in document order, the child elements, the
+# character data and the line number of the start tag.
+class XmlElement:
+    __slots__ = ('tagName', 'attributes', 'children', 'parentNode', 'text', 'lineNumber', 'index', 'hasPrunedContent')
+
+    # Elements whose content is never converted, but can be big: editor metadata, embedded
+    # documents, scripts and raster images. The parsers keep the element itself, for its id and
+    # for reporting it, but drop everything inside.
+    PRUNED_TAGS = {'metadata', 'sodipodi:namedview', 'foreignObject', 'script', 'image'}
+
+    # @param index the position of the element in document order, for recovering its line number
+    #     if it isn't given
+    def __init__(self, tagName: str, attributes: dict, parentNode: XmlElement, lineNumber: int, index: int = None):
+        self.tagName = tagName
+        self.attributes = attributes
+        self.children = []
+        self.parentNode = parentNode
+        # Character data of the element, without whitespace-only runs.
+        self.text = ''
+        # None if the parser didn't record it, see PositionXmlParser.setLazyLineNumbers.
+        self.lineNumber = lineNumber
+        self.index = index
+        # Whether the parser dropped child elements or text of this element.
+        self.hasPrunedContent = False
+
+    # Returns the value of the given attribute, or an empty string if the attribute does not
+    # exist.
+    def getAttribute(self, name: str) -> str:
+        return self.attributes.get(name, '')
+
+    def hasChildNodes(self) -> bool:
+        return bool(self.children) or bool(self.text) or self.hasPrunedContent
+
+    # Returns the descendants of this element with the given tag name in document order,
+    # including the element itself.
+    def getElementsByTagName(self, tagName: str) -> list[XmlElement]:
+        result = []
+        stack = [self]
+        while stack:
+            element = stack.pop()
+            if element.tagName == tagName:
+                result.append(element)
+            stack.extend(reversed(element.children))
+        return result
+
+    # Returns a copy of this element with only the given attributes, and with neither children
+    # nor a parent, so that holding on to it doesn't keep the rest of the document alive. The
+    # attributes are shared if none of them is dropped.
+    def detach(self, names: set[str]) -> XmlElement:
+        attributes = self.attributes
+        if not attributes.keys() <= names:
+            attributes = {name: value for name, value in attributes.items() if name in names}
+        return XmlElement(self.tagName, attributes, None, self.lineNumber, self.index)
+
+    def __repr__(self) -> str:
+        if self.lineNumber is None:
+            return f'<{self.tagName}>'
+        return f'<{self.tagName}> at line {self.lineNumber}'
+
+# This is not original class.
+# Parsed document. The document element is None until the parser saw the first start tag.
+class XmlDocument:
+    __slots__ = ('documentElement', 'ignoredIds')
+
+    def __init__(self):
+        self.documentElement = None
+        # Ids of elements within pruned content.
+        self.ignoredIds = set()
+
+    def getElementsByTagName(self, tagName: str) -> list[XmlElement]:
+        if self.documentElement is None:
+            return []
+        return self.documentElement.getElementsByTagName(tagName)
@@ -1,10 +1,44 @@
+import asyncio
+import contextlib
+import gzip
+import io
+import json
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+import shutil
+import socket
+import sqlite3
+import subprocess
+import tarfile
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
 import unittest
-
+from unittest import mock
+
+from AffineTransform import AffineTransform
+from AsyncConverter import AsyncConverter
+from AtomicFileWriter import AtomicFileWriter
+from BuildManifest import BuildManifest
+from BufferedFileWriter import BufferedFileWriter
+from ConversionCache import ConversionCache
+from ConversionDaemon import ConversionClient, ConversionDaemon
+from ConversionResult import ConversionResult
 from OutputStreamWriter import OutputStreamWriter
+from Path2D import Path2DF
+from PathBuilder import PathBuilder
+from PathParser import PathParser
+from PersistentWorker import PersistentWorker
+from PositionXmlParser import PositionXmlParser
+from SqliteBatch import SqliteBatch
+from StreamingConverter import StreamingConverter
 from Svg2Vector import Svg2Vector
+from Svg2VectorBatch import Svg2VectorBatch
+from Svg2VectorCli import Svg2VectorCli
+from SvgProbe import SvgProbe
+from VdNodeRender import VdNodeRender
+from VdPath import VdPath
 
 class SvgXmlCompare:
     @classmethod
@@ -176,6 +210,14 @@ class Svg2VectorTest(unittest.TestCase):
         """
         SvgXmlCompare.testSvgXml('strokeGradient', self)
 
+    def testGradientBounds(self):
+        """
+        Test: Gradients of transformed shapes, of a <use> copy and of an arc
+        Coverage: SvgLeafNode.getBoundingBox, SvgLeafNode.transformIfNeeded
+        Expected: Gradient coordinates are taken from the rounded path data
+        """
+        SvgXmlCompare.testSvgXml('gradientBounds', self)
+
     def testRelativePath(self):
         """
         Test: Path with relative commands (c, s) directly in d attribute
@@ -184,5 +226,738 @@ class Svg2VectorTest(unittest.TestCase):
         """
         SvgXmlCompare.testSvgXml('relativePath', self)
 
+class PathParserTest(unittest.TestCase):
+    def parse(self, value: str, mode: PathParser.ParseMode = PathParser.ParseMode.SVG) -> list:
+        nodes = PathParser.parsePath(value, mode)
+        return [(nodes.getType(i), list(nodes.getParams(i))) for i in range(len(nodes))]
+
+    def testImplicitSeparators(self):
+        self.assertEqual([('M', [1.0, -2.0]), ('l', [0.5, 0.5, -0.001, 30000.0, 1.5, -5.0]), ('z', [])],
+                         self.parse('M1-2l.5.5-1e-3 3e4,1.5,,-5z'))
+        # Not a command at the start, and what only the character scan reads, e.g. tabs that
+        # float() strips.
+        self.assertEqual([('M', [0.0, 0.0]), ('L', [1.0, 2.0])], self.parse('L1,\t2'))
+        self.assertEqual([('M', [0.0, 0.0]), ('1', [2.0])], self.parse('1 2'))
+        self.assertEqual([('M', [1.0, 150000.0, 0.5])], self.parse('M1 1.5e5.5'))
+        with self.assertRaises(Exception):
+            self.parse('M1+2')
+
+    def testArcFlags(self):
+        self.assertEqual([('M', [0.0, 0.0]), ('a', [1.0, 2.0, 0.0, 1.0, 1.0, 2.0, 2.0, 3.0, 4.0, 0.0, 0.0, 1.0, -5.0, 6.0])],
+                         self.parse('a-1-2 0 112 2 3,4 0,01-5 6'))
+        # Vector drawables may write flags as floats.
+        self.assertEqual([('M', [0.0, 0.0]), ('a', [1.0, 1.0, 0.0, 1.0, 0.0, 2.0, 2.0])],
+                         self.parse('a1 1 0 1.0 0.0 2 2', PathParser.ParseMode.ANDROID))
+
+    def testCache(self):
+        self.addCleanup(PathParser.setCacheSize, 0)
+        PathParser.setCacheSize(2)
+        first = PathParser.parsePath('M1 2h3', PathParser.ParseMode.SVG)
+        second = PathParser.parsePath('M1 2h3', PathParser.ParseMode.SVG)
+        self.assertIs(first.mParams, second.mParams)
+        # Transforming copies the shared parameters first.
+        VdPath.Node.transform(AffineTransform(1, 0, 0, 1, 10, 0), first)
+        self.assertEqual([11.0, 2.0], list(first.getParams(0)))
+        self.assertEqual([1.0, 2.0], list(second.getParams(0)))
+        self.assertEqual([1.0, 2.0], list(PathParser.parsePath('M1 2h3', PathParser.ParseMode.SVG).getParams(0)))
+        PathParser.parsePath('M1 2h3', PathParser.ParseMode.ANDROID)
+        PathParser.parsePath('M5 5', PathParser.ParseMode.SVG)
+        stats = PathParser.getCacheStats()
+        self.assertEqual((2, 2, 3, 1), (stats['size'], stats['hits'], stats['misses'], stats['evictions']))
+        PathParser.setCacheSize(0)
+        self.assertIsNone(PathParser.getCacheStats())
+
+class VdPathTest(unittest.TestCase):
+    def testTransformIncompleteCommands(self):
+        nodes = PathParser.parsePath('M0 0L5L7 7T3z', PathParser.ParseMode.SVG)
+        VdPath.Node.transform(AffineTransform(1, 0, 0, 1, 1, 2), nodes)
+        self.assertEqual([('M', [1.0, 2.0]), ('L', [5.0]), ('L', [8.0, 9.0]), ('T', [3.0]), ('z', [])],
+                         [(nodes.getType(i), list(nodes.getParams(i))) for i in range(len(nodes))])
+        with self.assertRaises(IndexError):
+            VdPath.Node.transform(AffineTransform(1, 0, 0, 1, 1, 2), PathParser.parsePath('M1z m5', PathParser.ParseMode.SVG))
+
+    def testRenderIncompleteCommands(self):
+        # The parameters of the next command must not be taken for the missing ones.
+        for value in ['M0 0L5L7 7', 'M0 0C1 2 3z']:
+            with self.assertRaises(IndexError):
+                VdNodeRender.createPath(PathParser.parsePath(value, PathParser.ParseMode.SVG), Path2DF())
+
+class PathBuilderTest(unittest.TestCase):
+    def testNodes(self):
+        builder = PathBuilder().absoluteMoveTo(1, 2.5).relativeArcTo(3, 3, False, True, False, 6, 0).relativeClose()
+        nodes = builder.toNodes()
+        self.assertEqual('Maz', nodes.mTypes)
+        self.assertEqual([1.0, 2.5], list(nodes.getParams(0)))
+        self.assertEqual([3.0, 3.0, 0.0, 1.0, 0.0, 6.0, 0.0], list(nodes.getParams(1)))
+        self.assertEqual('M1,2.5a3,3,0,1,0,6,0z', builder.toString())
+        with self.assertRaises(ValueError):
+            PathBuilder().absoluteLineTo(float('nan'), 0)
+
+    def testShapeWithSmallValues(self):
+        # The string of a shape used to be parsed back, which failed for numbers like 1e-05.
+        svg = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 10 10"><rect x="0.00001" y="1" width="5" height="5"/></svg>'
+        self.assertIn('android:pathData="M0,1h5v5h-5z"', Svg2Vector.convertString(svg))
+
+    def testNegativeArcRadii(self):
+        # Like PathParser, arcs take the absolute radii, e.g. of a rect with a negative width.
+        svg = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100"><rect x="50" y="10" width="-20" height="30" rx="3"/></svg>'
+        self.assertIn('android:pathData="M40,10L40,10A10,3 0,0 1,30 13L30,37A10,3 0,0 1,40 40L40,40A10,3 0,0 1,50 37L50,13A10,3 0,0 1,40 10z"',
+                      Svg2Vector.convertString(svg))
+        self.assertEqual([2.0, 3.0, 0.0, 0.0, 1.0, 4.0, 5.0], list(PathBuilder().relativeArcTo(-2, -3, False, False, True, 4, 5).toNodes().getParams(0)))
+
+class SvgLeafNodeTest(unittest.TestCase):
+    def testPathParsedOnce(self):
+        # The gradients of fill and stroke take their bounding box from the transformed and
+        # rounded geometry instead of parsing the path data again.
+        svg = ('<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100"><defs><linearGradient id="g">'
+               '<stop offset="0" stop-color="red"/><stop offset="1" stop-color="blue"/></linearGradient></defs>'
+               '<path transform="translate(10 20)" fill="url(#g)" stroke="url(#g)" d="M0 0h30v40z"/></svg>')
+        with mock.patch.object(PathParser, 'parsePath', wraps=PathParser.parsePath) as parsePath:
+            xml = Svg2Vector.convertString(svg)
+        self.assertEqual(['M0 0h30v40z'], [call.args[0] for call in parsePath.call_args_list])
+        self.assertIn('android:pathData="M10,20h30v40z"', xml)
+        self.assertEqual(2, xml.count('android:startX="10"'))
+        self.assertEqual(2, xml.count('android:endX="40"'))
+
+    def testCachedPathNotRounded(self):
+        self.addCleanup(PathParser.setCacheSize, 0)
+        PathParser.setCacheSize(10)
+        svg = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100"><path d="M0.123456 1h2z"/></svg>'
+        self.assertIn('android:pathData="M0.12,1h2z"', Svg2Vector.convertString(svg))
+        nodes = PathParser.parsePath('M0.123456 1h2z', PathParser.ParseMode.SVG)
+        self.assertEqual([0.123456, 1.0], list(nodes.getParams(0)))
+
+class Svg2VectorMemoryTest(unittest.TestCase):
+    def readTestFiles(self, name: str) -> tuple[bytes, str]:
+        test_dir = os.path.dirname(__file__)
+        with open(os.path.join(test_dir, f'{name}.svg'), 'rb') as svg, open(os.path.join(test_dir, f'{name}.xml'), 'r') as xml:
+            return svg.read(), xml.read()
+
+    def testConvertBytes(self):
+        svg, expected = self.readTestFiles('linearGradient')
+        self.assertMultiLineEqual(expected, Svg2Vector.convertBytes(svg))
+
+    def testConvertString(self):
+        svg, expected = self.readTestFiles('transform')
+        self.assertMultiLineEqual(expected, Svg2Vector.convertString(svg.decode('utf-8')))
+
+    def testConvertStream(self):
+        svg, expected = self.readTestFiles('clipPath')
+        self.assertMultiLineEqual(expected, Svg2Vector.convertStream(io.BytesIO(svg)))
+
+    def testConvertPipe(self):
+        svg, expected = self.readTestFiles('group')
+        with subprocess.Popen([sys.executable, '-c', 'import sys; sys.stdout.buffer.write(sys.stdin.buffer.read())'],
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE) as process:
+            threading.Thread(target=lambda: (process.stdin.write(svg), process.stdin.close())).start()
+            result = Svg2Vector.convert(process.stdout, fileName='group.svg')
+        self.assertMultiLineEqual(expected, result.getXml())
+
+    def testConvertTarMember(self):
+        svg, expected = self.readTestFiles('use')
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode='w') as tar:
+            info = tarfile.TarInfo('icons/use.svg')
+            info.size = len(svg)
+            tar.addfile(info, io.BytesIO(svg))
+        archive.seek(0)
+        with tarfile.open(fileobj=archive) as tar:
+            for member in tar:
+                # Falls back to the tree, with the blocks read so far and the rest of the member.
+                result = StreamingConverter.convert(tar.extractfile(member), fileName=member.name)
+        self.assertMultiLineEqual(expected, result.getXml())
+
+    def testConvertSvgz(self):
+        svg, expected = self.readTestFiles('circle')
+        # Two gzip members, as written by appending to a .svgz.
+        data = gzip.compress(svg[:100]) + gzip.compress(svg[100:])
+        self.assertMultiLineEqual(expected, Svg2Vector.convertBytes(data))
+        self.assertMultiLineEqual(expected, StreamingConverter.convert(io.BytesIO(data)).getXml())
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'circle.svgz')
+            with open(path, 'wb') as file:
+                file.write(data)
+            self.assertMultiLineEqual(expected, Svg2Vector.convert(path).getXml())
+        with self.assertRaises(Exception):
+            Svg2Vector.convertBytes(gzip.compress(svg)[:-8])
+
+    def testDocumentReleased(self):
+        svg, expected = self.readTestFiles('use')
+        self.addCleanup(PositionXmlParser.setLazyLineNumbers, False)
+        for lazy in [False, True]:
+            PositionXmlParser.setLazyLineNumbers(lazy)
+            svgTree = Svg2Vector.parseString(svg, 'use.svg')
+            nodes = [svgTree.getRoot()]
+            while nodes:
+                node = nodes.pop()
+                element = node.getDocumentElement()
+                self.assertIsNone(element.parentNode)
+                self.assertFalse(element.hasChildNodes())
+                nodes.extend(getattr(node, 'mChildren', []))
+            self.assertMultiLineEqual(expected, Svg2Vector.convertBytes(svg))
+        # The detached elements still know their line.
+        svg, expected = self.readTestFiles('invalidColorGradient')
+        errors = []
+        self.assertMultiLineEqual(expected, Svg2Vector.convertBytes(svg, errors))
+        self.assertEqual(['WARNING @ line3: Unsupported color value notacolor'], errors)
+
+    def testConvertErrors(self):
+        svg, expected = self.readTestFiles('invalidColorGradient')
+        errors = []
+        self.assertMultiLineEqual(expected, Svg2Vector.convertBytes(svg, errors))
+        self.assertEqual(['WARNING @ line3: Unsupported color value notacolor'], errors)
+
+class PositionXmlParserTest(unittest.TestCase):
+    SVG = '<svg viewBox="0 0 24 24" width="24">\n  <style><![CDATA[.a{fill:red}]]></style>\n  <g>\n    <path d="M0 0"/>\n  </g>\n</svg>\n'
+
+    def assertDocument(self, doc):
+        root = doc.documentElement
+        self.assertEqual(['viewBox', 'width'], list(root.attributes))
+        style, group = root.children
+        self.assertEqual('.a{fill:red}', style.text)
+        self.assertIs(root, group.parentNode)
+        self.assertEqual([1, 2, 3, 4], [e.lineNumber for e in [root, style, group, group.children[0]]])
+        self.assertEqual('M0 0', doc.getElementsByTagName('path')[0].getAttribute('d'))
+        self.assertEqual('', root.getAttribute('height'))
+
+    def testParseString(self):
+        self.assertDocument(PositionXmlParser.parseString(self.SVG))
+
+    def testParseStreamInChunks(self):
+        class ChunkedStream:
+            def __init__(self, data: bytes):
+                self.stream = io.BytesIO(data)
+
+            def read(self, size: int) -> bytes:
+                return self.stream.read(min(size, 5))
+
+        self.assertDocument(PositionXmlParser.parse(ChunkedStream(self.SVG.encode('utf-8'))))
+        self.assertDocument(PositionXmlParser.parse(io.StringIO(self.SVG)))
+
+    def testBackends(self):
+        self.assertDocument(PositionXmlParser.parseString(self.SVG, PositionXmlParser.BACKEND_EXPAT))
+        # Without lxml, this falls back to expat.
+        self.assertDocument(PositionXmlParser.parseString(self.SVG, PositionXmlParser.BACKEND_LXML))
+        self.assertDocument(PositionXmlParser.parse(io.BytesIO(self.SVG.encode('utf-8')), PositionXmlParser.BACKEND_LXML))
+        with self.assertRaises(ValueError):
+            PositionXmlParser.getBackend('sax')
+
+    def testPrunedContent(self):
+        svg = ('<svg xmlns="http://www.w3.org/2000/svg" xmlns:sodipodi="http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd" viewBox="0 0 24 24">\n'
+               '  <metadata><rdf id="rdf"><title>t</title></rdf></metadata>\n'
+               '  <sodipodi:namedview id="view"/>\n'
+               '  <script>alert(1)</script>\n'
+               '  <foreignObject><svg><path id="inner" d="M0 0h1"/></svg></foreignObject>\n'
+               '  <path d="M1 1h10v10z"/>\n'
+               '</svg>\n')
+        for backend in [PositionXmlParser.BACKEND_EXPAT, PositionXmlParser.BACKEND_LXML]:
+            doc = PositionXmlParser.parseString(svg, backend)
+            metadata, namedview, script, foreignObject, path = doc.documentElement.children
+            self.assertEqual(['metadata', 'sodipodi:namedview', 'script', 'foreignObject'], [e.tagName for e in [metadata, namedview, script, foreignObject]])
+            self.assertEqual(([], ''), (script.children, script.text))
+            self.assertTrue(script.hasChildNodes() and foreignObject.hasChildNodes())
+            self.assertFalse(namedview.hasChildNodes())
+            self.assertEqual({'rdf', 'inner'}, doc.ignoredIds)
+            self.assertEqual(6, path.lineNumber)
+        # The nested <svg> is gone, and the unsupported elements are still reported.
+        self.assertEqual(['<script> is not supported', '<foreignObject> is not supported'],
+                         [m.message for m in Svg2Vector.convertData(svg).getMessages()])
+        PositionXmlParser.setLazyLineNumbers(True)
+        try:
+            self.assertEqual([4, 5], [m.line for m in Svg2Vector.convertData(svg).getMessages()])
+        finally:
+            PositionXmlParser.setLazyLineNumbers(False)
+
+    def testLazyLineNumbers(self):
+        PositionXmlParser.setLazyLineNumbers(True)
+        try:
+            doc = PositionXmlParser.parseString(self.SVG)
+            self.assertIsNone(doc.documentElement.lineNumber)
+            PositionXmlParser.assignLineNumbers(doc.documentElement, PositionXmlParser.scanLineNumbers(self.SVG))
+            self.assertDocument(doc)
+            # Recovered by scanning the file again when the message is logged.
+            result = Svg2Vector.convert(os.path.join(os.path.dirname(__file__), 'invalidColorGradient.svg'))
+            self.assertEqual([3], [m.line for m in result.getMessages()])
+            # Or the data held in memory.
+            self.assertIs(self.SVG, Svg2Vector.parseString(self.SVG).mSourceData)
+        finally:
+            PositionXmlParser.setLazyLineNumbers(False)
+        # Which isn't kept otherwise.
+        self.assertIsNone(Svg2Vector.parseString(self.SVG).mSourceData)
+
+class SvgProbeTest(unittest.TestCase):
+    def testProbe(self):
+        probe = SvgProbe.probe(os.path.join(os.path.dirname(__file__), 'android.svg'))
+        result = Svg2Vector.convert(os.path.join(os.path.dirname(__file__), 'android.svg'))
+        self.assertEqual((result.width, result.height), (probe.width, probe.height))
+        self.assertEqual((result.viewportWidth, result.viewportHeight), tuple(probe.viewBox[2:]))
+        self.assertTrue(probe.isConvertible() and probe.hasViewBox and probe.hasNamespace)
+        self.assertFalse(probe.compressed)
+
+    def testProbeWithoutViewBox(self):
+        # Only the start tag is read; the unclosed rest of the document doesn't matter.
+        probe = SvgProbe.probe(gzip.compress(b'<svg width="10pt" height="20"><path d="M0 0'))
+        self.assertTrue(probe.compressed)
+        self.assertFalse(probe.hasViewBox)
+        self.assertEqual([0.0, 0.0, 10.0, 20.0], probe.viewBox)
+        self.assertEqual((10.0, 20.0), (probe.width, probe.height))
+        self.assertFalse(SvgProbe.probe(io.StringIO('<html/>')).isConvertible())
+
+class ConversionResultTest(unittest.TestCase):
+    def testConvert(self):
+        svgPath = os.path.join(os.path.dirname(__file__), 'invalidColorGradient.svg')
+        result = Svg2Vector.convert(svgPath)
+        with open(os.path.join(os.path.dirname(__file__), 'invalidColorGradient.xml'), 'r') as file:
+            self.assertMultiLineEqual(file.read(), result.getXml())
+        self.assertTrue(result.hasOutput)
+        self.assertFalse(result.hasErrors())
+        self.assertEqual([(3, 'Unsupported color value notacolor')], [(m.line, m.message) for m in result.getMessages()])
+        self.assertEqual(Svg2Vector.parseSvgToXml(svgPath, OutputStreamWriter()), result.getErrorMessage())
+        self.assertEqual({'parse', 'extract', 'flatten', 'write'}, set(result.getPhaseTimes()))
+
+        restored = ConversionResult.fromDict(json.loads(json.dumps(result.toDict())))
+        self.assertEqual(result.getErrorMessage(), restored.getErrorMessage())
+        self.assertEqual((result.width, result.viewportHeight), (restored.width, restored.viewportHeight))
+
+    def testConvertToFileWriter(self):
+        stream = io.BytesIO()
+        with BufferedFileWriter(stream) as writer:
+            result = Svg2Vector.convert(os.path.join(os.path.dirname(__file__), 'rect.svg'), writer)
+        self.assertIsNone(result.getXml())
+        self.assertTrue(result.hasOutput)
+        self.assertTrue(stream.getvalue())
+
+class StreamingConverterTest(unittest.TestCase):
+    def convert(self, name: str) -> ConversionResult:
+        return StreamingConverter.convert(os.path.join(os.path.dirname(__file__), f'{name}.svg'))
+
+    def testSinglePass(self):
+        for name in ['circle', 'group', 'transform', 'polygon', 'line', 'displayNone', 'strokeAttributes']:
+            result = self.convert(name)
+            with open(os.path.join(os.path.dirname(__file__), f'{name}.xml'), 'r') as file:
+                self.assertMultiLineEqual(file.read(), result.getXml(), name)
+            self.assertIn('stream', result.getPhaseTimes())
+
+    def testFallback(self):
+        for name in ['use', 'linearGradient', 'clipPath', 'styleClass']:
+            result = self.convert(name)
+            with open(os.path.join(os.path.dirname(__file__), f'{name}.xml'), 'r') as file:
+                self.assertMultiLineEqual(file.read(), result.getXml(), name)
+            self.assertNotIn('stream', result.getPhaseTimes())
+
+    def testStream(self):
+        with open(os.path.join(os.path.dirname(__file__), 'rect.svg'), 'rb') as file:
+            svg = file.read()
+        stream = io.BytesIO(svg)
+        self.assertEqual(Svg2Vector.convertData(svg).getXml(), StreamingConverter.convert(stream).getXml())
+
+    def testCompressedStreamFallback(self):
+        # The fallback continues decompressing where the single pass stopped, with more than a
+        # block of content left.
+        shapes = ''.join(f'<path d="M{i} {i}h10v10h-10z"/>\n' for i in range(3000))
+        svg = ('<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100"><defs/>\n' + shapes + '</svg>').encode()
+        result = StreamingConverter.convert(io.BytesIO(gzip.compress(svg)))
+        self.assertEqual(Svg2Vector.convertData(svg).getXml(), result.getXml())
+        self.assertNotIn('stream', result.getPhaseTimes())
+
+    def testMessages(self):
+        data = b'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24">\n<text x="1">a</text>\n</svg>'
+        result = StreamingConverter.convertData(data)
+        self.assertEqual(Svg2Vector.convertData(data).getErrorMessage(), result.getErrorMessage())
+        self.assertFalse(result.getXml())
+        self.assertTrue(result.hasErrors())
+
+    def testErrors(self):
+        # Malformed input is reported by the tree based conversion, failures of the converter
+        # itself are not hidden by it.
+        for data in [b'<svg', gzip.compress(b'<svg xmlns="http://www.w3.org/2000/svg"/>')[:-4]]:
+            with self.assertRaises(Exception) as expected:
+                Svg2Vector.convertData(data)
+            with self.assertRaises(Exception) as actual:
+                StreamingConverter.convertData(data)
+            self.assertEqual(str(expected.exception), str(actual.exception))
+        with mock.patch.object(StreamingConverter, 'writeLeaf', side_effect=AttributeError('writeLeaf')):
+            with self.assertRaises(AttributeError):
+                StreamingConverter.convertData(b'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 2 2"><path d="M0 0h1"/></svg>')
+
+class WriterTest(unittest.TestCase):
+    def convertToString(self, name: str) -> str:
+        w = OutputStreamWriter()
+        Svg2Vector.parseSvgToXml(os.path.join(os.path.dirname(__file__), f'{name}.svg'), w)
+        return w.toString()
+
+    def testOutputStreamWriterJoinsChunks(self):
+        w = OutputStreamWriter()
+        self.assertEqual('', w.toString())
+        for token in ['<path', os.linesep, '/>']:
+            w.write(token)
+        self.assertEqual(f'<path{os.linesep}/>', w.toString())
+        w.write('x')
+        self.assertEqual(f'<path{os.linesep}/>x', w.toString())
+
+    def testBufferedFileWriterBinary(self):
+        stream = io.BytesIO()
+        with BufferedFileWriter(stream) as writer:
+            Svg2Vector.parseSvgToXml(os.path.join(os.path.dirname(__file__), 'studio.svg'), writer)
+        self.assertMultiLineEqual(self.convertToString('studio'), stream.getvalue().decode('utf-8'))
+
+    def testBufferedFileWriterPath(self):
+        tempDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempDir)
+        outputPath = os.path.join(tempDir, 'android.xml')
+        with BufferedFileWriter(outputPath) as writer:
+            Svg2Vector.parseSvgToXml(os.path.join(os.path.dirname(__file__), 'android.svg'), writer)
+        with open(outputPath, 'r', newline='') as file:
+            self.assertMultiLineEqual(self.convertToString('android'), file.read())
+
+    def testAtomicFileWriterSkipsUnchanged(self):
+        tempDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempDir)
+        outputPath = os.path.join(tempDir, 'out', 'line.xml')
+        svgPath = os.path.join(os.path.dirname(__file__), 'line.svg')
+        with AtomicFileWriter(outputPath) as writer:
+            Svg2Vector.parseSvgToXml(svgPath, writer)
+        self.assertTrue(writer.isChanged())
+        os.utime(outputPath, ns=(0, 0))
+        with AtomicFileWriter(outputPath) as writer:
+            Svg2Vector.parseSvgToXml(svgPath, writer)
+        self.assertFalse(writer.isChanged())
+        self.assertEqual(0, os.stat(outputPath).st_mtime_ns)
+        self.assertTrue(AtomicFileWriter.update(outputPath, b'<vector/>'))
+        self.assertEqual(['line.xml'], os.listdir(os.path.dirname(outputPath)))
+
+class Svg2VectorBatchTest(unittest.TestCase):
+    NAMES = ['circle', 'group', 'linearGradient', 'path', 'rect', 'use']
+
+    def setUp(self):
+        self.testDir = os.path.dirname(__file__)
+        self.tempDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tempDir)
+        self.inputDir = os.path.join(self.tempDir, 'input')
+        os.makedirs(os.path.join(self.inputDir, 'nested'))
+        for i, name in enumerate(self.NAMES):
+            subDir = 'nested' if i % 2 else ''
+            shutil.copy(os.path.join(self.testDir, f'{name}.svg'), os.path.join(self.inputDir, subDir, f'{name}.svg'))
+
+    def assertConverted(self, name: str, outputPath: str):
+        with open(os.path.join(self.testDir, f'{name}.xml'), 'r') as expected, open(outputPath, 'r') as actual:
+            self.assertMultiLineEqual(expected.read(), actual.read())
+
+    def testMirroredOutputTree(self):
+        outputDir = os.path.join(self.tempDir, 'output')
+        results = Svg2VectorBatch.convert([self.inputDir], outputDir, maxWorkers=2, chunkSize=2)
+        self.assertEqual(len(self.NAMES), len(results))
+        for i, name in enumerate(self.NAMES):
+            subDir = 'nested' if i % 2 else ''
+            self.assertConverted(name, os.path.join(outputDir, subDir, f'{name}.xml'))
+
+    def testOutputNextToSource(self):
+        results = Svg2VectorBatch.convert([os.path.join(self.inputDir, '**', '*.svg')], maxWorkers=1)
+        self.assertEqual(len(self.NAMES), len(results))
+        for result in results:
+            self.assertTrue(result.hasOutput())
+            self.assertEqual(os.path.splitext(result.inputPath)[0] + '.xml', result.outputPath)
+            self.assertConverted(os.path.splitext(os.path.basename(result.inputPath))[0], result.outputPath)
+
+    def testCachedConversion(self):
+        cacheDir = os.path.join(self.tempDir, 'cache')
+        outputDir = os.path.join(self.tempDir, 'output')
+        Svg2VectorBatch.convert([self.inputDir], outputDir, maxWorkers=1, cacheDir=cacheDir)
+        shutil.rmtree(outputDir)
+        cache = ConversionCache.getInstance(cacheDir)
+        hits = cache.getHitCount()
+        results = Svg2VectorBatch.convert([self.inputDir], outputDir, maxWorkers=1, cacheDir=cacheDir)
+        self.assertEqual(hits + len(self.NAMES), cache.getHitCount())
+        # Cache hits didn't spend any time converting.
+        self.assertEqual(0, sum(Svg2VectorBatch.getPhaseTimes(results).values()))
+        for i, name in enumerate(self.NAMES):
+            subDir = 'nested' if i % 2 else ''
+            self.assertConverted(name, os.path.join(outputDir, subDir, f'{name}.xml'))
+
+    def testCacheEviction(self):
+        cache = ConversionCache(os.path.join(self.tempDir, 'cache'), maxBytes=1000)
+        keys = [ConversionCache.makeKey(str(i).encode('ascii')) for i in range(3)]
+        for i, key in enumerate(keys):
+            cache.put(key, ConversionResult('x' * 400, [], True, 24, 24, 24, 24, {}))
+            # Make the order of use independent of the file system's timestamp resolution.
+            os.utime(cache.getEntryPath(key), (i, i))
+        self.assertIsNone(cache.get(keys[0]))
+        self.assertEqual('x' * 400, cache.get(keys[2]).xml)
+        # Trimmed below the bound, so that the next put doesn't have to scan again.
+        self.assertLessEqual(cache.mTotalBytes, 1000 * ConversionCache.LOW_WATER_MARK)
+        with mock.patch.object(cache, 'trim') as trim:
+            cache.put(keys[0], ConversionResult('x', [], True, 24, 24, 24, 24, {}))
+        trim.assert_not_called()
+        self.assertNotEqual(ConversionCache.makeKey(b'1', {'a': 1}), ConversionCache.makeKey(b'1'))
+
+    def testErrorMessages(self):
+        brokenPath = os.path.join(self.inputDir, 'broken.svg')
+        with open(brokenPath, 'w') as file:
+            file.write('<svg')
+        results = Svg2VectorBatch.convert([brokenPath])
+        self.assertFalse(results[0].hasOutput())
+        self.assertTrue(results[0].errorMessage.startswith('EXCEPTION in parsing broken.svg'))
+
+    def testMissingInputs(self):
+        missingPath = os.path.join(self.tempDir, 'missing.svg')
+        pattern = os.path.join(self.tempDir, 'none', '*.svg')
+        results = Svg2VectorBatch.convert([os.path.join(self.inputDir, 'circle.svg'), missingPath, pattern])
+        self.assertEqual([True, False, False], [result.hasOutput() for result in results])
+        self.assertEqual([missingPath, pattern], [result.inputPath for result in results[1:]])
+        self.assertIn(missingPath, results[1].errorMessage)
+        with contextlib.redirect_stderr(io.StringIO()) as stderr:
+            self.assertEqual(1, Svg2VectorCli.main([missingPath]))
+        self.assertIn('Converted 0 of 1 files', stderr.getvalue())
+
+    def testOutputCollision(self):
+        # icon.svg and icon.svgz would both be written to icon.xml.
+        with open(os.path.join(self.testDir, 'ellipse.svg'), 'rb') as file:
+            svgzPath = os.path.join(self.inputDir, 'circle.svgz')
+            with gzip.open(svgzPath, 'wb') as compressed:
+                compressed.write(file.read())
+        outputDir = os.path.join(self.tempDir, 'output')
+        results = Svg2VectorBatch.convert([self.inputDir], outputDir, maxWorkers=1)
+        self.assertEqual(len(self.NAMES) + 1, len(results))
+        self.assertEqual(svgzPath, results[-1].inputPath)
+        self.assertFalse(results[-1].hasOutput())
+        self.assertIn(os.path.join(self.inputDir, 'circle.svg'), results[-1].errorMessage)
+        self.assertConverted('circle', os.path.join(outputDir, 'circle.xml'))
+        # The same file given twice is not a collision.
+        circlePath = os.path.join(self.inputDir, 'circle.svg')
+        results = Svg2VectorBatch.convert([circlePath, os.path.join(self.inputDir, '.', 'circle.svg')], outputDir, maxWorkers=1)
+        self.assertTrue(all(result.hasOutput() for result in results))
+
+    def testIncrementalRebuild(self):
+        outputDir = os.path.join(self.tempDir, 'output')
+        manifestPath = os.path.join(self.tempDir, 'manifest.json')
+        results = Svg2VectorBatch.convert([self.inputDir], outputDir, maxWorkers=1, manifestPath=manifestPath)
+        self.assertFalse(any(result.upToDate for result in results))
+
+        results = Svg2VectorBatch.convert([self.inputDir], outputDir, maxWorkers=1, manifestPath=manifestPath)
+        self.assertTrue(all(result.upToDate and result.hasOutput() for result in results))
+
+        # Touching without changing the content is not a change.
+        circlePath = os.path.join(self.inputDir, 'circle.svg')
+        os.utime(circlePath, ns=(0, 0))
+        # A changed input and a deleted output are converted again.
+        shutil.copy(os.path.join(self.testDir, 'ellipse.svg'), os.path.join(self.inputDir, 'rect.svg'))
+        os.unlink(os.path.join(outputDir, 'linearGradient.xml'))
+        os.unlink(os.path.join(self.inputDir, 'nested', 'use.svg'))
+        results = Svg2VectorBatch.convert([self.inputDir], outputDir, maxWorkers=1, manifestPath=manifestPath)
+        converted = sorted(os.path.basename(result.inputPath) for result in results if not result.upToDate)
+        self.assertEqual(['linearGradient.svg', 'rect.svg'], converted)
+        self.assertConverted('ellipse', os.path.join(outputDir, 'rect.xml'))
+        self.assertConverted('linearGradient', os.path.join(outputDir, 'linearGradient.xml'))
+        self.assertFalse(os.path.exists(os.path.join(outputDir, 'nested', 'use.xml')))
+        self.assertEqual(0, BuildManifest(manifestPath).getEntry(circlePath).mtime)
+
+    def testIncrementalRebuildOfSubset(self):
+        outputDir = os.path.join(self.tempDir, 'output')
+        manifestPath = os.path.join(self.tempDir, 'manifest.json')
+        Svg2VectorBatch.convert([self.inputDir], outputDir, maxWorkers=1, manifestPath=manifestPath)
+        # Inputs outside of a later run keep their outputs, only those of deleted inputs go.
+        os.unlink(os.path.join(self.inputDir, 'nested', 'use.svg'))
+        results = Svg2VectorBatch.convert([os.path.join(self.inputDir, 'nested')], os.path.join(outputDir, 'nested'),
+                                          maxWorkers=1, manifestPath=manifestPath)
+        self.assertTrue(all(result.upToDate for result in results))
+        self.assertFalse(os.path.exists(os.path.join(outputDir, 'nested', 'use.xml')))
+        for i, name in enumerate(self.NAMES[:-1]):
+            subDir = 'nested' if i % 2 else ''
+            self.assertConverted(name, os.path.join(outputDir, subDir, f'{name}.xml'))
+        self.assertIsNotNone(BuildManifest(manifestPath).getEntry(os.path.join(self.inputDir, 'circle.svg')))
+
+    def testIncrementalRebuildOfRespelledInputs(self):
+        outputDir = os.path.join(self.tempDir, 'output')
+        manifestPath = os.path.join(self.tempDir, 'manifest.json')
+        Svg2VectorBatch.convert([self.inputDir], outputDir, maxWorkers=1, manifestPath=manifestPath)
+        # The same inputs, given in a different way, are neither converted nor stale.
+        inputDir = os.path.join(self.inputDir, 'nested', '..', '.')
+        results = Svg2VectorBatch.convert([inputDir], outputDir, maxWorkers=1, manifestPath=manifestPath)
+        self.assertTrue(all(result.upToDate for result in results))
+        for i, name in enumerate(self.NAMES):
+            subDir = 'nested' if i % 2 else ''
+            self.assertConverted(name, os.path.join(outputDir, subDir, f'{name}.xml'))
+
+        # Outputs of stale entries are kept while a current input owns them.
+        manifest = BuildManifest(manifestPath)
+        circleOutput = BuildManifest.normalizePath(os.path.join(outputDir, 'circle.xml'))
+        manifest.mEntries['/moved/circle.svg'] = BuildManifest.Entry(0, 0, '', circleOutput, BuildManifest.hashFile(circleOutput), '')
+        manifest.mIsModified = True
+        manifest.save()
+        Svg2VectorBatch.convert([self.inputDir], outputDir, maxWorkers=1, manifestPath=manifestPath)
+        self.assertConverted('circle', os.path.join(outputDir, 'circle.xml'))
+        self.assertIsNone(BuildManifest(manifestPath).getEntry('/moved/circle.svg'))
+
+    def testPhaseTimes(self):
+        results = Svg2VectorBatch.convert([self.inputDir], os.path.join(self.tempDir, 'output'), maxWorkers=2)
+        self.assertTrue(all(result.result.getXml() is None for result in results))
+        self.assertEqual({'parse', 'extract', 'flatten', 'write'}, set(Svg2VectorBatch.getPhaseTimes(results)))
+
+class SqliteBatchTest(unittest.TestCase):
+    NAMES = ['circle', 'group', 'linearGradient', 'path', 'rect', 'use']
+
+    def setUp(self):
+        self.testDir = os.path.dirname(__file__)
+        tempDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempDir)
+        self.databasePath = os.path.join(tempDir, 'icons.db')
+        with sqlite3.connect(self.databasePath) as connection:
+            connection.execute('CREATE TABLE icons (name TEXT PRIMARY KEY, svg BLOB, xml TEXT, errors TEXT)')
+            for name in self.NAMES:
+                with open(os.path.join(self.testDir, f'{name}.svg'), 'rb') as file:
+                    connection.execute('INSERT INTO icons (name, svg) VALUES (?, ?)', (name, file.read()))
+            connection.execute('INSERT INTO icons (name, svg) VALUES (?, ?)', ('broken', b'<svg'))
+        connection.close()
+
+    def readRows(self) -> dict:
+        with sqlite3.connect(self.databasePath) as connection:
+            rows = {name: (xml, errors) for name, xml, errors in connection.execute('SELECT name, xml, errors FROM icons')}
+        connection.close()
+        return rows
+
+    def testConvertTable(self):
+        # Batches smaller than the table, written back while the next one is converted.
+        self.assertEqual((len(self.NAMES), 1), SqliteBatch.convert(self.databasePath, keyColumn='name', maxWorkers=2, batchSize=3))
+        rows = self.readRows()
+        for name in self.NAMES:
+            with open(os.path.join(self.testDir, f'{name}.xml'), 'r') as file:
+                self.assertMultiLineEqual(file.read(), rows[name][0])
+            self.assertEqual('', rows[name][1])
+        self.assertIsNone(rows['broken'][0])
+        self.assertTrue(rows['broken'][1].startswith('EXCEPTION in parsing broken'))
+
+    def testQuery(self):
+        query = "SELECT rowid, svg FROM icons WHERE name LIKE 'c%'"
+        self.assertEqual((1, 0), SqliteBatch.convert(self.databasePath, query=query, maxWorkers=1, streaming=True))
+        rows = self.readRows()
+        self.assertEqual(['circle'], [name for name, (xml, errors) in rows.items() if xml is not None])
+
+class ConversionDaemonTest(unittest.TestCase):
+    def testConvertThroughSocket(self):
+        tempDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempDir)
+        socketPath = os.path.join(tempDir, 'daemon.sock')
+        executor = ProcessPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        server = ConversionDaemon.Server(socketPath, executor)
+        self.addCleanup(server.server_close)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(server.shutdown)
+
+        test_dir = os.path.dirname(__file__)
+        with open(os.path.join(test_dir, 'rect.xml'), 'r') as file:
+            expected = file.read()
+        outputPath = os.path.join(tempDir, 'rect.xml')
+        with ConversionClient(socketPath) as client:
+            response = client.convertFile(os.path.join(test_dir, 'rect.svg'))
+            self.assertTrue(response['ok'])
+            self.assertMultiLineEqual(expected, response['xml'])
+            self.assertEqual([], response['messages'])
+            self.assertIn('parse', response['phaseTimes'])
+            response = client.convertFile(os.path.join(test_dir, 'rect.svg'), outputPath)
+            self.assertTrue(response['written'])
+            # Requests that aren't objects are answered, and the connection stays usable.
+            for request in [['rect.svg'], 'rect.svg', None]:
+                response = client.request(request)
+                self.assertFalse(response['ok'])
+                self.assertIn('JSON object', response['errors'])
+            client.mSocket.sendall(ConversionDaemon.HEADER.pack(1) + b'{')
+            self.assertIn('Invalid request', ConversionDaemon.readFrame(client.mSocket)['errors'])
+            response = client.convertString('<svg')
+            self.assertFalse(response['ok'])
+        with open(outputPath, 'r') as file:
+            self.assertMultiLineEqual(expected, file.read())
+
+    def testPathCacheStats(self):
+        tempDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempDir)
+        socketPath = os.path.join(tempDir, 'daemon.sock')
+        executor = ProcessPoolExecutor(max_workers=1, initializer=PathParser.setCacheSize, initargs=(10,))
+        self.addCleanup(executor.shutdown)
+        server = ConversionDaemon.Server(socketPath, executor, 10)
+        self.addCleanup(server.server_close)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(server.shutdown)
+
+        svg = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 10 10"><path d="M1 1h5v5z"/><path d="M1 1h5v5z"/></svg>'
+        with ConversionClient(socketPath) as client:
+            self.assertTrue(client.convertString(svg)['ok'])
+            response = client.convertString(svg)
+            self.assertEqual(3, response['pathCache']['hits'])
+            stats = client.getPathCacheStats()
+        self.assertEqual((1, 3, 1, 10), (stats['size'], stats['hits'], stats['misses'], stats['maxSize']))
+        self.assertEqual(1, len(stats['workers']))
+
+    def testRemoveStaleSocket(self):
+        tempDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempDir)
+        socketPath = os.path.join(tempDir, 'daemon.sock')
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(socketPath)
+        stale.close()
+        ConversionDaemon.removeStaleSocket(socketPath)
+        self.assertFalse(os.path.exists(socketPath))
+
+        # A live daemon's socket and other files are left alone.
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as live:
+            live.bind(socketPath)
+            live.listen()
+            with self.assertRaises(FileExistsError):
+                ConversionDaemon.removeStaleSocket(socketPath)
+        os.unlink(socketPath)
+        with open(socketPath, 'w') as file:
+            file.write('not a socket')
+        with self.assertRaises(FileExistsError):
+            ConversionDaemon.removeStaleSocket(socketPath)
+        self.assertTrue(os.path.isfile(socketPath))
+
+class PersistentWorkerTest(unittest.TestCase):
+    def testJsonLines(self):
+        test_dir = os.path.dirname(__file__)
+        with open(os.path.join(test_dir, 'polygon.svg'), 'r') as svg, open(os.path.join(test_dir, 'polygon.xml'), 'r') as xml:
+            svgContent = svg.read()
+            expected = xml.read()
+        requests = [
+            {'id': 'a', 'path': os.path.join(test_dir, 'polygon.svg')},
+            {'id': 'b', 'svg': svgContent},
+        ]
+        stdin = io.StringIO(''.join(json.dumps(r) + '\n' for r in requests) + '\n[]\n')
+        stdout = io.StringIO()
+        PersistentWorker.run(stdin, stdout)
+        responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual(['a', 'b', None], [r.get('id') for r in responses])
+        self.assertMultiLineEqual(expected, responses[0]['xml'])
+        self.assertMultiLineEqual(expected, responses[1]['xml'])
+        self.assertFalse(responses[2]['ok'])
+        self.assertIn('total_ms', responses[0]['timing'])
+
+class AsyncConverterTest(unittest.TestCase):
+    def testConcurrentConversions(self):
+        test_dir = os.path.dirname(__file__)
+        names = ['circle', 'ellipse', 'line', 'polyline']
+
+        async def convertAll():
+            async with AsyncConverter(AsyncConverter.EXECUTOR_THREAD, maxConcurrency=2) as converter:
+                return await asyncio.gather(*[converter.convertFile(os.path.join(test_dir, f'{name}.svg')) for name in names])
+
+        for name, (xml, errors) in zip(names, asyncio.run(convertAll())):
+            with open(os.path.join(test_dir, f'{name}.xml'), 'r') as file:
+                self.assertMultiLineEqual(file.read(), xml)
+            self.assertEqual('', errors)
+
+    def testTimeout(self):
+        test_dir = os.path.dirname(__file__)
+
+        async def convert():
+            async with AsyncConverter(AsyncConverter.EXECUTOR_THREAD, timeout=0) as converter:
+                await converter.convertFile(os.path.join(test_dir, 'studio.svg'))
+
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(convert())
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file